@@ -1,11 +1,17 @@
+import dataclasses
+import json
 from datetime import date
+from pathlib import Path
 from typing import Annotated
 
 import typer
 from rich.console import Console
 from rich.syntax import Syntax
+from rich.table import Table
 
-from cadwyn._render import render_model_by_path, render_module_by_path
+from cadwyn._importer import import_attribute_from_string
+from cadwyn._profiling import profile_startup as _profile_startup
+from cadwyn._render import render_model_by_path, render_module_by_path, render_package_by_path
 
 _CONSOLE = Console()
 _RAW_ARG = Annotated[bool, typer.Option(help="Output code without color")]
@@ -68,6 +74,96 @@ def render_module(
     output_code(render_module_by_path(module, app, version), raw)
 
 
+@app.command(
+    name="codegen",
+    help=(
+        "Render all versioned models and enums within the modules for every version of the app into "
+        "an importable package with a subpackage per version"
+    ),
+    short_help="Render modules for all versions into a package",
+)
+def codegen(
+    modules: Annotated[list[str], typer.Argument(metavar="<module>...", help="Python paths to the modules to render")],
+    app: Annotated[str, typer.Option(metavar="<module>:<attribute>", help="Python path to the main Cadwyn app")],
+    output_dir: Annotated[
+        Path, typer.Option(file_okay=False, help="Directory that will become the root of the rendered package")
+    ],
+) -> None:
+    for rendered_file in render_package_by_path(modules, app, output_dir):
+        typer.echo(rendered_file)
+
+
+@app.command(
+    name="profile-startup",
+    help=(
+        "Import the app and report how much time each phase of version generation took for every version, "
+        "model, and route along with the numbers of created models, routes, and dependants. "
+        "Timings are inclusive: e.g. the time of creating a model includes creating the models it references"
+    ),
+    short_help="Profile the generation of versions at startup",
+)
+def profile_startup(
+    app: Annotated[str, typer.Option(metavar="<module>:<attribute>", help="Python path to the main Cadwyn app")],
+    output_json: Annotated[bool, typer.Option("--json", help="Output the profile as JSON")] = False,
+    limit: Annotated[int, typer.Option(help="Maximum number of the slowest timings to output in the table")] = 30,
+) -> None:
+    with _profile_startup() as profile:
+        import_attribute_from_string(app)
+
+    if output_json:
+        typer.echo(json.dumps(profile.to_dict(), indent=2))
+        return
+
+    table = Table("Phase", "Version", "Name", "Calls", "Seconds")
+    for timing in profile.sorted_timings()[:limit]:
+        table.add_row(timing.phase, timing.version, timing.name, str(timing.calls), f"{timing.seconds:.4f}")
+    _CONSOLE.print(table)
+    for counter, value in sorted(profile.counters.items()):
+        _CONSOLE.print(f"{counter}: {value}")
+
+
+@app.command(
+    name="memory-usage",
+    help=(
+        "Import the app and report approximate memory that the generated models, routes, and dependants of every "
+        "version occupy. Memory that a version shares with other versions is reported separately from the memory "
+        "that only this version uses, which is roughly how much memory sunsetting the version would free"
+    ),
+    short_help="Report memory usage of every version",
+)
+def memory_usage(
+    app: Annotated[str, typer.Option(metavar="<module>:<attribute>", help="Python path to the main Cadwyn app")],
+    output_json: Annotated[bool, typer.Option("--json", help="Output the report as JSON")] = False,
+    generate_all: Annotated[
+        bool, typer.Option(help="Generate lazily generated routers and models before measuring them")
+    ] = True,
+) -> None:
+    report = import_attribute_from_string(app).get_memory_usage(generate_all=generate_all)
+
+    if output_json:
+        typer.echo(
+            json.dumps(
+                [dataclasses.asdict(usage) | {"total_bytes": usage.total_bytes} for usage in report],
+                indent=2,
+            )
+        )
+        return
+
+    table = Table("Version", "Models", "Routes", "Dependants", "Unique KiB", "Shared KiB", "Largest model")
+    for usage in report:
+        largest_model = max(usage.model_bytes.items(), key=lambda item: item[1], default=None)
+        table.add_row(
+            usage.version,
+            str(usage.models_count),
+            str(usage.routes_count),
+            str(usage.dependants_count),
+            f"{usage.unique_bytes / 1024:.1f}",
+            f"{usage.shared_bytes / 1024:.1f}",
+            f"{largest_model[0]} ({largest_model[1] / 1024:.1f} KiB)" if largest_model else "",
+        )
+    _CONSOLE.print(table)
+
+
 @app.callback()
 def main(
     version: bool = typer.Option(None, "-V", "--version", callback=version_callback, is_eager=True),
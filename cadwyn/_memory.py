@@ -0,0 +1,148 @@
+"""Approximate accounting of the memory that generated versions occupy.
+
+We walk the objects that are reachable from the generated models and routes of each version and sum up their sizes.
+The walk never leaves the generated structures: it does not go into modules, functions, routers, apps, or classes
+that were not generated by Cadwyn so the code that all versions share is never counted.
+Opaque objects such as pydantic-core validators are only counted by their shallow size which is why it is approximate.
+"""
+
+import dataclasses
+import sys
+from collections import Counter
+from collections.abc import Iterable
+from contextvars import ContextVar
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import TYPE_CHECKING, Any
+
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from starlette.applications import Starlette
+from starlette.routing import Router
+
+from cadwyn.schema_generation import SchemaGenerator, generate_versioned_models
+from cadwyn.structure.versions import VersionBundle
+
+if TYPE_CHECKING:
+    from cadwyn.applications import Cadwyn
+
+_NOT_WALKED_TYPES = (
+    ModuleType,
+    FunctionType,
+    MethodType,
+    BuiltinFunctionType,
+    Starlette,
+    Router,
+    VersionBundle,
+    SchemaGenerator,
+    ContextVar,
+)
+# The namespace that the model was defined in belongs to user code, not to the model
+_NOT_WALKED_CLASS_ATTRIBUTES = frozenset({"__pydantic_parent_namespace__"})
+
+
+@dataclasses.dataclass(slots=True)
+class VersionMemoryUsage:
+    version: str
+    models_count: int
+    routes_count: int
+    dependants_count: int
+    unique_bytes: int
+    shared_bytes: int
+    # Approximate size of each generated model by its qualified name, including the models shared with other versions
+    model_bytes: dict[str, int]
+
+    @property
+    def total_bytes(self) -> int:
+        return self.unique_bytes + self.shared_bytes
+
+
+def get_memory_usage(app: "Cadwyn") -> list[VersionMemoryUsage]:
+    """Report how much memory the generated models and the routes of each version occupy.
+
+    The memory of objects that several versions share is reported as shared in each of them.
+    Routers that were not built yet because of lazy router generation are reported as empty.
+    """
+    generators = generate_versioned_models(app.versions, lazy=True)
+    all_generated_models = {
+        id(model) for generator in generators.values() for model in generator.concrete_models.values()
+    }
+
+    object_sizes_by_version: dict[str, dict[int, int]] = {}
+    routes_by_version: dict[str, list[Any]] = {}
+    for version in app.versions:
+        formatted_version = version.value.isoformat()
+        models = generators[formatted_version].concrete_models.values()
+        versioned_router = app.router.versioned_routers.get(version.value)
+        routes = versioned_router.routes if versioned_router is not None else []
+        routes_by_version[formatted_version] = routes
+        object_sizes_by_version[formatted_version] = _get_object_sizes([*models, *routes], all_generated_models)
+    object_occurrences = Counter(
+        object_id for object_sizes in object_sizes_by_version.values() for object_id in object_sizes
+    )
+
+    memory_usage = []
+    for version in app.versions:
+        formatted_version = version.value.isoformat()
+        object_sizes = object_sizes_by_version[formatted_version]
+        generator = generators[formatted_version]
+        unique_bytes = sum(size for object_id, size in object_sizes.items() if object_occurrences[object_id] == 1)
+        memory_usage.append(
+            VersionMemoryUsage(
+                version=formatted_version,
+                models_count=len(generator.concrete_models),
+                routes_count=sum(isinstance(route, APIRoute) for route in routes_by_version[formatted_version]),
+                dependants_count=sum(
+                    _count_dependants(route.dependant)
+                    for route in routes_by_version[formatted_version]
+                    if isinstance(route, APIRoute)
+                ),
+                unique_bytes=unique_bytes,
+                shared_bytes=sum(object_sizes.values()) - unique_bytes,
+                model_bytes={
+                    model.__qualname__: sum(_get_object_sizes([model], {id(model)}).values())
+                    for model in generator.concrete_models.values()
+                },
+            )
+        )
+    return memory_usage
+
+
+def _count_dependants(dependant: Dependant) -> int:
+    return 1 + sum(_count_dependants(sub_dependant) for sub_dependant in dependant.dependencies)
+
+
+def _get_object_sizes(roots: Iterable[Any], walked_classes: set[int]) -> dict[int, int]:
+    object_sizes: dict[int, int] = {}
+    objects_to_walk = list(roots)
+    while objects_to_walk:
+        obj = objects_to_walk.pop()
+        if id(obj) in object_sizes or isinstance(obj, _NOT_WALKED_TYPES):
+            continue
+        if isinstance(obj, type):
+            if id(obj) not in walked_classes:
+                continue
+            objects_to_walk.extend(
+                value for name, value in vars(obj).items() if name not in _NOT_WALKED_CLASS_ATTRIBUTES
+            )
+        elif isinstance(obj, dict):
+            objects_to_walk.extend(obj.keys())
+            objects_to_walk.extend(obj.values())
+        elif isinstance(obj, list | tuple | set | frozenset):
+            objects_to_walk.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                objects_to_walk.append(obj.__dict__)
+            for slot in _get_slots(type(obj)):
+                if hasattr(obj, slot):
+                    objects_to_walk.append(getattr(obj, slot))
+        object_sizes[id(obj)] = sys.getsizeof(obj)
+    return object_sizes
+
+
+def _get_slots(cls: type) -> list[str]:
+    return [
+        slot
+        for base in cls.__mro__
+        for slot in getattr(base, "__slots__", ())
+        if slot not in ("__dict__", "__weakref__")
+    ]
@@ -0,0 +1,77 @@
+"""Optional timing of startup phases that is only enabled by `cadwyn profile-startup`.
+
+When profiling is disabled, `measure` and `count` cost a single global lookup so they are safe to call in hot loops.
+"""
+
+import dataclasses
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Any
+
+_NULL_CONTEXT = nullcontext()
+
+
+@dataclasses.dataclass(slots=True)
+class PhaseTiming:
+    phase: str
+    version: str | None
+    name: str | None
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclasses.dataclass(slots=True)
+class StartupProfile:
+    """Inclusive timings of startup phases and the counts of objects that were created during startup"""
+
+    timings: dict[tuple[str, str | None, str | None], PhaseTiming] = dataclasses.field(default_factory=dict)
+    counters: Counter[str] = dataclasses.field(default_factory=Counter)
+
+    @contextmanager
+    def measure(self, phase: str, version: str | None, name: str | None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = (phase, version, name)
+            timing = self.timings.get(key)
+            if timing is None:
+                timing = self.timings[key] = PhaseTiming(phase, version, name)
+            timing.calls += 1
+            timing.seconds += time.perf_counter() - start
+
+    def sorted_timings(self) -> list[PhaseTiming]:
+        return sorted(self.timings.values(), key=lambda timing: timing.seconds, reverse=True)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "timings": [dataclasses.asdict(timing) for timing in self.sorted_timings()],
+            "counters": dict(self.counters),
+        }
+
+
+_current_profile: StartupProfile | None = None
+
+
+def measure(phase: str, *, version: str | None = None, name: str | None = None) -> AbstractContextManager[None]:
+    if _current_profile is None:
+        return _NULL_CONTEXT
+    return _current_profile.measure(phase, version, name)
+
+
+def count(counter: str, amount: int = 1) -> None:
+    if _current_profile is not None:
+        _current_profile.counters[counter] += amount
+
+
+@contextmanager
+def profile_startup() -> Iterator[StartupProfile]:
+    global _current_profile  # noqa: PLW0603
+    previous_profile = _current_profile
+    _current_profile = StartupProfile()
+    try:
+        yield _current_profile
+    finally:
+        _current_profile = previous_profile
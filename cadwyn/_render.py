@@ -1,7 +1,11 @@
 import ast
+import importlib.util
 import inspect
 import textwrap
+from collections.abc import Collection, Sequence
 from enum import Enum
+from pathlib import Path
+from types import ModuleType
 from typing import TYPE_CHECKING
 
 import typer
@@ -9,12 +13,14 @@ from issubclass import issubclass as lenient_issubclass
 from pydantic import BaseModel
 
 from cadwyn._asts import get_fancy_repr, pop_docstring_from_cls_body
+from cadwyn._startup_cache import get_versions_fingerprint
 from cadwyn.exceptions import CadwynRenderError
 from cadwyn.schema_generation import (
     PydanticFieldWrapper,
     _EnumWrapper,
     _PydanticModelWrapper,
     generate_versioned_models,
+    get_version_package_name,
 )
 from cadwyn.structure.versions import VersionBundle, get_cls_pythonpath
 
@@ -27,6 +33,55 @@ if TYPE_CHECKING:
 def render_module_by_path(module_path: str, app_path: str, version: str):
     module = import_module_from_string(module_path)
     app: Cadwyn = import_attribute_from_string(app_path)
+    return render_module(module, app.versions, version)
+
+
+def render_package_by_path(module_paths: Sequence[str], app_path: str, output_dir: Path) -> list[Path]:
+    """Render the modules for every version of the app into an importable package and return the rendered files.
+
+    Each version gets its own subpackage that mirrors the original module paths:
+    `<output_dir>/v2000_01_01/data/schemas.py` for the `data.schemas` module and the version 2000-01-01,
+    and `<output_dir>/v2000_01_01/data/__init__.py` for the `data` package. Imports between the rendered modules
+    become relative so that they use the classes of the same version.
+    """
+    modules = [import_module_from_string(module_path) for module_path in module_paths]
+    app: Cadwyn = import_attribute_from_string(app_path)
+    module_names = frozenset(module.__name__ for module in modules)
+
+    rendered_files: list[Path] = []
+    for version in app.versions:
+        version_dir = output_dir / get_version_package_name(version.value.isoformat())
+        for module in modules:
+            *package_names, module_name = module.__name__.split(".")
+            if _is_package(module):
+                module_file = version_dir.joinpath(*package_names, module_name, "__init__.py")
+            else:
+                module_file = version_dir.joinpath(*package_names, f"{module_name}.py")
+            module_file.parent.mkdir(parents=True, exist_ok=True)
+            for directory in module_file.parents:
+                if directory.is_relative_to(output_dir):
+                    (directory / "__init__.py").touch()
+            rendered_module = render_module(
+                module, app.versions, version.value.isoformat(), package_module_names=module_names
+            )
+            module_file.write_text(rendered_module + "\n")
+            rendered_files.append(module_file)
+    # Cadwyn only imports pregenerated models if they were rendered from the exact same versions and models
+    (output_dir / "__init__.py").write_text(f"__cadwyn_fingerprint__ = {get_versions_fingerprint(app.versions)!r}\n")
+    return rendered_files
+
+
+def _is_package(module: ModuleType) -> bool:
+    return hasattr(module, "__path__")
+
+
+def render_module(
+    module: ModuleType, versions: VersionBundle, version: str, *, package_module_names: Collection[str] = ()
+) -> str:
+    """Render the module for the version.
+
+    Imports of the modules from `package_module_names` become relative to the root package of the version.
+    """
     attributes_to_alter = [
         name
         for name, value in module.__dict__.items()
@@ -38,17 +93,56 @@ def render_module_by_path(module_path: str, app_path: str, version: str):
     except (OSError, SyntaxError, ValueError) as e:  # pragma: no cover
         raise CadwynRenderError(f"Failed to find the source for module {module.__name__}") from e
 
-    return ast.unparse(
-        ast.Module(
-            body=[
-                _render_model_from_ast(node, getattr(module, node.name), app.versions, version)
-                if isinstance(node, ast.ClassDef) and node.name in attributes_to_alter
-                else node
-                for node in module_ast.body
-            ],
-            type_ignores=module_ast.type_ignores,
-        )
-    )
+    body = [
+        _render_model_from_ast(node, getattr(module, node.name), versions, version)
+        if isinstance(node, ast.ClassDef) and node.name in attributes_to_alter
+        else node
+        for node in module_ast.body
+    ]
+    if package_module_names:
+        _make_imports_of_package_modules_relative(body, module, package_module_names)
+    # Rendered fields are defined through "Field" so the rendered module must be able to import it
+    if "Field" not in module.__dict__ and any(
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "Field"
+        for node in ast.walk(ast.Module(body=body, type_ignores=[]))
+    ):
+        body.insert(_get_first_import_index(body), ast.ImportFrom("pydantic", [ast.alias("Field")], level=0))
+    return ast.unparse(ast.Module(body=body, type_ignores=module_ast.type_ignores))
+
+
+def _make_imports_of_package_modules_relative(
+    body: list[ast.stmt], module: ModuleType, package_module_names: Collection[str]
+) -> None:
+    package_name = module.__name__ if _is_package(module) else module.__name__.rpartition(".")[0]
+    package_parts = package_name.split(".") if package_name else []
+    for node in ast.walk(ast.Module(body=body, type_ignores=[])):
+        if not isinstance(node, ast.ImportFrom):
+            continue
+        imported_module_name = importlib.util.resolve_name("." * node.level + (node.module or ""), package_name)
+        if imported_module_name in package_module_names or all(
+            f"{imported_module_name}.{alias.name}" in package_module_names for alias in node.names
+        ):
+            imported_module_parts = imported_module_name.split(".")
+            common_parts_count = 0
+            for package_part, imported_module_part in zip(package_parts, imported_module_parts, strict=False):
+                if package_part != imported_module_part:
+                    break
+                common_parts_count += 1
+            node.level = len(package_parts) - common_parts_count + 1
+            node.module = ".".join(imported_module_parts[common_parts_count:]) or None
+        elif node.level:
+            # Modules that were not rendered are imported from their original location
+            node.level = 0
+            node.module = imported_module_name
+
+
+def _get_first_import_index(body: list[ast.stmt]) -> int:
+    for index, node in enumerate(body):
+        is_docstring = isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and index == 0
+        is_future_import = isinstance(node, ast.ImportFrom) and node.module == "__future__"
+        if not (is_docstring or is_future_import):
+            return index
+    return len(body)
 
 
 def render_model_by_path(model_path: str, app_path: str, version: str) -> str:
@@ -73,7 +167,7 @@ def render_model(model: type[BaseModel | Enum], versions: VersionBundle, version
 def _render_model_from_ast(
     model_ast: ast.ClassDef, model: type[BaseModel | Enum], versions: VersionBundle, version: str
 ):
-    versioned_models = generate_versioned_models(versions)
+    versioned_models = generate_versioned_models(versions, lazy=True)
     generator = versioned_models[version]
     wrapper = generator._get_wrapper_for_model(model)
 
@@ -0,0 +1,246 @@
+"""Opt-in on-disk cache of the plan of versioned router generation.
+
+Generated models and routes are created at runtime so they cannot be stored. Instead, we store the decisions that
+Cadwyn makes while generating them: which routes every version has to migrate. The stored plan is keyed by a
+fingerprint of everything these decisions depend on: library versions, version dates, the contents of version changes,
+and the source code of head models, endpoints, and their dependencies. Any change to them changes the fingerprint
+so an outdated plan is never used.
+"""
+
+import dataclasses
+import functools
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import re
+import sys
+import tempfile
+from collections.abc import Mapping
+from datetime import date
+from enum import Enum
+from logging import getLogger
+from pathlib import Path
+from typing import Any, get_args, get_origin
+
+import fastapi
+import fastapi.params
+import pydantic
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.routing import BaseRoute
+
+from cadwyn.structure import VersionBundle
+from cadwyn.structure.versions import VersionChange
+
+_logger = getLogger(__name__)
+# Bump it whenever the format of the plan or the meaning of its contents changes
+_PLAN_FORMAT_VERSION = 1
+_PLAN_FILE_NAME = "cadwyn_startup_plan.json"
+_MEMORY_ADDRESS_RE = re.compile(r" at 0x[0-9a-fA-F]+")
+_VERSION_CHANGE_INSTRUCTION_ATTRIBUTES = (
+    "alter_schema_instructions",
+    "alter_enum_instructions",
+    "alter_endpoint_instructions",
+    "alter_request_by_schema_instructions",
+    "alter_request_by_path_instructions",
+    "alter_response_by_schema_instructions",
+    "alter_response_by_path_instructions",
+)
+
+
+@dataclasses.dataclass(slots=True)
+class StartupPlan:
+    path: Path
+    fingerprint: str
+    is_restored: bool = False
+    # Positions of the routes that each version migrates, keyed by the isoformatted version
+    migrated_routes: dict[str, list[int]] = dataclasses.field(default_factory=dict)
+
+    def save(self) -> None:
+        if self.is_restored:
+            return
+        contents = json.dumps({"fingerprint": self.fingerprint, "migrated_routes": self.migrated_routes})
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Several workers can start at the same time so the plan must never be visible half-written
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.path.parent, prefix=f"{self.path.name}.", suffix=".tmp", delete=False
+            ) as file:
+                file.write(contents)
+            temporary_path = Path(file.name)
+            try:
+                temporary_path.replace(self.path)
+            except OSError:
+                temporary_path.unlink(missing_ok=True)
+                raise
+        except OSError:
+            _logger.warning("Failed to save the startup plan", exc_info=True, extra={"path": str(self.path)})
+
+
+def load_startup_plan(cache_dir: str | Path, router: APIRouter, versions: VersionBundle) -> StartupPlan:
+    """Load the plan from the cache directory or return an empty plan if it is missing or outdated"""
+    path = Path(cache_dir) / _PLAN_FILE_NAME
+    fingerprint = get_fingerprint(router, versions)
+    try:
+        stored_plan = json.loads(path.read_text())
+    except FileNotFoundError:
+        return StartupPlan(path, fingerprint)
+    except (OSError, ValueError):
+        _logger.warning("Failed to read the startup plan", exc_info=True, extra={"path": str(path)})
+        return StartupPlan(path, fingerprint)
+
+    if not isinstance(stored_plan, dict) or stored_plan.get("fingerprint") != fingerprint:
+        _logger.info("Startup plan is outdated", extra={"path": str(path)})
+        return StartupPlan(path, fingerprint)
+    return StartupPlan(path, fingerprint, is_restored=True, migrated_routes=stored_plan["migrated_routes"])
+
+
+def get_fingerprint(router: APIRouter, versions: VersionBundle) -> str:
+    fingerprint = _get_versions_fingerprint(versions)
+    fingerprint.add(router.routes)
+    return fingerprint.hexdigest()
+
+
+def get_versions_fingerprint(versions: VersionBundle) -> str:
+    """Fingerprint of everything that versioned models depend on"""
+    return _get_versions_fingerprint(versions).hexdigest()
+
+
+def _get_versions_fingerprint(versions: VersionBundle) -> "_Fingerprint":
+    fingerprint = _Fingerprint()
+    fingerprint.add(
+        _PLAN_FORMAT_VERSION,
+        sys.version_info[:2],
+        importlib.metadata.version("cadwyn"),
+        pydantic.VERSION,
+        fastapi.__version__,
+    )
+    for version in (versions.head_version, *versions.versions):
+        fingerprint.add(getattr(version, "value", None), version.changes)
+    fingerprint.add(versions.versioned_schemas, versions.versioned_enums)
+    return fingerprint
+
+
+class _Fingerprint:
+    """Hash of arbitrary values that does not depend on memory addresses or on the order of sets.
+
+    Classes and functions are described by their qualified names wherever they are referenced while their
+    definitions get hashed separately, once per definition, which makes recursive references harmless.
+    """
+
+    __slots__ = ("_hash", "_definitions", "_file_hashes")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._hash = hashlib.sha256()
+        self._definitions: dict[str, dict[int, Any]] = {}
+        self._file_hashes: dict[str, str | None] = {}
+
+    def add(self, *values: Any) -> None:
+        for value in values:
+            self._hash.update(self._describe(value).encode())
+            self._hash.update(b"\0")
+
+    def hexdigest(self) -> str:
+        described_names: set[str] = set()
+        while names := sorted(self._definitions.keys() - described_names):
+            for name in names:
+                described_names.add(name)
+                # Definitions can be registered while we describe other definitions
+                definitions = list(self._definitions[name].values())
+                self.add(name, sorted(self._describe_definition(definition) for definition in definitions))
+        return self._hash.hexdigest()
+
+    def _describe(self, value: Any) -> str:
+        if value is None or isinstance(value, bool | int | float | str | bytes | date):
+            return repr(value)
+        if get_origin(value) is not None:
+            return f"{self._describe(get_origin(value))}[{', '.join(map(self._describe, get_args(value)))}]"
+        if isinstance(value, Enum):
+            return f"{self._describe(type(value))}.{value.name}"
+        if isinstance(value, type) or inspect.isfunction(value) or inspect.isbuiltin(value):
+            return self._register_definition(value)
+        if inspect.ismethod(value):
+            return f"{self._describe(value.__self__)}.{value.__name__}"
+        if isinstance(value, functools.partial):
+            return self._describe([type(value), value.func, value.args, value.keywords])
+        if isinstance(value, fastapi.params.Depends):
+            return self._describe([type(value), value.dependency, value.use_cache, getattr(value, "scopes", None)])
+        if isinstance(value, APIRoute):
+            return self._describe(
+                [
+                    value.path,
+                    value.methods,
+                    value.name,
+                    value.endpoint,
+                    value.response_model,
+                    value.status_code,
+                    value.tags,
+                    value.dependencies,
+                    value.callbacks,
+                    value.include_in_schema,
+                ]
+            )
+        if isinstance(value, BaseRoute):
+            return f"{self._describe(type(value))}({self._describe(getattr(value, 'path', None))})"
+        if dataclasses.is_dataclass(value):
+            return self._describe(
+                [type(value), {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}]
+            )
+        if isinstance(value, Mapping):
+            return "{" + ", ".join(f"{self._describe(k)}: {self._describe(v)}" for k, v in value.items()) + "}"
+        if isinstance(value, list | tuple):
+            return "[" + ", ".join(map(self._describe, value)) + "]"
+        if isinstance(value, set | frozenset):
+            return "{" + ", ".join(sorted(map(self._describe, value))) + "}"
+        return f"{self._describe(type(value))}:{_MEMORY_ADDRESS_RE.sub('', repr(value))}"
+
+    def _register_definition(self, definition: Any) -> str:
+        name = f"{getattr(definition, '__module__', None)}.{getattr(definition, '__qualname__', repr(definition))}"
+        self._definitions.setdefault(name, {})[id(definition)] = definition
+        return name
+
+    def _describe_definition(self, definition: Any) -> str:
+        if inspect.isbuiltin(definition):
+            return ""
+        if inspect.isfunction(definition):
+            return self._describe_function(definition)
+        module = sys.modules.get(definition.__module__)
+        parts: list[Any] = [self._hash_file(getattr(module, "__file__", None)), definition.__bases__]
+        # Models and enums created at runtime have no source code so we describe their contents as well
+        if issubclass(definition, BaseModel):
+            parts.append({name: [field.annotation, field] for name, field in definition.model_fields.items()})
+        elif issubclass(definition, Enum):
+            parts.append({member.name: member.value for member in definition})
+        elif issubclass(definition, VersionChange):
+            parts.extend(getattr(definition, name) for name in _VERSION_CHANGE_INSTRUCTION_ATTRIBUTES)
+        return self._describe(parts)
+
+    def _describe_function(self, function: Any) -> str:
+        code = function.__code__
+        parts: list[Any] = [self._hash_file(code.co_filename), getattr(function, "__wrapped__", None)]
+        if parts[0] is None:
+            parts.extend([code.co_code, [c for c in code.co_consts if not inspect.iscode(c)]])
+        try:
+            signature = inspect.signature(function)
+        except (TypeError, ValueError):
+            pass
+        else:
+            parts.append(signature.return_annotation)
+            parts.extend(
+                [parameter.name, parameter.kind.name, parameter.annotation, parameter.default]
+                for parameter in signature.parameters.values()
+            )
+        return self._describe(parts)
+
+    def _hash_file(self, path: str | None) -> str | None:
+        if path is None:
+            return None
+        if path not in self._file_hashes:
+            try:
+                self._file_hashes[path] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+            except OSError:
+                self._file_hashes[path] = None
+        return self._file_hashes[path]
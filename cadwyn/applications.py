@@ -1,6 +1,8 @@
 import dataclasses
 import datetime
-from collections.abc import Callable, Coroutine, Sequence
+import functools
+import gc
+from collections.abc import Callable, Collection, Coroutine, Iterator, Sequence
 from datetime import date
 from logging import getLogger
 from pathlib import Path
@@ -8,6 +10,7 @@ from typing import Any, cast
 
 from fastapi import APIRouter, FastAPI, HTTPException, routing
 from fastapi.datastructures import Default
+from fastapi.encoders import jsonable_encoder
 from fastapi.openapi.docs import (
     get_redoc_html,
     get_swagger_ui_html,
@@ -20,21 +23,48 @@ from fastapi.templating import Jinja2Templates
 from fastapi.utils import generate_unique_id
 from starlette.middleware import Middleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 from starlette.routing import BaseRoute, Route
 from starlette.types import Lifespan
 from typing_extensions import Self
 
+from cadwyn import _profiling
+from cadwyn._memory import VersionMemoryUsage, get_memory_usage
 from cadwyn.changelogs import CadwynChangelogResource, _generate_changelog
-from cadwyn.middleware import HeaderVersioningMiddleware, _get_api_version_dependency
-from cadwyn.route_generation import generate_versioned_routers
+from cadwyn.exceptions import RouterGenerationError
+from cadwyn.metrics import CadwynMetrics
+from cadwyn.middleware import (
+    APIVersionLocation,
+    APIVersionResolver,
+    HeaderVersioningMiddleware,
+    _get_api_version_dependency,
+)
+from cadwyn.route_generation import _iter_versioned_routers
 from cadwyn.routing import _RootHeaderAPIRouter
+from cadwyn.schema_generation import generate_versioned_models
 from cadwyn.structure import VersionBundle
 
 CURR_DIR = Path(__file__).resolve()
 logger = getLogger(__name__)
 
 
+def _generate_next_versioned_router(router_versions: Iterator[tuple[date, APIRouter]]) -> tuple[date, APIRouter] | None:
+    with _profiling.measure("generate_versioned_routers"):
+        return next(router_versions, None)
+
+
+def _add_servers_to_openapi(openapi: dict[str, Any], servers: list[dict[str, Any]]) -> dict[str, Any]:
+    if not servers:
+        return openapi
+    openapi_with_servers: dict[str, Any] = {}
+    for key, value in openapi.items():
+        openapi_with_servers[key] = value
+        # This is the same place where get_openapi puts servers
+        if key == "info":
+            openapi_with_servers["servers"] = jsonable_encoder(servers, exclude_none=True)
+    return openapi_with_servers
+
+
 @dataclasses.dataclass(slots=True)
 class FakeDependencyOverridesProvider:
     dependency_overrides: dict[Callable[..., Any], Callable[..., Any]]
@@ -48,8 +78,18 @@ class Cadwyn(FastAPI):
         *,
         versions: VersionBundle,
         api_version_header_name: str = "x-api-version",
+        api_version_resolver: APIVersionResolver | None = None,
+        api_version_location: APIVersionLocation = "header",
+        api_version_parameter_name: str = "api_version",
+        vary_on_api_version_header: bool = False,
+        normalize_api_version_header: bool = False,
         changelog_url: str | None = "/changelog",
         include_changelog_url_in_schema: bool = True,
+        metrics_url: str | None = None,
+        lazy_model_generation: bool = False,
+        lazy_router_generation: bool = False,
+        prewarmed_versions: Collection[date] = (),
+        startup_cache_dir: str | Path | None = None,
         debug: bool = False,
         title: str = "FastAPI",
         summary: str | None = None,
@@ -96,6 +136,14 @@ class Cadwyn(FastAPI):
         **extra: Any,
     ) -> None:
         self.versions = versions
+        self.api_version_location = api_version_location
+        self.api_version_parameter_name = api_version_parameter_name
+        self.lazy_model_generation = lazy_model_generation
+        self.lazy_router_generation = lazy_router_generation
+        self.prewarmed_versions = frozenset(prewarmed_versions)
+        self.startup_cache_dir = startup_cache_dir
+        self.metrics_url = metrics_url
+        self.metrics = CadwynMetrics(versions) if metrics_url is not None else None
         # TODO: Remove argument entirely in any major version.
         self._dependency_overrides_provider = FakeDependencyOverridesProvider({})
 
@@ -155,9 +203,13 @@ class Cadwyn(FastAPI):
             **self._kwargs_to_router,
             api_version_header_name=api_version_header_name,
             api_version_var=self.versions.api_version_var,
+            metrics=self.metrics,
+            versions=self.versions,
         )
 
         self.changelog_url = changelog_url
+        self._prepared_openapi_schemas: dict[str, dict[str, Any]] = {}
+        self._prepared_changelog: CadwynChangelogResource | None = None
         self.include_changelog_url_in_schema = include_changelog_url_in_schema
 
         self.docs_url = docs_url
@@ -174,6 +226,11 @@ class Cadwyn(FastAPI):
             api_version_header_name=self.router.api_version_header_name,
             api_version_var=self.versions.api_version_var,
             default_response_class=default_response_class,
+            api_version_resolver=api_version_resolver,
+            api_version_location=api_version_location,
+            api_version_parameter_name=api_version_parameter_name,
+            get_matching_version=self.router.get_matching_version if normalize_api_version_header else None,
+            add_vary_header=vary_on_api_version_header,
         )
 
     def _add_default_versioned_routers(self) -> None:
@@ -196,8 +253,51 @@ class Cadwyn(FastAPI):
         self._dependency_overrides_provider.dependency_overrides = value
 
     def generate_changelog(self) -> CadwynChangelogResource:
+        if self._prepared_changelog is not None:
+            return self._prepared_changelog
+        self.router.build_all_versioned_routers()
         return _generate_changelog(self.versions, self.router)
 
+    def prepare_for_fork(self) -> None:
+        """Generate everything that Cadwyn would otherwise generate on first use and freeze all current objects.
+
+        Call it in the master process after all routers have been included and right before forking the workers.
+        After that, all versioned routers, models, OpenAPI documents, and the changelog are generated only once and
+        `gc.freeze()` keeps the garbage collector of the workers from writing to the memory pages they occupy,
+        which allows the operating system to share these pages between the workers instead of copying them.
+        The OpenAPI documents and the changelog are never regenerated afterwards so routes must not change either.
+        """
+        self.router.build_all_versioned_routers()
+        for generator in generate_versioned_models(self.versions, lazy=True).values():
+            generator.generate_all_models()
+        self._prepared_openapi_schemas = {
+            formatted_version: self._generate_openapi(routes, formatted_version, servers=None)
+            for formatted_version, routes in self._get_routes_for_each_openapi_version().items()
+        }
+        self._prepared_changelog = _generate_changelog(self.versions, self.router)
+
+        gc.collect()
+        gc.freeze()
+
+    def get_memory_usage(self, *, generate_all: bool = False) -> list[VersionMemoryUsage]:
+        """Report approximate memory that the generated models and routes of each version occupy, newest first.
+
+        Objects that several versions share (such as models that did not change between them) are reported as shared
+        in each of these versions while everything else is reported as unique: sunsetting a version frees roughly
+        its unique memory. By default, only the routers and models that were already generated are accounted for.
+        Pass `generate_all=True` to generate all of them first, just like it would eventually happen in production.
+        """
+        if generate_all:
+            self.router.build_all_versioned_routers()
+            for generator in generate_versioned_models(self.versions, lazy=True).values():
+                generator.generate_all_models()
+        return get_memory_usage(self)
+
+    async def export_metrics(self, req: Request) -> PlainTextResponse:
+        if self.metrics is None:  # pragma: no cover # The route is only added when metrics are collected
+            raise HTTPException(status_code=404, detail="Metrics are not collected")
+        return PlainTextResponse(self.metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
     def _add_utility_endpoints(self, unversioned_router: APIRouter):
         if self.changelog_url is not None:
             unversioned_router.add_api_route(
@@ -208,6 +308,13 @@ class Cadwyn(FastAPI):
                 include_in_schema=self.include_changelog_url_in_schema,
             )
 
+        if self.metrics_url is not None:
+            unversioned_router.add_route(
+                path=self.metrics_url,
+                endpoint=self.export_metrics,
+                include_in_schema=False,
+            )
+
         if self.openapi_url is not None:
             unversioned_router.add_route(
                 path=self.openapi_url,
@@ -243,12 +350,52 @@ class Cadwyn(FastAPI):
         root_router = APIRouter(dependency_overrides_provider=self._dependency_overrides_provider)
         for router in routers:
             root_router.include_router(router)
-        router_versions = generate_versioned_routers(root_router, versions=self.versions)
-        for version, router in router_versions.items():
-            self.add_header_versioned_routers(router, header_value=version.isoformat())
+        router_versions = _iter_versioned_routers(
+            root_router,
+            versions=self.versions,
+            lazy_model_generation=self.lazy_model_generation,
+            startup_cache_dir=self.startup_cache_dir,
+            metrics=self.metrics,
+        )
+        if not self.lazy_router_generation:
+            while (generated_router := _generate_next_versioned_router(router_versions)) is not None:
+                self.add_header_versioned_routers(generated_router[1], header_value=generated_router[0].isoformat())
+            return
+
+        # Each version is generated from the newer one so building a version generates all newer versions as well.
+        # Their routers are kept until their own versions are first used.
+        generated_routers: dict[date, APIRouter] = {}
+        generation_error: Exception | None = None
+
+        def build_versioned_router(version: date) -> None:
+            nonlocal generation_error
+            if generation_error is not None:
+                # The generation can't be resumed after it failed so we keep failing with the original error
+                raise RouterGenerationError(
+                    f"Failed to generate the router of version {version.isoformat()} because the generation of "
+                    "versioned routers failed before"
+                ) from generation_error
+            try:
+                while version not in generated_routers and (
+                    generated_router := _generate_next_versioned_router(router_versions)
+                ):
+                    generated_routers[generated_router[0]] = generated_router[1]
+            except Exception as e:
+                generation_error = e
+                raise
+            self.add_header_versioned_routers(generated_routers.pop(version), header_value=version.isoformat())
+
+        for version in self.versions.version_dates:
+            self.router.add_lazy_versioned_router(version, functools.partial(build_versioned_router, version))
+        for version in self.versions.version_dates:
+            if version in self.prewarmed_versions:
+                self.router.build_versioned_router(version)
 
     async def openapi_jsons(self, req: Request) -> JSONResponse:
         raw_version = req.query_params.get("version") or req.headers.get(self.router.api_version_header_name)
+        if raw_version is None and (api_version := self.versions.api_version_var.get(None)) is not None:
+            # The version came from the path or from the query parameter of the versioned openapi route
+            raw_version = api_version.isoformat()
         not_found_error = HTTPException(
             status_code=404,
             detail=f"OpenApi file of with version `{raw_version}` not found",
@@ -261,10 +408,8 @@ class Cadwyn(FastAPI):
             version = raw_version
 
         if version in self.router.versioned_routers:
-            routes = self.router.versioned_routers[version].routes
             formatted_version = version.isoformat()
         elif version == "unversioned" and self._there_are_public_unversioned_routes():
-            routes = self.router.unversioned_routes
             formatted_version = "unversioned"
         else:
             raise not_found_error
@@ -276,20 +421,41 @@ class Cadwyn(FastAPI):
         if root_path and root_path not in server_urls and self.root_path_in_servers:
             self.servers.insert(0, {"url": root_path})
 
-        return JSONResponse(
-            get_openapi(
-                title=self.title,
-                version=formatted_version,
-                openapi_version=self.openapi_version,
-                description=self.description,
-                summary=self.summary,
-                terms_of_service=self.terms_of_service,
-                contact=self.contact,
-                license_info=self.license_info,
-                routes=routes,
-                tags=self.openapi_tags,
-                servers=self.servers,
-            )
+        servers = self.servers
+        if self.api_version_location == "path" and formatted_version != "unversioned":
+            # Versioned paths in the schema do not include the version prefix so the server has to
+            servers = [{"url": f"{root_path}/{formatted_version}"}, *servers]
+
+        if formatted_version in self._prepared_openapi_schemas:
+            return JSONResponse(_add_servers_to_openapi(self._prepared_openapi_schemas[formatted_version], servers))
+        if formatted_version == "unversioned":
+            routes = self.router.unversioned_routes
+        else:
+            routes = (await self.router.build_versioned_router_without_blocking(cast(date, version))).routes
+        return JSONResponse(self._generate_openapi(routes, formatted_version, servers=servers))
+
+    def _get_routes_for_each_openapi_version(self) -> dict[str, list[BaseRoute]]:
+        self.router.build_all_versioned_routers()
+        routes = {version.isoformat(): router.routes for version, router in self.router.versioned_routers.items()}
+        if self._there_are_public_unversioned_routes():
+            routes["unversioned"] = self.router.unversioned_routes
+        return routes
+
+    def _generate_openapi(
+        self, routes: list[BaseRoute], formatted_version: str, servers: list[dict[str, Any]] | None
+    ) -> dict[str, Any]:
+        return get_openapi(
+            title=self.title,
+            version=formatted_version,
+            openapi_version=self.openapi_version,
+            description=self.description,
+            summary=self.summary,
+            terms_of_service=self.terms_of_service,
+            contact=self.contact,
+            license_info=self.license_info,
+            routes=routes,
+            tags=self.openapi_tags,
+            servers=servers,
         )
 
     def _there_are_public_unversioned_routes(self):
@@ -324,7 +490,12 @@ class Cadwyn(FastAPI):
         return self._render_docs_dashboard(req, docs_url=cast(str, self.redoc_url))
 
     def _extract_root_path(self, req: Request):
-        return req.scope.get("root_path", "").rstrip("/")
+        root_path = req.scope.get("root_path", "")
+        api_version = self.versions.api_version_var.get(None)
+        if self.api_version_location == "path" and api_version is not None:
+            # HeaderVersioningMiddleware appends the version prefix to the root path
+            root_path = root_path.removesuffix(f"/{api_version.isoformat()}")
+        return root_path.rstrip("/")
 
     def _render_docs_dashboard(self, req: Request, docs_url: str):
         base_host = str(req.base_url).rstrip("/")
@@ -363,13 +534,22 @@ class Cadwyn(FastAPI):
             )
             added_routes.append(versioned_router.routes[-1])
 
+        # The api version parameter is added to every route to document it
+        if self.api_version_location == "header":
+            dependencies = [Depends(_get_api_version_dependency(self.router.api_version_header_name, header_value))]
+        elif self.api_version_location == "query":
+            dependencies = [
+                Depends(_get_api_version_dependency(self.api_version_parameter_name, header_value, "query"))
+            ]
+        else:
+            # Path prefixes are documented through the servers of the openapi schema of the version
+            dependencies = []
         added_route_count = 0
-        for router in (first_router, *other_routers):
-            self.router.versioned_routers[header_value_as_dt].include_router(
-                router,
-                dependencies=[Depends(_get_api_version_dependency(self.router.api_version_header_name, header_value))],
-            )
-            added_route_count += len(router.routes)
+        with _profiling.measure("include_router", version=header_value):
+            for router in (first_router, *other_routers):
+                self.router.versioned_routers[header_value_as_dt].include_router(router, dependencies=dependencies)
+                added_route_count += len(router.routes)
+        _profiling.count("routes_created", added_route_count)
 
         added_routes.extend(versioned_router.routes[-added_route_count:])
         self.router.routes.extend(added_routes)
@@ -0,0 +1,142 @@
+"""In-process cache of the final responses of idempotent endpoints.
+
+    from cadwyn.caching import cache_response
+
+    @router.get("/countries")
+    @cache_response(ttl=60, maxsize=1000)
+    async def get_countries() -> list[Country]: ...
+
+Responses are cached after they were migrated to the requested version and serialized, so cache hits skip the
+endpoint, data converters, and serialization altogether.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Collection
+from dataclasses import dataclass
+from datetime import date
+from typing import TypeVar
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_T = TypeVar("_T")
+_RESPONSE_CACHE_ATTRIBUTE = "__cadwyn_response_cache__"
+# (resolved version, scheme, host, path, query string, values of the headers to vary on)
+_CacheKey = tuple[date | None, str, bytes | None, str, bytes, tuple[bytes | None, ...]]
+
+
+@dataclass(slots=True, frozen=True)
+class _CachedResponse:
+    expires_at: float
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+    async def send(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status, "headers": self.headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class ResponseCache:
+    """Caches successful responses to GET requests by resolved version, scheme, host, path, and query for `ttl` seconds.
+
+    Concurrent requests that miss the cache for the same key wait for a single run of the endpoint.
+    At most `maxsize` responses are cached and the least recently used ones are evicted first.
+    Responses are shared between all clients unless you list the request headers that they depend on in `vary`.
+    """
+
+    def __init__(self, *, ttl: float, maxsize: int = 1024, vary: Collection[str] = ()) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.vary = tuple(header.lower().encode("latin-1") for header in vary)
+        self._responses: OrderedDict[_CacheKey, _CachedResponse] = OrderedDict()
+        self._computations: dict[_CacheKey, asyncio.Future[_CachedResponse | None]] = {}
+
+    async def handle(self, version: date | None, app: ASGIApp, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await app(scope, receive, send)
+        key = self._get_key(version, scope)
+
+        response = self._responses.get(key)
+        if response is not None:
+            if response.expires_at > time.monotonic():
+                self._responses.move_to_end(key)
+                return await response.send(send)
+            del self._responses[key]
+
+        computation = self._computations.get(key)
+        if computation is not None:
+            response = await asyncio.shield(computation)
+            if response is not None:
+                return await response.send(send)
+            # The response could not be cached so everyone has to get their own
+            return await app(scope, receive, send)
+
+        computation = self._computations[key] = asyncio.get_running_loop().create_future()
+        response = None
+        try:
+            messages: list[Message] = []
+
+            async def send_and_capture(message: Message) -> None:
+                messages.append(message)
+                await send(message)
+
+            await app(scope, receive, send_and_capture)
+            response = self._create_cached_response(messages)
+            if response is not None:
+                self._responses[key] = response
+                if len(self._responses) > self.maxsize:
+                    self._responses.popitem(last=False)
+        finally:
+            del self._computations[key]
+            computation.set_result(response)
+
+    def clear(self) -> None:
+        self._responses.clear()
+
+    def _get_key(self, version: date | None, scope: Scope) -> _CacheKey:
+        headers = dict(scope["headers"])
+        vary_values = tuple(headers.get(header) for header in self.vary)
+        # Responses can contain absolute URLs so the same app served under different hosts must not share them
+        host = headers.get(b"host")
+        if host is None and scope.get("server") is not None:
+            server_host, server_port = scope["server"]
+            host = f"{server_host}:{server_port}".encode("latin-1")
+        # The root path includes the version prefix in path versioning so we leave it out to share responses
+        # between all dates that resolve to the same version
+        path: str = scope["path"]
+        root_path: str = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path) :]
+        return (version, scope.get("scheme", "http"), host, path, scope["query_string"], vary_values)
+
+    def _create_cached_response(self, messages: list[Message]) -> _CachedResponse | None:
+        if not messages or messages[0]["type"] != "http.response.start" or messages[0]["status"] != 200:
+            return None
+        headers = list(messages[0].get("headers", []))
+        if any(name.lower() == b"set-cookie" for name, _ in headers):
+            return None
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        return _CachedResponse(time.monotonic() + self.ttl, 200, headers, body)
+
+
+def cache_response(*, ttl: float, maxsize: int = 1024, vary: Collection[str] = ()):
+    """Cache the final responses of the endpoint for every version. See `ResponseCache` for the arguments.
+
+    Only use it for endpoints whose responses depend on nothing but the version, the URL of the request,
+    and the headers from `vary`: cache hits do not run the endpoint, its dependencies, or its background tasks.
+    The cache is available as the `__cadwyn_response_cache__` attribute of the endpoint.
+    """
+
+    def decorator(endpoint: _T) -> _T:
+        setattr(endpoint, _RESPONSE_CACHE_ATTRIBUTE, ResponseCache(ttl=ttl, maxsize=maxsize, vary=vary))
+        return endpoint
+
+    return decorator
+
+
+def get_response_cache(route: BaseRoute) -> ResponseCache | None:
+    # Cadwyn wraps versioned endpoints with functools.wraps which copies the attribute to the wrapper
+    return getattr(getattr(route, "endpoint", None), _RESPONSE_CACHE_ATTRIBUTE, None)
@@ -64,7 +64,7 @@ def hidden(instruction_or_version_change: T) -> T:
 
 def _generate_changelog(versions: VersionBundle, router: _RootHeaderAPIRouter) -> "CadwynChangelogResource":
     changelog = CadwynChangelogResource()
-    schema_generators = generate_versioned_models(versions)
+    schema_generators = generate_versioned_models(versions, lazy=True)
     for version, older_version in zip(versions, versions.versions[1:], strict=False):
         routes_from_newer_version = router.versioned_routers[version.value].routes
         schemas_from_older_version = get_fields_from_routes(router.versioned_routers[older_version.value].routes)
@@ -0,0 +1,152 @@
+"""Counters and histograms that show which versions are still used and which data converters run the most.
+
+All of them are stored in arrays that are preallocated for every version and data converter of the version bundle,
+so recording a request costs a few index operations. The arrays belong to the current process: each worker
+of a multi-process server exports its own metrics.
+"""
+
+import bisect
+import time
+from array import array
+from collections.abc import Iterator
+from datetime import date
+from typing import TYPE_CHECKING, Any
+
+from starlette.routing import BaseRoute
+
+from cadwyn.structure.data import RequestInfo, ResponseInfo, _AlterDataInstruction
+
+if TYPE_CHECKING:
+    from cadwyn.structure.versions import VersionBundle
+
+# Upper bounds of the buckets of the histogram of data converter durations in seconds
+DATA_CONVERTER_DURATION_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+
+class CadwynMetrics:
+    def __init__(self, versions: "VersionBundle") -> None:
+        self.version_dates = versions.version_dates
+        self._version_indexes = {version: index for index, version in enumerate(self.version_dates)}
+        self.exact_matches = array("Q", [0] * len(self.version_dates))
+        self.partial_matches = array("Q", [0] * len(self.version_dates))
+
+        # Routes get their indexes when they receive their first request because routers can be built lazily
+        self.route_labels: list[tuple[str, str]] = []
+        self._route_label_indexes: dict[tuple[str, str], int] = {}
+        self._route_indexes: dict[int, int] = {}
+        # Indexed by route index * number of versions + version index
+        self.route_requests = array("Q")
+
+        self.data_converters: list[_AlterDataInstruction] = []
+        self.data_converter_versions: list[date] = []
+        self._data_converter_indexes: dict[int, int] = {}
+        for version in versions:
+            for version_change in version.changes:
+                for instruction in _get_data_converters(version_change):
+                    if id(instruction) not in self._data_converter_indexes:
+                        self._data_converter_indexes[id(instruction)] = len(self.data_converters)
+                        self.data_converters.append(instruction)
+                        self.data_converter_versions.append(version.value)
+        self.data_converter_calls = array("Q", [0] * len(self.data_converters))
+        self.data_converter_seconds = array("d", [0.0] * len(self.data_converters))
+        # Indexed by data converter index * number of buckets + bucket index. The last bucket is +Inf
+        self._buckets_count = len(DATA_CONVERTER_DURATION_BUCKETS) + 1
+        self.data_converter_duration_buckets = array("Q", [0] * (len(self.data_converters) * self._buckets_count))
+
+    def record_version_match(self, version: date, *, is_exact: bool) -> None:
+        if is_exact:
+            self.exact_matches[self._version_indexes[version]] += 1
+        else:
+            self.partial_matches[self._version_indexes[version]] += 1
+
+    def record_request(self, version: date, route: BaseRoute) -> None:
+        route_index = self._route_indexes.get(id(route))
+        if route_index is None:
+            route_index = self._add_route(route)
+        self.route_requests[route_index * len(self.version_dates) + self._version_indexes[version]] += 1
+
+    def call_data_converter(self, instruction: _AlterDataInstruction, payload: RequestInfo | ResponseInfo) -> None:
+        index = self._data_converter_indexes[id(instruction)]
+        start = time.perf_counter()
+        try:
+            instruction(payload)
+        finally:
+            duration = time.perf_counter() - start
+            self.data_converter_calls[index] += 1
+            self.data_converter_seconds[index] += duration
+            bucket_index = bisect.bisect_left(DATA_CONVERTER_DURATION_BUCKETS, duration)
+            self.data_converter_duration_buckets[index * self._buckets_count + bucket_index] += 1
+
+    def render_prometheus(self) -> str:
+        """Export all metrics in the Prometheus text exposition format"""
+        return "".join(f"{line}\n" for line in self._iter_prometheus_lines())
+
+    def _add_route(self, route: BaseRoute) -> int:
+        methods = getattr(route, "methods", None) or ()
+        label = (",".join(sorted(methods)), getattr(route, "path", ""))
+        route_index = self._route_label_indexes.get(label)
+        if route_index is None:
+            route_index = self._route_label_indexes[label] = len(self.route_labels)
+            self.route_labels.append(label)
+            self.route_requests.extend([0] * len(self.version_dates))
+        self._route_indexes[id(route)] = route_index
+        return route_index
+
+    def _iter_prometheus_lines(self) -> Iterator[str]:
+        versions = [version.isoformat() for version in self.version_dates]
+
+        yield (
+            "# HELP cadwyn_version_matches_total Requests by the version that they were routed to. "
+            "The match is partial when the requested version is not defined and an older version was picked instead."
+        )
+        yield "# TYPE cadwyn_version_matches_total counter"
+        for match, counters in (("exact", self.exact_matches), ("partial", self.partial_matches)):
+            for version, value in zip(versions, counters, strict=True):
+                yield _sample("cadwyn_version_matches_total", {"version": version, "match": match}, value)
+
+        yield "# HELP cadwyn_requests_total Requests by the version that they were routed to and by their route."
+        yield "# TYPE cadwyn_requests_total counter"
+        for route_index, (methods, path) in enumerate(self.route_labels):
+            for version_index, version in enumerate(versions):
+                value = self.route_requests[route_index * len(versions) + version_index]
+                if value:
+                    labels = {"version": version, "method": methods, "route": path}
+                    yield _sample("cadwyn_requests_total", labels, value)
+
+        yield "# HELP cadwyn_data_converter_duration_seconds Durations of request and response data converters."
+        yield "# TYPE cadwyn_data_converter_duration_seconds histogram"
+        for index, instruction in enumerate(self.data_converters):
+            labels = {
+                "version": self.data_converter_versions[index].isoformat(),
+                "converter": f"{instruction.owner.__name__}.{instruction.transformer.__name__}",
+            }
+            cumulative_count = 0
+            for bucket_index, upper_bound in enumerate((*DATA_CONVERTER_DURATION_BUCKETS, "+Inf")):
+                cumulative_count += self.data_converter_duration_buckets[index * self._buckets_count + bucket_index]
+                yield _sample(
+                    "cadwyn_data_converter_duration_seconds_bucket", labels | {"le": str(upper_bound)}, cumulative_count
+                )
+            yield _sample("cadwyn_data_converter_duration_seconds_sum", labels, self.data_converter_seconds[index])
+            yield _sample("cadwyn_data_converter_duration_seconds_count", labels, self.data_converter_calls[index])
+
+
+def _get_data_converters(version_change: Any) -> Iterator[_AlterDataInstruction]:
+    for instructions_by_key in (
+        version_change.alter_request_by_schema_instructions,
+        version_change.alter_request_by_path_instructions,
+        version_change.alter_response_by_schema_instructions,
+        version_change.alter_response_by_path_instructions,
+    ):
+        for instructions in instructions_by_key.values():
+            yield from instructions
+
+
+def _sample(name: str, labels: dict[str, str], value: float) -> str:
+    formatted_labels = ",".join(
+        f'{label_name}="{_escape_label_value(label_value)}"' for label_name, label_value in labels.items()
+    )
+    return f"{name}{{{formatted_labels}}} {value}"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
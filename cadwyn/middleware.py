@@ -1,27 +1,55 @@
+import asyncio
 import inspect
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
 from contextlib import AsyncExitStack
 from contextvars import ContextVar
 from datetime import date
-from typing import Annotated, Any, cast
+from typing import Annotated, Any, Literal, TypeAlias, cast
 
-from fastapi import Header, Request, Response
+from fastapi import Header, Query, Request, Response, status
 from fastapi._compat import _normalize_errors
 from fastapi.dependencies.utils import get_dependant, solve_dependencies
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
 from starlette.middleware.base import BaseHTTPMiddleware, DispatchFunction, RequestResponseEndpoint
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
 
+from cadwyn import tracing
 
-def _get_api_version_dependency(api_version_header_name: str, version_example: str):
+# Picks the api version of a request that does not have the version header. Returns None to leave it unversioned
+APIVersionResolver: TypeAlias = Callable[[Request], Awaitable[date | None]]
+# Where requests specify their api version: a header, the first segment of the path, or a query parameter
+APIVersionLocation: TypeAlias = Literal["header", "path", "query"]
+
+# Matches "/2022-11-16" at the start of the path
+_API_VERSION_PATH_PREFIX_REGEX = re.compile(r"/(\d{4}-\d{2}-\d{2})(?=/|$)")
+_DATE_TYPE_ADAPTER = TypeAdapter(date)
+
+
+def _get_api_version_dependency(
+    api_version_parameter_name: str,
+    version_example: str,
+    api_version_location: Literal["header", "query"] = "header",
+):
     def api_version_dependency(**kwargs: Any):
         return next(iter(kwargs.values()))
 
+    if api_version_location == "header":
+        param = Header(examples=[version_example])
+    else:
+        param = Query(alias=api_version_parameter_name, examples=[version_example])
     api_version_dependency.__signature__ = inspect.Signature(
         parameters=[
             inspect.Parameter(
-                api_version_header_name.replace("-", "_"),
+                api_version_parameter_name.replace("-", "_"),
                 inspect.Parameter.KEYWORD_ONLY,
-                annotation=Annotated[date, Header(examples=[version_example])],
+                annotation=Annotated[date, param],
                 default=version_example,
             ),
         ],
@@ -29,7 +57,104 @@ def _get_api_version_dependency(api_version_header_name: str, version_example: s
     return api_version_dependency
 
 
+class CachedAPIVersionResolver:
+    """Resolves the version pinned to the client of the request and caches it for `ttl` seconds.
+
+    `get_key` extracts the client key (such as the API key) from the request and `resolve_version` looks up
+    the version pinned to it (for example, in the database). Concurrent requests with the same key wait for
+    a single lookup. At most `maxsize` keys are cached and the least recently used ones are evicted first.
+    `vary_headers` are the names of the headers that `get_key` reads. Cadwyn adds them to the `Vary` header
+    of the responses to the requests whose versions were resolved when it varies on the version header.
+    """
+
+    def __init__(
+        self,
+        get_key: Callable[[Request], str | None],
+        resolve_version: Callable[[str], Awaitable[date | None]],
+        *,
+        ttl: float = 60.0,
+        maxsize: int = 10_000,
+        vary_headers: Sequence[str] = (),
+    ) -> None:
+        self.get_key = get_key
+        self.resolve_version = resolve_version
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.vary_headers = tuple(vary_headers)
+        # key -> (expiration time, version)
+        self._cache: OrderedDict[str, tuple[float, date | None]] = OrderedDict()
+        self._lookups_in_flight: dict[str, asyncio.Future[date | None]] = {}
+
+    async def __call__(self, request: Request) -> date | None:
+        key = self.get_key(request)
+        if key is None:
+            return None
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, version = cached
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                return version
+            del self._cache[key]
+
+        lookup = self._lookups_in_flight.get(key)
+        if lookup is None:
+            lookup = self._lookups_in_flight[key] = asyncio.ensure_future(self._lookup(key))
+        # Shielding so that a cancelled request does not cancel the lookup for everyone else who waits for it
+        return await asyncio.shield(lookup)
+
+    async def _lookup(self, key: str) -> date | None:
+        lookup = asyncio.current_task()
+        try:
+            version = await self.resolve_version(key)
+        finally:
+            # The key could have been invalidated during the lookup and a newer lookup could have replaced this one
+            is_latest_lookup = self._lookups_in_flight.get(key) is lookup
+            if is_latest_lookup:
+                del self._lookups_in_flight[key]
+        if not is_latest_lookup:
+            # The version could have changed after the lookup started so we must not cache it
+            return version
+        self._cache[key] = (time.monotonic() + self.ttl, version)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return version
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Forget the cached version of the key (for example, after the client upgraded) or of all keys.
+
+        Lookups that are already in flight are forgotten as well: the requests that wait for them still get
+        their results but the results are not cached and new requests start new lookups.
+        """
+        if key is None:
+            self._cache.clear()
+            self._lookups_in_flight.clear()
+        else:
+            self._cache.pop(key, None)
+            self._lookups_in_flight.pop(key, None)
+
+
+def _match_api_version_path_prefix(scope: Scope) -> "re.Match[str] | None":
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    # Starlette keeps the root path in the path so we look for the prefix right after it
+    return _API_VERSION_PATH_PREFIX_REGEX.match(path, len(root_path) if path.startswith(root_path) else 0)
+
+
+def _strip_api_version_path_prefix(scope: Scope, prefix_match: "re.Match[str]") -> None:
+    # The scope is shared with the rest of the app so we extend the root path in place, just like Mount does
+    scope["root_path"] = scope.get("root_path", "") + prefix_match.group(0)
+
+
 class HeaderVersioningMiddleware(BaseHTTPMiddleware):
+    """Sets the api version var from the request.
+
+    Despite its name, it supports all api version locations and websocket connections too. In path mode,
+    it strips the version prefix by appending it to the root path of the request, just like starlette's Mount does,
+    so that versioned routes are matched without the prefix.
+    """
+
     def __init__(
         self,
         app: ASGIApp,
@@ -37,18 +162,75 @@ class HeaderVersioningMiddleware(BaseHTTPMiddleware):
         api_version_header_name: str,
         api_version_var: ContextVar[date] | ContextVar[date | None],
         default_response_class: type[Response] = JSONResponse,
+        api_version_resolver: APIVersionResolver | None = None,
+        api_version_location: APIVersionLocation = "header",
+        api_version_parameter_name: str = "api_version",
+        get_matching_version: Callable[[date], date | None] | None = None,
+        add_vary_header: bool = False,
         dispatch: DispatchFunction | None = None,
     ) -> None:
         super().__init__(app, dispatch)
+        # If set, the version header is replaced with the version that will serve the request
+        self.get_matching_version = get_matching_version
+        self.add_vary_header = add_vary_header and api_version_location == "header"
         self.api_version_header_name = api_version_header_name
+        self.api_version_resolver = api_version_resolver
+        # Caches can't know which headers an arbitrary resolver reads so its responses vary on everything
+        # unless the resolver lists its headers the way CachedAPIVersionResolver does
+        self._api_version_resolver_vary_headers: Sequence[str] = getattr(api_version_resolver, "vary_headers", ("*",))
+        self.api_version_location = api_version_location
+        self.api_version_parameter_name = api_version_parameter_name
         self.api_version_var = api_version_var
         self.default_response_class = default_response_class
         # We use the dependant to apply fastapi's validation to the header, making validation at middleware level
         # consistent with validation and route level.
-        self.version_header_validation_dependant = get_dependant(
-            path="",
-            call=_get_api_version_dependency(api_version_header_name, "2000-08-23"),
-        )
+        if api_version_location == "query":
+            self._api_version_validation_name = api_version_parameter_name
+            self.version_header_validation_dependant = get_dependant(
+                path="",
+                call=_get_api_version_dependency(api_version_parameter_name, "2000-08-23", "query"),
+            )
+        else:
+            self._api_version_validation_name = api_version_header_name
+            self.version_header_validation_dependant = get_dependant(
+                path="",
+                call=_get_api_version_dependency(api_version_header_name, "2000-08-23"),
+            )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "websocket":
+            await self._handle_websocket(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+    async def _handle_websocket(self, scope: Scope, receive: Receive, send: Send) -> None:
+        prefix_match = None
+        if self.api_version_location == "path":
+            prefix_match = _match_api_version_path_prefix(scope)
+            raw_api_version = prefix_match.group(1) if prefix_match is not None else None
+        elif self.api_version_location == "query":
+            raw_api_version = QueryParams(scope["query_string"]).get(self.api_version_parameter_name)
+        else:
+            raw_api_version = Headers(scope=scope).get(self.api_version_header_name)
+
+        api_version: date | None = None
+        if raw_api_version is not None:
+            with tracing.span("cadwyn.validate_version_header"):
+                try:
+                    api_version = _DATE_TYPE_ADAPTER.validate_python(raw_api_version)
+                except ValidationError:
+                    # Closing the connection before accepting it rejects the handshake
+                    close = WebSocketClose(status.WS_1008_POLICY_VIOLATION, f"Invalid api version: {raw_api_version}")
+                    await close(scope, receive, send)
+                    return
+            if prefix_match is not None:
+                _strip_api_version_path_prefix(scope, prefix_match)
+        elif self.api_version_resolver is not None:
+            with tracing.span("cadwyn.resolve_pinned_version"):
+                api_version = await self.api_version_resolver(Request(scope))
+        if api_version is not None:
+            self.api_version_var.set(api_version)
+        await self.app(scope, receive, send)
 
     async def dispatch(
         self,
@@ -58,17 +240,45 @@ class HeaderVersioningMiddleware(BaseHTTPMiddleware):
         # We handle api version at middleware level because if we try to add a Dependency to all routes, it won't work:
         # we use this header for routing so the user will simply get a 404 if the header is invalid.
         api_version: date | None = None
-        if self.api_version_header_name in request.headers:
+        if self.api_version_location == "path":
+            prefix_match = _match_api_version_path_prefix(request.scope)
+            if prefix_match is not None:
+                with tracing.span("cadwyn.validate_version_header"):
+                    try:
+                        api_version = _DATE_TYPE_ADAPTER.validate_python(prefix_match.group(1))
+                    except ValidationError as e:
+                        errors = [
+                            {**error, "loc": ("path", self.api_version_parameter_name)}
+                            for error in e.errors(include_url=False)
+                        ]
+                        return self.default_response_class(status_code=422, content=jsonable_encoder(errors))
+                self.api_version_var.set(api_version)
+                _strip_api_version_path_prefix(request.scope, prefix_match)
+        elif self._api_version_validation_name in (
+            request.query_params if self.api_version_location == "query" else request.headers
+        ):
             async with AsyncExitStack() as async_exit_stack:
-                solved_result = await solve_dependencies(
-                    request=request,
-                    dependant=self.version_header_validation_dependant,
-                    async_exit_stack=async_exit_stack,
-                    embed_body_fields=False,
-                )
+                with tracing.span("cadwyn.validate_version_header"):
+                    solved_result = await solve_dependencies(
+                        request=request,
+                        dependant=self.version_header_validation_dependant,
+                        async_exit_stack=async_exit_stack,
+                        embed_body_fields=False,
+                    )
                 if solved_result.errors:
                     return self.default_response_class(status_code=422, content=_normalize_errors(solved_result.errors))
-                api_version = cast(date, solved_result.values[self.api_version_header_name.replace("-", "_")])
+                api_version = cast(date, solved_result.values[self._api_version_validation_name.replace("-", "_")])
+                self.api_version_var.set(api_version)
+                if self.get_matching_version is not None and self.api_version_location == "header":
+                    api_version = _normalize_version_header(
+                        request, api_version, self.api_version_header_name, self.get_matching_version
+                    )
+        is_resolved_version = False
+        if api_version is None and self.api_version_resolver is not None:
+            is_resolved_version = True
+            with tracing.span("cadwyn.resolve_pinned_version"):
+                api_version = await self.api_version_resolver(request)
+            if api_version is not None:
                 self.api_version_var.set(api_version)
 
         response = await call_next(request)
@@ -76,5 +286,25 @@ class HeaderVersioningMiddleware(BaseHTTPMiddleware):
         if api_version is not None:
             # We return it because we will be returning the **matched** version, not the requested one.
             response.headers[self.api_version_header_name] = api_version.isoformat()
+        if self.add_vary_header:
+            response.headers.add_vary_header(self.api_version_header_name)
+            if is_resolved_version:
+                # The version of the request depended on the headers that the resolver read
+                for header_name in self._api_version_resolver_vary_headers:
+                    response.headers.add_vary_header(header_name)
 
         return response
+
+
+def _normalize_version_header(
+    request: Request,
+    api_version: date,
+    api_version_header_name: str,
+    get_matching_version: Callable[[date], date | None],
+) -> date:
+    matching_version = get_matching_version(api_version)
+    if matching_version is None or matching_version == api_version:
+        return api_version
+    # Updating the headers of the scope in place so that everything after the middleware sees the new value
+    MutableHeaders(scope=request.scope)[api_version_header_name] = matching_version.isoformat()
+    return matching_version
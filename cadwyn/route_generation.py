@@ -1,8 +1,10 @@
 import re
-from collections import defaultdict
-from collections.abc import Callable, Sequence
-from copy import deepcopy
+from collections import Counter, defaultdict
+from collections.abc import Callable, Collection, Iterator, Sequence
+from copy import copy, deepcopy
 from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -16,12 +18,15 @@ import fastapi.routing
 import fastapi.security.base
 import fastapi.utils
 from fastapi import APIRouter
+from fastapi.dependencies.utils import get_flat_dependant
 from fastapi.routing import APIRoute
 from issubclass import issubclass as lenient_issubclass
 from pydantic import BaseModel
 from starlette.routing import BaseRoute
 from typing_extensions import assert_never
 
+from cadwyn import _profiling
+from cadwyn._startup_cache import StartupPlan, load_startup_plan
 from cadwyn._utils import Sentinel
 from cadwyn.exceptions import (
     CadwynError,
@@ -33,8 +38,11 @@ from cadwyn.exceptions import (
     RouterPathParamsModifiedError,
 )
 from cadwyn.schema_generation import (
+    SchemaGenerator,
     _add_request_and_response_params,
-    generate_versioned_models,
+    _collect_referenced_models,
+    _get_route_name,
+    _get_versioned_models_migration,
 )
 from cadwyn.structure import Version, VersionBundle
 from cadwyn.structure.common import Endpoint, VersionDate
@@ -43,10 +51,14 @@ from cadwyn.structure.endpoints import (
     EndpointExistedInstruction,
     EndpointHadInstruction,
 )
+from cadwyn.websockets import get_websocket_message_models
 
 if TYPE_CHECKING:
     from fastapi.dependencies.models import Dependant
 
+    from cadwyn.metrics import CadwynMetrics
+
+_logger = getLogger(__name__)
 _Call = TypeVar("_Call", bound=Callable[..., Any])
 _R = TypeVar("_R", bound=fastapi.routing.APIRouter)
 # This is a hack we do because we can't guarantee how the user will use the router.
@@ -59,8 +71,39 @@ class _EndpointInfo:
     endpoint_methods: frozenset[str]
 
 
-def generate_versioned_routers(router: _R, versions: VersionBundle) -> dict[VersionDate, _R]:
-    return _EndpointTransformer(router, versions).transform()
+def generate_versioned_routers(
+    router: _R,
+    versions: VersionBundle,
+    *,
+    lazy_model_generation: bool = False,
+    startup_cache_dir: str | Path | None = None,
+) -> dict[VersionDate, _R]:
+    return dict(
+        _iter_versioned_routers(
+            router, versions, lazy_model_generation=lazy_model_generation, startup_cache_dir=startup_cache_dir
+        )
+    )
+
+
+def _iter_versioned_routers(
+    router: _R,
+    versions: VersionBundle,
+    *,
+    lazy_model_generation: bool = False,
+    startup_cache_dir: str | Path | None = None,
+    metrics: "CadwynMetrics | None" = None,
+) -> Iterator[tuple[VersionDate, _R]]:
+    """Generate the routers of the versions one by one, from the newest to the oldest.
+
+    Each version is generated from the newer one so generating a version only does the work of that version.
+    """
+    return _EndpointTransformer(
+        router,
+        versions,
+        lazy_model_generation=lazy_model_generation,
+        startup_cache_dir=startup_cache_dir,
+        metrics=metrics,
+    ).transform()
 
 
 class VersionedAPIRouter(fastapi.routing.APIRouter):
@@ -78,80 +121,202 @@ class VersionedAPIRouter(fastapi.routing.APIRouter):
 
 
 class _EndpointTransformer(Generic[_R]):
-    def __init__(self, parent_router: _R, versions: VersionBundle) -> None:
+    def __init__(
+        self,
+        parent_router: _R,
+        versions: VersionBundle,
+        *,
+        lazy_model_generation: bool = False,
+        startup_cache_dir: str | Path | None = None,
+        metrics: "CadwynMetrics | None" = None,
+    ) -> None:
         super().__init__()
         self.parent_router = parent_router
         self.versions = versions
-        self.schema_generators = generate_versioned_models(versions)
+        # Version bundles can be shared between apps so the metrics of the app are passed to the endpoints directly
+        self.metrics = metrics
+        self._startup_plan: StartupPlan | None = None
+        if startup_cache_dir is not None:
+            with _profiling.measure("load_startup_plan"):
+                self._startup_plan = load_startup_plan(startup_cache_dir, parent_router, versions)
+        self.lazy_model_generation = lazy_model_generation
+        # Models of each version are only migrated and generated along with its routes
+        with _profiling.measure("generate_versioned_models"):
+            self.schema_generators = _get_versioned_models_migration(versions)
 
         self.routes_that_never_existed = [
             route for route in parent_router.routes if isinstance(route, APIRoute) and _DELETED_ROUTE_TAG in route.tags
         ]
-
-    def transform(self) -> dict[VersionDate, _R]:
-        router = deepcopy(self.parent_router)
-        routers: dict[VersionDate, _R] = {}
+        # Ids of the routes that were cloned while generating the current version and can be changed in place
+        self._owned_routes: set[int] = set()
+        self._route_models: dict[int, set[type]] = {}
+        # Route positions never change between versions so a single index can be used for all of them
+        self._route_index = _RouteIndex(parent_router.routes)
+        # Positions of the routes that were cloned since the last data converter validation
+        self._changed_route_positions: set[int] = set()
+        self._route_identifiers = _RouteIdentifiers()
+        # Websocket routes do not have bodies so their message models are the only way for their converters to apply
+        self._websocket_message_models = frozenset(
+            model for route in parent_router.routes for model in get_websocket_message_models(route)
+        )
+        # Data migrations wrap the endpoints of routes so they are only added to the copies of the routes that end up
+        # in the generated routers while older versions are generated from the original routes.
+        # Id of the original route -> (the original route, its copy with data migrations)
+        self._routes_with_data_migrations: dict[int, tuple[APIRoute, APIRoute]] = {}
+        # Route position -> the dependant of the head route that request migrations are solved against
+        self._head_dependants: dict[int, Dependant] = {}
+
+    def transform(self) -> Iterator[tuple[VersionDate, _R]]:
+        # Routes are shared between versions until either endpoint instructions or schema migrations change them.
+        # Before a route is changed, it gets cloned and the clone replaces it in the router of the current version.
+        router = _copy_router(self.parent_router)
+        self._owned_routes.clear()
+        # The routes of the head router must never be changed
+        for route_index, route in enumerate(router.routes):
+            if isinstance(route, APIRoute):
+                self._get_mutable_route(router, route_index)
 
         for version in self.versions:
-            self.schema_generators[str(version.value)].annotation_transformer.migrate_router_to_version(router)
+            generator = self.schema_generators[str(version.value)]
+            if not self.lazy_model_generation:
+                with _profiling.measure("generate_versioned_models", version=generator.version):
+                    generator.generate_all_models()
+            with _profiling.measure("migrate_routes", version=generator.version):
+                migrated_routes_count = self._migrate_router_to_version(router, version, generator)
+
+            if self._startup_plan is not None and self._startup_plan.is_restored:
+                # The plan is only saved after the converters of the exact same versions and routes were validated
+                self._changed_route_positions.clear()
+            else:
+                with _profiling.measure("validate_data_converters", version=generator.version):
+                    self._validate_all_data_converters_are_applied(router, version)
+
+            _logger.debug(
+                "Generated versioned routes",
+                extra={
+                    "version": version.value.isoformat(),
+                    "generated_models_count": generator.generated_models_count,
+                    "versioned_models_count": generator.versioned_models_count,
+                    "migrated_routes_count": migrated_routes_count,
+                },
+            )
+            versioned_router = router
+            # Applying changes for the next version
+            router = _copy_router(router)
+            self._owned_routes.clear()
+            with _profiling.measure("apply_endpoint_changes", version=generator.version):
+                self._apply_endpoint_changes_to_router(router, version)
 
-            self._validate_all_data_converters_are_applied(router, version)
+            if version is self.versions.versions[-1] and self.routes_that_never_existed:
+                raise RouterGenerationError(
+                    "Every route you mark with "
+                    f"@VersionedAPIRouter.{VersionedAPIRouter.only_exists_in_older_versions.__name__} "
+                    "must be restored in one of the older versions. Otherwise you just need to delete it altogether. "
+                    "The following routes have been marked with that decorator but were never restored: "
+                    f"{self.routes_that_never_existed}",
+                )
 
-            routers[version.value] = router
-            # Applying changes for the next version
-            router = deepcopy(router)
-            self._apply_endpoint_changes_to_router(router, version)
-
-        if self.routes_that_never_existed:
-            raise RouterGenerationError(
-                "Every route you mark with "
-                f"@VersionedAPIRouter.{VersionedAPIRouter.only_exists_in_older_versions.__name__} "
-                "must be restored in one of the older versions. Otherwise you just need to delete it altogether. "
-                "The following routes have been marked with that decorator but were never restored: "
-                f"{self.routes_that_never_existed}",
-            )
+            with _profiling.measure("add_data_migrations", version=generator.version):
+                versioned_router = self._get_router_with_data_migrations(versioned_router)
+            # Routes that no version can share anymore will never need their copies with data migrations again
+            self._routes_with_data_migrations = {
+                id(route): self._routes_with_data_migrations[id(route)]
+                for route in router.routes
+                if id(route) in self._routes_with_data_migrations
+            }
+            versioned_router.routes = [
+                route
+                for route in versioned_router.routes
+                if not (isinstance(route, fastapi.routing.APIRoute) and _DELETED_ROUTE_TAG in route.tags)
+            ]
+            yield version.value, versioned_router
 
+        if self._startup_plan is not None:
+            self._startup_plan.save()
+
+    def _get_router_with_data_migrations(self, router: _R) -> _R:
+        router_with_data_migrations = _copy_router(router)
         for route_index, head_route in enumerate(self.parent_router.routes):
             if not isinstance(head_route, APIRoute):
                 continue
-            _add_request_and_response_params(head_route)
-            copy_of_dependant = deepcopy(head_route.dependant)
-
-            for older_router in list(routers.values()):
-                older_route = older_router.routes[route_index]
-
-                # We know they are APIRoutes because of the check at the very beginning of the top loop.
-                # I.e. Because head_route is an APIRoute, both routes are  APIRoutes too
-                older_route = cast(APIRoute, older_route)
-                # Wait.. Why do we need this code again?
-                if older_route.body_field is not None and _route_has_a_simple_body_schema(older_route):
-                    if hasattr(older_route.body_field.type_, "__cadwyn_original_model__"):
-                        template_older_body_model = older_route.body_field.type_.__cadwyn_original_model__
-                    else:
-                        template_older_body_model = older_route.body_field.type_
+            # We know it is an APIRoute because head_route is an APIRoute and route positions never change
+            route = cast(APIRoute, router.routes[route_index])
+            # The same route can be shared between several versions so we must only wrap it once
+            if id(route) in self._routes_with_data_migrations:
+                router_with_data_migrations.routes[route_index] = self._routes_with_data_migrations[id(route)][1]
+                continue
+            if route_index not in self._head_dependants:
+                _add_request_and_response_params(head_route)
+                self._head_dependants[route_index] = deepcopy(head_route.dependant)
+
+            route_with_data_migrations = _clone_route(route)
+            # Data migrations replace the call of the dependant
+            route_with_data_migrations.dependant = copy(route.dependant)
+            # Wait.. Why do we need this code again?
+            if route.body_field is not None and _route_has_a_simple_body_schema(route):
+                if hasattr(route.body_field.type_, "__cadwyn_original_model__"):
+                    template_body_model = route.body_field.type_.__cadwyn_original_model__
                 else:
-                    template_older_body_model = None
-                _add_data_migrations_to_route(
-                    older_route,
-                    # NOTE: The fact that we use latest here assumes that the route can never change its response schema
-                    head_route,
-                    template_older_body_model,
-                    older_route.body_field.alias if older_route.body_field is not None else None,
-                    copy_of_dependant,
-                    self.versions,
-                )
-        for _, router in routers.items():
-            router.routes = [
-                route
-                for route in router.routes
-                if not (isinstance(route, fastapi.routing.APIRoute) and _DELETED_ROUTE_TAG in route.tags)
-            ]
-        return routers
+                    template_body_model = route.body_field.type_
+            else:
+                template_body_model = None
+            _add_data_migrations_to_route(
+                route_with_data_migrations,
+                # NOTE: The fact that we use latest here assumes that the route can never change its response schema
+                head_route,
+                template_body_model,
+                route.body_field.alias if route.body_field is not None else None,
+                self._head_dependants[route_index],
+                self.versions,
+                self.metrics,
+            )
+            self._routes_with_data_migrations[id(route)] = (route, route_with_data_migrations)
+            router_with_data_migrations.routes[route_index] = route_with_data_migrations
+        return router_with_data_migrations
+
+    def _migrate_router_to_version(self, router: APIRouter, version: Version, generator: SchemaGenerator) -> int:
+        startup_plan = self._startup_plan
+        if startup_plan is not None and startup_plan.is_restored:
+            route_indexes = startup_plan.migrated_routes[version.value.isoformat()]
+        else:
+            route_indexes = self._get_indexes_of_routes_to_migrate(router, generator)
+            if startup_plan is not None:
+                startup_plan.migrated_routes[version.value.isoformat()] = route_indexes
+        for route_index in route_indexes:
+            route = self._get_mutable_route(router, route_index)
+            with _profiling.measure("migrate_route", version=generator.version, name=_get_route_name(route)):
+                generator.annotation_transformer.migrate_route_to_version(route)
+        return len(route_indexes)
+
+    def _get_indexes_of_routes_to_migrate(self, router: APIRouter, generator: SchemaGenerator) -> list[int]:
+        route_indexes = []
+        for route_index, route in enumerate(router.routes):
+            if not isinstance(route, APIRoute):
+                continue
+            # Routes that we own were either cloned from the head router or changed by endpoint instructions
+            if id(route) not in self._owned_routes:
+                if id(route) not in self._route_models:
+                    self._route_models[id(route)] = _get_models_referenced_by_route(route)
+                if generator.models_are_the_same_as_in_newer_version(self._route_models[id(route)]):
+                    continue
+            route_indexes.append(route_index)
+        return route_indexes
+
+    def _get_mutable_route(self, router: APIRouter, route_index: int) -> APIRoute:
+        route = cast(APIRoute, router.routes[route_index])
+        if id(route) in self._owned_routes:
+            return route
+        route_copy = _clone_route(route)
+        router.routes[route_index] = route_copy
+        self._changed_route_positions.add(route_index)
+        self._owned_routes.add(id(route_copy))
+        return route_copy
 
     def _validate_all_data_converters_are_applied(self, router: APIRouter, version: Version):
-        path_to_route_methods_mapping, head_response_models, head_request_bodies = self._extract_all_routes_identifiers(
-            router
-        )
+        for route_index in self._changed_route_positions:
+            self._route_identifiers.update(route_index, cast(APIRoute, router.routes[route_index]))
+        self._changed_route_positions.clear()
+        route_identifiers = self._route_identifiers
 
         for version_change in version.changes:
             for by_path_converters in [
@@ -160,7 +325,7 @@ class _EndpointTransformer(Generic[_R]):
             ]:
                 for by_path_converter in by_path_converters:
                     missing_methods = by_path_converter.methods.difference(
-                        path_to_route_methods_mapping[by_path_converter.path]
+                        route_identifiers.methods_by_path.get(by_path_converter.path, ())
                     )
 
                     if missing_methods:
@@ -176,7 +341,9 @@ class _EndpointTransformer(Generic[_R]):
 
             for by_schema_converters in version_change.alter_request_by_schema_instructions.values():
                 for by_schema_converter in by_schema_converters:
-                    missing_models = set(by_schema_converter.schemas) - head_request_bodies
+                    missing_models = set(by_schema_converter.schemas).difference(
+                        route_identifiers.head_request_bodies, self._websocket_message_models
+                    )
                     if missing_models:
                         raise RouteRequestBySchemaConverterDoesNotApplyToAnythingError(
                             f"Request by body schema converter "
@@ -187,7 +354,9 @@ class _EndpointTransformer(Generic[_R]):
                         )
             for by_schema_converters in version_change.alter_response_by_schema_instructions.values():
                 for by_schema_converter in by_schema_converters:
-                    missing_models = set(by_schema_converter.schemas) - head_response_models
+                    missing_models = set(by_schema_converter.schemas).difference(
+                        route_identifiers.head_response_models, self._websocket_message_models
+                    )
                     if missing_models:
                         raise RouteResponseBySchemaConverterDoesNotApplyToAnythingError(
                             f"Response by response model converter "
@@ -197,29 +366,6 @@ class _EndpointTransformer(Generic[_R]):
                             f"This means that you are trying to apply this converter to non-existing endpoint(s). "
                         )
 
-    def _extract_all_routes_identifiers(
-        self, router: APIRouter
-    ) -> tuple[defaultdict[str, set[str]], set[Any], set[Any]]:
-        response_models: set[Any] = set()
-        request_bodies: set[Any] = set()
-        path_to_route_methods_mapping: dict[str, set[str]] = defaultdict(set)
-
-        for route in router.routes:
-            if isinstance(route, APIRoute):
-                if route.response_model is not None and lenient_issubclass(route.response_model, BaseModel):
-                    response_models.add(route.response_model)
-                    # Not sure if it can ever be None when it's a simple schema. Eh, I would rather be safe than sorry
-                if _route_has_a_simple_body_schema(route) and route.body_field is not None:
-                    annotation = route.body_field.field_info.annotation
-                    if annotation is not None and lenient_issubclass(annotation, BaseModel):
-                        request_bodies.add(annotation)
-                path_to_route_methods_mapping[route.path] |= route.methods
-
-        head_response_models = {model.__cadwyn_original_model__ for model in response_models}
-        head_request_bodies = {getattr(body, "__cadwyn_original_model__", body) for body in request_bodies}
-
-        return path_to_route_methods_mapping, head_response_models, head_request_bodies
-
     # TODO (https://github.com/zmievsa/cadwyn/issues/28): Simplify
     def _apply_endpoint_changes_to_router(  # noqa: C901
         self,
@@ -229,7 +375,7 @@ class _EndpointTransformer(Generic[_R]):
         routes = router.routes
         for version_change in version.changes:
             for instruction in version_change.alter_endpoint_instructions:
-                original_routes = _get_routes(
+                original_routes = self._route_index.find(
                     routes,
                     instruction.endpoint_path,
                     instruction.endpoint_methods,
@@ -240,7 +386,7 @@ class _EndpointTransformer(Generic[_R]):
                 methods_we_should_have_applied_changes_to = instruction.endpoint_methods.copy()
 
                 if isinstance(instruction, EndpointDidntExistInstruction):
-                    deleted_routes = _get_routes(
+                    deleted_routes = self._route_index.find(
                         routes,
                         instruction.endpoint_path,
                         instruction.endpoint_methods,
@@ -249,18 +395,18 @@ class _EndpointTransformer(Generic[_R]):
                     )
                     if deleted_routes:
                         method_union = set()
-                        for deleted_route in deleted_routes:
+                        for deleted_route in deleted_routes.values():
                             method_union |= deleted_route.methods
                         raise RouterGenerationError(
                             f'Endpoint "{list(method_union)} {instruction.endpoint_path}" you tried to delete in '
                             f'"{version_change.__name__}" was already deleted in a newer version. If you really have '
                             f'two routes with the same paths and methods, please, use "endpoint(..., func_name=...)" '
                             f"to distinguish between them. Function names of endpoints that were already deleted: "
-                            f"{[r.endpoint.__name__ for r in deleted_routes]}",
+                            f"{[r.endpoint.__name__ for r in deleted_routes.values()]}",
                         )
-                    for original_route in original_routes:
+                    for route_index, original_route in original_routes.items():
                         methods_to_which_we_applied_changes |= original_route.methods
-                        original_route.tags.append(_DELETED_ROUTE_TAG)
+                        self._get_mutable_route(router, route_index).tags.append(_DELETED_ROUTE_TAG)
                     err = (
                         'Endpoint "{endpoint_methods} {endpoint_path}" you tried to delete in'
                         ' "{version_change_name}" doesn\'t exist in a newer version'
@@ -268,16 +414,16 @@ class _EndpointTransformer(Generic[_R]):
                 elif isinstance(instruction, EndpointExistedInstruction):
                     if original_routes:
                         method_union = set()
-                        for original_route in original_routes:
+                        for original_route in original_routes.values():
                             method_union |= original_route.methods
                         raise RouterGenerationError(
                             f'Endpoint "{list(method_union)} {instruction.endpoint_path}" you tried to restore in'
                             f' "{version_change.__name__}" already existed in a newer version. If you really have two '
                             f'routes with the same paths and methods, please, use "endpoint(..., func_name=...)" to '
                             f"distinguish between them. Function names of endpoints that already existed: "
-                            f"{[r.endpoint.__name__ for r in original_routes]}",
+                            f"{[r.endpoint.__name__ for r in original_routes.values()]}",
                         )
-                    deleted_routes = _get_routes(
+                    deleted_routes = self._route_index.find(
                         routes,
                         instruction.endpoint_path,
                         instruction.endpoint_methods,
@@ -285,7 +431,7 @@ class _EndpointTransformer(Generic[_R]):
                         is_deleted=True,
                     )
                     try:
-                        _validate_no_repetitions_in_routes(deleted_routes)
+                        _validate_no_repetitions_in_routes(list(deleted_routes.values()))
                     except RouteAlreadyExistsError as e:
                         raise RouterGenerationError(
                             f'Endpoint "{list(instruction.endpoint_methods)} {instruction.endpoint_path}" you tried to '
@@ -294,9 +440,9 @@ class _EndpointTransformer(Generic[_R]):
                             f'"endpoint(..., func_name=...)" to distinguish between them. Function names of '
                             f"endpoints that can be restored: {[r.endpoint.__name__ for r in e.routes]}",
                         ) from e
-                    for deleted_route in deleted_routes:
+                    for route_index, deleted_route in deleted_routes.items():
                         methods_to_which_we_applied_changes |= deleted_route.methods
-                        deleted_route.tags.remove(_DELETED_ROUTE_TAG)
+                        self._get_mutable_route(router, route_index).tags.remove(_DELETED_ROUTE_TAG)
 
                         routes_that_never_existed = _get_routes(
                             self.routes_that_never_existed,
@@ -325,9 +471,13 @@ class _EndpointTransformer(Generic[_R]):
                         ' "{version_change_name}" wasn\'t among the deleted routes'
                     )
                 elif isinstance(instruction, EndpointHadInstruction):
-                    for original_route in original_routes:
+                    for route_index, original_route in original_routes.items():
                         methods_to_which_we_applied_changes |= original_route.methods
-                        _apply_endpoint_had_instruction(version_change.__name__, instruction, original_route)
+                        changed_route = self._get_mutable_route(router, route_index)
+                        # The route can already be owned by us, so it is the same object as the original route
+                        old_path, old_methods = changed_route.path, set(changed_route.methods)
+                        _apply_endpoint_had_instruction(version_change.__name__, instruction, changed_route)
+                        self._route_index.reindex(route_index, old_path, old_methods, changed_route)
                     err = (
                         'Endpoint "{endpoint_methods} {endpoint_path}" you tried to change in'
                         ' "{version_change_name}" doesn\'t exist'
@@ -345,6 +495,154 @@ class _EndpointTransformer(Generic[_R]):
                     )
 
 
+class _RouteIndex:
+    """An index of route positions by their normalized path and method.
+
+    Lookups through it only check the routes with the requested path and methods instead of all routes.
+    It relies on the fact that routes never change their positions within versioned routers.
+    Deletion status and endpoint names are checked at lookup time so only path and methods changes need reindexing.
+    """
+
+    __slots__ = ("_positions",)
+
+    def __init__(self, routes: Sequence[BaseRoute]) -> None:
+        super().__init__()
+        self._positions: defaultdict[tuple[str, str], set[int]] = defaultdict(set)
+        for route_index, route in enumerate(routes):
+            if isinstance(route, APIRoute):
+                self._add(route_index, route.path, route.methods)
+
+    def _add(self, route_index: int, path: str, methods: Collection[str]):
+        path = path.rstrip("/")
+        for method in methods:
+            self._positions[path, method].add(route_index)
+
+    def _remove(self, route_index: int, path: str, methods: Collection[str]):
+        path = path.rstrip("/")
+        for method in methods:
+            self._positions[path, method].discard(route_index)
+
+    def reindex(self, route_index: int, old_path: str, old_methods: Collection[str], new_route: APIRoute):
+        if old_path != new_route.path or set(old_methods) != new_route.methods:
+            self._remove(route_index, old_path, old_methods)
+            self._add(route_index, new_route.path, new_route.methods)
+
+    def find(
+        self,
+        routes: Sequence[BaseRoute],
+        endpoint_path: str,
+        endpoint_methods: set[str],
+        endpoint_func_name: str | None = None,
+        *,
+        is_deleted: bool = False,
+    ) -> dict[int, APIRoute]:
+        """Same as `_get_routes` but returns a mapping from route positions to routes"""
+        endpoint_path = endpoint_path.rstrip("/")
+        candidate_positions: set[int] = set()
+        for method in endpoint_methods:
+            candidate_positions |= self._positions.get((endpoint_path, method), set())
+
+        found_routes = {}
+        for route_index in sorted(candidate_positions):
+            route = cast(APIRoute, routes[route_index])
+            if (
+                route.methods.issubset(endpoint_methods)
+                and (endpoint_func_name is None or route.endpoint.__name__ == endpoint_func_name)
+                and (_DELETED_ROUTE_TAG in route.tags) == is_deleted
+            ):
+                found_routes[route_index] = route
+        return found_routes
+
+
+@dataclass(slots=True, frozen=True)
+class _RouteIdentifier:
+    path: str
+    methods: frozenset[str]
+    head_response_model: Any
+    head_request_body: Any
+
+
+class _RouteIdentifiers:
+    """Paths, methods, and head request and response models of all routes that data converters can apply to.
+
+    Only the routes that were changed in a version get rescanned so we count the routes behind each identifier
+    to be able to remove the identifiers of the previous state of a route.
+    """
+
+    __slots__ = ("_identifiers", "methods_by_path", "head_response_models", "head_request_bodies")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._identifiers: dict[int, _RouteIdentifier] = {}
+        self.methods_by_path: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self.head_response_models: Counter[Any] = Counter()
+        self.head_request_bodies: Counter[Any] = Counter()
+
+    def update(self, route_index: int, route: APIRoute):
+        old_identifier = self._identifiers.get(route_index)
+        new_identifier = _get_route_identifier(route)
+        if old_identifier == new_identifier:
+            return
+        if old_identifier is not None:
+            self._count(old_identifier, -1)
+        self._count(new_identifier, 1)
+        self._identifiers[route_index] = new_identifier
+
+    def _count(self, identifier: _RouteIdentifier, diff: int):
+        for method in identifier.methods:
+            _add_to_counter(self.methods_by_path[identifier.path], method, diff)
+        if identifier.head_response_model is not None:
+            _add_to_counter(self.head_response_models, identifier.head_response_model, diff)
+        if identifier.head_request_body is not None:
+            _add_to_counter(self.head_request_bodies, identifier.head_request_body, diff)
+
+
+def _add_to_counter(counter: Counter[Any], key: Any, diff: int):
+    counter[key] += diff
+    if counter[key] <= 0:
+        del counter[key]
+
+
+def _get_route_identifier(route: APIRoute) -> _RouteIdentifier:
+    head_response_model = None
+    head_request_body = None
+    if route.response_model is not None and lenient_issubclass(route.response_model, BaseModel):
+        head_response_model = route.response_model.__cadwyn_original_model__
+    # Not sure if it can ever be None when it's a simple schema. Eh, I would rather be safe than sorry
+    if _route_has_a_simple_body_schema(route) and route.body_field is not None:
+        annotation = route.body_field.field_info.annotation
+        if annotation is not None and lenient_issubclass(annotation, BaseModel):
+            head_request_body = getattr(annotation, "__cadwyn_original_model__", annotation)
+    return _RouteIdentifier(route.path, frozenset(route.methods), head_response_model, head_request_body)
+
+
+def _copy_router(router: _R) -> _R:
+    router_copy = copy(router)
+    router_copy.routes = list(router.routes)
+    return router_copy
+
+
+def _clone_route(route: APIRoute) -> APIRoute:
+    # Migrations and endpoint instructions replace route attributes instead of mutating them,
+    # except for tags and callbacks so these are the only ones we need to copy.
+    route_copy = copy(route)
+    route_copy.tags = list(route.tags)
+    if route.callbacks:
+        route_copy.callbacks = [
+            _clone_route(callback) if isinstance(callback, APIRoute) else callback for callback in route.callbacks
+        ]
+    return route_copy
+
+
+def _get_models_referenced_by_route(route: APIRoute) -> set[type]:
+    models: set[type] = set()
+    _collect_referenced_models([route.response_model, route.dependencies, route.endpoint], models)
+    for callback in route.callbacks or []:
+        if isinstance(callback, APIRoute):
+            models |= _get_models_referenced_by_route(callback)
+    return models
+
+
 def _validate_no_repetitions_in_routes(routes: list[fastapi.routing.APIRoute]):
     route_map = {}
 
@@ -362,6 +660,7 @@ def _add_data_migrations_to_route(
     template_body_field_name: str | None,
     dependant_for_request_migrations: "Dependant",
     versions: VersionBundle,
+    metrics: "CadwynMetrics | None",
 ):
     if not (route.dependant.request_param_name and route.dependant.response_param_name):  # pragma: no cover
         raise CadwynError(
@@ -378,6 +677,8 @@ def _add_data_migrations_to_route(
         request_param_name=route.dependant.request_param_name,
         background_tasks_param_name=route.dependant.background_tasks_param_name,
         response_param_name=route.dependant.response_param_name,
+        skip_request_migration=_route_can_skip_request_migration(route, head_route, versions),
+        metrics=metrics,
     )(route.endpoint)
     route.dependant.call = route.endpoint
 
@@ -446,6 +747,58 @@ def _get_route_from_func(
     return None
 
 
+def _route_can_skip_request_migration(route: APIRoute, head_route: APIRoute, versions: VersionBundle) -> bool:
+    """Whether the values that FastAPI solved for the route can be passed to the head endpoint as is.
+
+    It is only true for routes without a body and without request converters that call the same dependencies
+    as the head route and validate their params with the same types. Otherwise the endpoint would not get
+    the results of the head versions of its dependencies.
+    """
+    if route.body_field is not None or head_route.body_field is not None:
+        return False
+    if any(
+        route.path in version_change.alter_request_by_path_instructions
+        for version in versions
+        for version_change in version.changes
+    ):
+        return False
+    if not _are_identical(
+        [dependency.dependency for dependency in route.dependencies],
+        [dependency.dependency for dependency in head_route.dependencies],
+    ) or not _are_identical(_get_dependency_calls(route.dependant), _get_dependency_calls(head_route.dependant)):
+        return False
+    return _get_param_signatures(route.dependant) == _get_param_signatures(head_route.dependant)
+
+
+def _are_identical(values: Sequence[Any], other_values: Sequence[Any]) -> bool:
+    return len(values) == len(other_values) and all(
+        value is other_value for value, other_value in zip(values, other_values, strict=True)
+    )
+
+
+def _get_dependency_calls(dependant: "Dependant") -> list[Any]:
+    calls = []
+    for sub_dependant in dependant.dependencies:
+        calls.append(sub_dependant.call)
+        calls.extend(_get_dependency_calls(sub_dependant))
+    return calls
+
+
+def _get_param_signatures(dependant: "Dependant") -> list[tuple[str, str, Any, str]]:
+    flat_dependant = get_flat_dependant(dependant, skip_repeats=True)
+    return [
+        # Versioned models and enums have the same names as head ones so their reprs are not enough to compare them
+        (location, field.alias, field.field_info.annotation, repr(field.field_info))
+        for location, fields in (
+            ("path", flat_dependant.path_params),
+            ("query", flat_dependant.query_params),
+            ("header", flat_dependant.header_params),
+            ("cookie", flat_dependant.cookie_params),
+        )
+        for field in fields
+    ]
+
+
 def _route_has_a_simple_body_schema(route: APIRoute) -> bool:
     # Remember this: if len(body_params) == 1, then route.body_schema == route.dependant.body_params[0]
     return len(route.dependant.body_params) == 1
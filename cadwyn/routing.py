@@ -1,21 +1,30 @@
 import bisect
-from collections.abc import Sequence
+import threading
+from collections.abc import Callable, Sequence
 from contextvars import ContextVar
 from datetime import date
 from functools import cached_property
 from logging import getLogger
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+import anyio
+import anyio.to_thread
 from fastapi.routing import APIRouter
 from starlette.datastructures import URL
 from starlette.responses import RedirectResponse
 from starlette.routing import BaseRoute, Match
 from starlette.types import Receive, Scope, Send
 
+from cadwyn import tracing
 from cadwyn._utils import same_definition_as_in
+from cadwyn.caching import get_response_cache
+from cadwyn.metrics import CadwynMetrics
 
 from .route_generation import generate_versioned_routers
 
+if TYPE_CHECKING:
+    from cadwyn.structure.versions import VersionBundle
+
 # TODO: Remove this in a major version. This is only here for backwards compatibility
 __all__ = ["generate_versioned_routers"]
 
@@ -42,13 +51,65 @@ class _RootHeaderAPIRouter(APIRouter):
         *args: Any,
         api_version_header_name: str,
         api_version_var: ContextVar[date] | ContextVar[date | None],
+        metrics: CadwynMetrics | None = None,
+        versions: "VersionBundle | None" = None,
         **kwargs: Any,
     ):
         super().__init__(*args, **kwargs)
+        self.metrics = metrics
+        # Side effects are resolved for every request only if there are any
+        self._versions_with_side_effects = versions if versions is not None and versions._side_effects else None
         self.versioned_routers: dict[date, APIRouter] = {}
         self.api_version_header_name = api_version_header_name.lower()
         self.api_version_var = api_version_var
         self.unversioned_routes: list[BaseRoute] = []
+        # Functions that add routes to versioned routers when they are first needed
+        self._lazy_versioned_router_builders: dict[date, list[Callable[[], Any]]] = {}
+        self._lazy_versioned_router_lock = threading.Lock()
+        # Requests that wait for a router to be built in a worker thread wait on these locks instead of taking up
+        # all worker threads while they wait for the thread lock
+        self._lazy_versioned_router_async_locks: dict[date, anyio.Lock] = {}
+
+    def add_lazy_versioned_router(self, version: date, build_router: Callable[[], Any]) -> None:
+        """Defer adding routes to the router of the version until it is first used.
+
+        build_router must add the routes to `versioned_routers[version]`. It will be called only once.
+        """
+        self._lazy_versioned_router_builders.setdefault(version, []).append(build_router)
+
+    def build_versioned_router(self, version: date) -> APIRouter:
+        """Return the router of the version, building it first if it was added lazily"""
+        # Checking without the lock first because after all routers were built, the lock would be pure overhead
+        if version in self._lazy_versioned_router_builders:
+            with self._lazy_versioned_router_lock:
+                # Another thread could have already built the router while we were waiting for the lock
+                builders = self._lazy_versioned_router_builders.get(version)
+                if builders is not None:
+                    while builders:
+                        builders[0]()
+                        # Builders are only dropped after they succeed so a failed build is retried
+                        # without adding the routes of the builders that succeeded before it again
+                        builders.pop(0)
+                    del self._lazy_versioned_router_builders[version]
+                    _logger.info("Built lazy versioned router", extra={"version": version.isoformat()})
+        return self.versioned_routers[version]
+
+    async def build_versioned_router_without_blocking(self, version: date) -> APIRouter:
+        """Return the router of the version, building it in a worker thread first if it was added lazily.
+
+        Building a router takes a while so it must not block the event loop.
+        """
+        if version not in self._lazy_versioned_router_builders:
+            return self.versioned_routers[version]
+        lock = self._lazy_versioned_router_async_locks.setdefault(version, anyio.Lock())
+        async with lock:
+            router = await anyio.to_thread.run_sync(self.build_versioned_router, version)
+        self._lazy_versioned_router_async_locks.pop(version, None)
+        return router
+
+    def build_all_versioned_routers(self) -> None:
+        for version in list(self._lazy_versioned_router_builders):
+            self.build_versioned_router(version)
 
     @cached_property
     def sorted_versions(self):
@@ -64,7 +125,21 @@ class _RootHeaderAPIRouter(APIRouter):
         # we need to get the previous item and that will be a match
         return self.sorted_versions[index - 1]
 
+    def get_matching_version(self, request_version: date) -> date | None:
+        """Return the version whose routes will serve the request version without building the router"""
+        if request_version in self.versioned_routers:
+            return request_version
+        if not self.sorted_versions or self.min_routes_version > request_version:
+            return None
+        return self.find_closest_date_but_not_new(request_version)
+
     def pick_version(self, request_header_value: date) -> list[BaseRoute]:
+        version_chosen = self._pick_closest_version(request_header_value)
+        if version_chosen is None:
+            return []
+        return self.build_versioned_router(version_chosen).routes
+
+    def _pick_closest_version(self, request_header_value: date) -> date | None:
         request_version = request_header_value.isoformat()
 
         if self.min_routes_version > request_header_value:
@@ -76,7 +151,7 @@ class _RootHeaderAPIRouter(APIRouter):
                     "request_version": request_version,
                 },
             )
-            return []
+            return None
         version_chosen = self.find_closest_date_but_not_new(request_header_value)
         _logger.info(
             "Partial match. The endpoint with a lower version was selected for the API call",
@@ -85,7 +160,7 @@ class _RootHeaderAPIRouter(APIRouter):
                 "request_version": request_version,
             },
         )
-        return self.versioned_routers[version_chosen].routes
+        return version_chosen
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
@@ -102,13 +177,22 @@ class _RootHeaderAPIRouter(APIRouter):
 
         # if header_value is None, then it's an unversioned request and we need to use the unversioned routes
         # if there will be a value, we search for the most suitable version
-        if not header_value:
-            routes = self.unversioned_routes
-        elif header_value in self.versioned_routers:
-            routes = self.versioned_routers[header_value].routes
-        else:
-            routes = self.pick_version(request_header_value=header_value)
-        await self.process_request(scope=scope, receive=receive, send=send, routes=routes)
+        with tracing.span("cadwyn.resolve_version", version=header_value):
+            if not header_value:
+                version = None
+                routes = self.unversioned_routes
+            else:
+                is_exact_match = header_value in self.versioned_routers
+                version = header_value if is_exact_match else self._pick_closest_version(header_value)
+                if version is None:
+                    routes = []
+                else:
+                    routes = (await self.build_versioned_router_without_blocking(version)).routes
+                    if self.metrics is not None:
+                        self.metrics.record_version_match(version, is_exact=is_exact_match)
+        if self._versions_with_side_effects is not None:
+            self._versions_with_side_effects._resolve_applied_side_effects(header_value, version)
+        await self.process_request(scope=scope, receive=receive, send=send, routes=routes, version=version)
 
     @same_definition_as_in(APIRouter.add_api_route)
     def add_api_route(self, *args: Any, **kwargs: Any):
@@ -130,7 +214,14 @@ class _RootHeaderAPIRouter(APIRouter):
         super().add_websocket_route(*args, **kwargs)
         self.unversioned_routes.append(self.routes[-1])
 
-    async def process_request(self, scope: Scope, receive: Receive, send: Send, routes: Sequence[BaseRoute]) -> None:
+    async def process_request(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        routes: Sequence[BaseRoute],
+        version: date | None = None,
+    ) -> None:
         """
         its a copy-paste from starlette.routing.Router
         but in this version self.routes were replaced with routes from the function arguments
@@ -143,8 +234,14 @@ class _RootHeaderAPIRouter(APIRouter):
             # and hand over to the matching route if found.
             match, child_scope = route.matches(scope)
             if match == Match.FULL:
+                if self.metrics is not None and version is not None:
+                    self.metrics.record_request(version, route)
                 scope.update(child_scope)
-                await route.handle(scope, receive, send)
+                response_cache = get_response_cache(route)
+                if response_cache is None:
+                    await route.handle(scope, receive, send)
+                else:
+                    await response_cache.handle(version, route.handle, scope, receive, send)
                 return None
             if match == Match.PARTIAL and partial is None:
                 partial = route
@@ -1,13 +1,17 @@
 import copy
 import dataclasses
 import functools
+import importlib
 import inspect
+import sys
+import threading
 import types
 import typing
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
 from datetime import date
 from enum import Enum
 from functools import cache
+from logging import getLogger
 from typing import (
     TYPE_CHECKING,
     Annotated,
@@ -42,8 +46,11 @@ from pydantic._internal._decorators import (
     ValidatorDecoratorInfo,
 )
 from pydantic.fields import ComputedFieldInfo, FieldInfo
+from starlette.routing import compile_path
 from typing_extensions import Doc, Self, _AnnotatedAlias, assert_never
 
+from cadwyn import _profiling
+from cadwyn._startup_cache import get_versions_fingerprint
 from cadwyn._utils import Sentinel, UnionType, fully_unwrap_decorator
 from cadwyn.exceptions import InvalidGenerationInstructionError
 from cadwyn.structure.common import VersionDate
@@ -65,6 +72,7 @@ from cadwyn.structure.versions import _CADWYN_REQUEST_PARAM_NAME, _CADWYN_RESPON
 if TYPE_CHECKING:
     from cadwyn.structure.versions import HeadVersion, Version, VersionBundle
 
+_logger = getLogger(__name__)
 _Call = TypeVar("_Call", bound=Callable[..., Any])
 
 _FieldName: TypeAlias = str
@@ -138,8 +146,42 @@ def _extract_passed_field_attributes(field_info: FieldInfo):
 
 @dataclasses.dataclass(slots=True)
 class _ModelBundle:
+    """A copy-on-write collection of model wrappers.
+
+    Snapshots share all wrappers with the bundle they were taken from. Before a wrapper gets mutated,
+    it must be requested through `get_mutable_schema` or `get_mutable_enum` which clones it unless the bundle
+    already owns it, i.e. unless it was already cloned after the last snapshot.
+    """
+
     enums: dict[type[Enum], "_EnumWrapper"]
     schemas: dict[type[BaseModel], "_PydanticModelWrapper"]
+    changed_models: Annotated[
+        frozenset[type],
+        Doc("Models whose wrappers were changed between the previous snapshot and this one"),
+    ] = frozenset()
+    _owned_models: set[type] = dataclasses.field(default_factory=set, repr=False)
+
+    def snapshot(self) -> "_ModelBundle":
+        snapshot = _ModelBundle(
+            enums=self.enums.copy(),
+            schemas=self.schemas.copy(),
+            changed_models=frozenset(self._owned_models),
+        )
+        # All wrappers are now shared with the snapshot so we no longer own any of them
+        self._owned_models.clear()
+        return snapshot
+
+    def get_mutable_schema(self, schema: type[BaseModel]) -> "_PydanticModelWrapper":
+        if schema not in self._owned_models:
+            self.schemas[schema] = copy.deepcopy(self.schemas[schema])
+            self._owned_models.add(schema)
+        return self.schemas[schema]
+
+    def get_mutable_enum(self, enum: type[Enum]) -> "_EnumWrapper":
+        if enum not in self._owned_models:
+            self.enums[enum] = copy.deepcopy(self.enums[enum])
+            self._owned_models.add(enum)
+        return self.enums[enum]
 
 
 @dataclasses.dataclass(slots=True, kw_only=True)
@@ -176,7 +218,7 @@ def migrate_response_body(
 
     version = versions._get_closest_lesser_version(version)
 
-    versioned_response_model: type[pydantic.BaseModel] = generate_versioned_models(versions)[str(version)][
+    versioned_response_model: type[pydantic.BaseModel] = generate_versioned_models(versions, lazy=True)[str(version)][
         latest_response_model
     ]
     return versioned_response_model.model_validate(migrated_response.body)
@@ -277,7 +319,9 @@ class _PydanticModelWrapper(Generic[_T_PYDANTIC_MODEL]):
     validators: dict[str, _PerFieldValidatorWrapper | _ValidatorWrapper] = dataclasses.field(repr=False)
     other_attributes: dict[str, Any] = dataclasses.field(repr=False)
     annotations: dict[str, Any] = dataclasses.field(repr=False)
-    _parents: list[Self] | None = dataclasses.field(init=False, default=None, repr=False)
+    # Parents that are not versioned never change so we can safely cache their wrappers.
+    # Versioned parents, on the other hand, depend on the bundle so we always look them up.
+    _unversioned_parents: dict[type, Self] = dataclasses.field(init=False, default_factory=dict, repr=False)
 
     def __post_init__(self):
         # This isn't actually supposed to run, it's just a precaution
@@ -285,13 +329,7 @@ class _PydanticModelWrapper(Generic[_T_PYDANTIC_MODEL]):
             self.cls = self.cls.__cadwyn_original_model__  # pyright: ignore[reportAttributeAccessIssue]
 
         for k, annotation in self.annotations.items():
-            if get_origin(annotation) == Annotated:
-                sub_annotations = get_args(annotation)
-                # Annotated cannot be copied and is cached based on "==" and "hash", while annotated_types.Interval are
-                # frozen and so are consistently hashed
-                self.annotations[k] = _AnnotatedAlias(
-                    copy.deepcopy(sub_annotations[0]), tuple(copy.deepcopy(sub_ann) for sub_ann in sub_annotations[1:])
-                )
+            self.annotations[k] = _copy_annotation(annotation)
 
     def __deepcopy__(self, memo: dict[int, Any]):
         result = _PydanticModelWrapper(
@@ -310,15 +348,14 @@ class _PydanticModelWrapper(Generic[_T_PYDANTIC_MODEL]):
         return hash(id(self))
 
     def _get_parents(self, schemas: "dict[type, Self]"):
-        if self._parents is not None:
-            return self._parents
         parents = []
         for base in self.cls.mro()[1:]:
             if base in schemas:
                 parents.append(schemas[base])
             elif issubclass(base, BaseModel):
-                parents.append(_wrap_pydantic_model(base))
-        self._parents = parents
+                if base not in self._unversioned_parents:
+                    self._unversioned_parents[base] = _wrap_pydantic_model(base)
+                parents.append(self._unversioned_parents[base])
         return parents
 
     def _get_defined_fields_through_mro(self, schemas: "dict[type, Self]") -> dict[str, PydanticFieldWrapper]:
@@ -337,6 +374,14 @@ class _PydanticModelWrapper(Generic[_T_PYDANTIC_MODEL]):
 
         return annotations | self.annotations
 
+    def get_referenced_models(self) -> set[type]:
+        """Return all models that the generated copy of this model will depend on"""
+        referenced_models = {base for base in self.cls.__bases__ if issubclass(base, BaseModel)}
+        _collect_referenced_models(self.annotations, referenced_models)
+        for field in self.fields.values():
+            _collect_referenced_models(field.passed_field_attributes, referenced_models)
+        return referenced_models
+
     def generate_model_copy(self, generator: "SchemaGenerator") -> type[_T_PYDANTIC_MODEL]:
         per_field_validators = {
             name: validator.decorator(*validator.fields, **validator.kwargs)(validator.func)
@@ -367,6 +412,17 @@ class _PydanticModelWrapper(Generic[_T_PYDANTIC_MODEL]):
         return model_copy
 
 
+def _copy_annotation(annotation: Any) -> Any:
+    if get_origin(annotation) == Annotated:
+        sub_annotations = get_args(annotation)
+        # Annotated cannot be copied and is cached based on "==" and "hash", while annotated_types.Interval are
+        # frozen and so are consistently hashed
+        return _AnnotatedAlias(
+            copy.deepcopy(sub_annotations[0]), tuple(copy.deepcopy(sub_ann) for sub_ann in sub_annotations[1:])
+        )
+    return annotation
+
+
 class _CallableWrapper:
     """__eq__ and __hash__ are needed to make sure that dependency overrides work correctly.
     They are based on putting dependencies (functions) as keys for the dictionary so if we want to be able to
@@ -421,14 +477,24 @@ class _AnnotationTransformer:
         replace "UserResponse" with the the same class but from the "2022-11-16" version.
 
         """
+        # Whenever nothing has changed, we return the original annotation to preserve its identity.
+        # It allows us to skip rebuilding the dependants of routes whose annotations did not change.
         if isinstance(annotation, dict):
-            return {
+            new_annotation = {
                 self.change_version_of_annotation(key): self.change_version_of_annotation(value)
                 for key, value in annotation.items()
             }
+            if _all_are_identical(annotation.keys(), new_annotation.keys()) and _all_are_identical(
+                annotation.values(), new_annotation.values()
+            ):
+                return annotation
+            return new_annotation
 
         elif isinstance(annotation, list | tuple):
-            return type(annotation)(self.change_version_of_annotation(v) for v in annotation)
+            new_values = [self.change_version_of_annotation(v) for v in annotation]
+            if _all_are_identical(annotation, new_values):
+                return annotation
+            return type(annotation)(new_values)
         else:
             return self.change_versions_of_a_non_container_annotation(annotation)
 
@@ -447,27 +513,46 @@ class _AnnotationTransformer:
                 mode="serialization",
             )
             route.secure_cloned_response_field = fastapi.utils.create_cloned_field(route.response_field)
+        dependencies, endpoint = route.dependencies, route.endpoint
         route.dependencies = self.change_version_of_annotation(route.dependencies)
         route.endpoint = self.change_version_of_annotation(route.endpoint)
         for callback in route.callbacks or []:
             if not isinstance(callback, fastapi.routing.APIRoute):
                 continue
             self.migrate_route_to_version(callback, ignore_response_model=ignore_response_model)
-        self._remake_endpoint_dependencies(route)
+        if (
+            route.dependencies is dependencies
+            and route.endpoint is endpoint
+            and route.dependant.path == compile_path(route.path)[1]
+        ):
+            # Nothing that the dependant is built from has changed so we skip FastAPI's signature inspection.
+            # The dependant gets copied because data migrations modify the dependant of each route separately.
+            route.dependant = copy.copy(route.dependant)
+            _add_request_and_response_params(route)
+        else:
+            with _profiling.measure("remake_dependant", version=self.generator.version, name=_get_route_name(route)):
+                self._remake_endpoint_dependencies(route)
+            _profiling.count("dependants_created")
 
     def _change_version_of_a_non_container_annotation(self, annotation: Any) -> Any:
         if isinstance(annotation, _BaseGenericAlias | types.GenericAlias):
-            return get_origin(annotation)[tuple(self.change_version_of_annotation(arg) for arg in get_args(annotation))]
+            args = get_args(annotation)
+            new_args = tuple(self.change_version_of_annotation(arg) for arg in args)
+            if _all_are_identical(args, new_args):
+                return annotation
+            return get_origin(annotation)[new_args]
         elif isinstance(annotation, fastapi.params.Depends):
-            return fastapi.params.Depends(
-                self.change_version_of_annotation(annotation.dependency),
-                use_cache=annotation.use_cache,
-            )
+            dependency = self.change_version_of_annotation(annotation.dependency)
+            if dependency is annotation.dependency:
+                return annotation
+            return fastapi.params.Depends(dependency, use_cache=annotation.use_cache)
         elif isinstance(annotation, UnionType):
+            args = get_args(annotation)
+            new_args = tuple(self.change_version_of_annotation(a) for a in args)
+            if _all_are_identical(args, new_args):
+                return annotation
             getitem = typing.Union.__getitem__  # pyright: ignore[reportAttributeAccessIssue]
-            return getitem(
-                tuple(self.change_version_of_annotation(a) for a in get_args(annotation)),
-            )
+            return getitem(new_args)
         elif annotation is Any or isinstance(annotation, typing.NewType):
             return annotation
         elif isinstance(annotation, type):
@@ -481,12 +566,15 @@ class _AnnotationTransformer:
             def modifier(annotation: Any):
                 return self.change_version_of_annotation(annotation)
 
-            return self._modify_callable_annotations(
+            new_annotation = self._modify_callable_annotations(
                 annotation,
                 modifier,
                 modifier,
                 annotation_modifying_wrapper_factory=self._copy_function_through_class_based_wrapper,
             )
+            if _signatures_are_identical(inspect.signature(annotation), new_annotation.__signature__):
+                return annotation
+            return new_annotation
         else:
             return annotation
 
@@ -585,6 +673,72 @@ class _AnnotationTransformer:
         return call
 
 
+def _get_route_name(route: APIRoute) -> str:
+    return f"{','.join(sorted(route.methods))} {route.path}"
+
+
+def _all_are_identical(values: Collection[Any], new_values: Collection[Any]) -> bool:
+    return len(values) == len(new_values) and all(
+        value is new_value for value, new_value in zip(values, new_values, strict=True)
+    )
+
+
+def _signatures_are_identical(signature: inspect.Signature, new_signature: inspect.Signature) -> bool:
+    return (
+        signature.return_annotation is new_signature.return_annotation
+        and signature.parameters.keys() == new_signature.parameters.keys()
+        and all(
+            param.annotation is new_param.annotation and param.default is new_param.default
+            for param, new_param in zip(signature.parameters.values(), new_signature.parameters.values(), strict=True)
+        )
+    )
+
+
+def _collect_referenced_models(annotation: Any, models: set[type], seen_callables: set[int] | None = None) -> None:
+    """Add all pydantic models and enums that `_AnnotationTransformer.change_version_of_annotation` would replace
+    in the annotation to the models set.
+    """
+    if seen_callables is None:
+        seen_callables = set()
+    if isinstance(annotation, dict):
+        for key, value in annotation.items():
+            _collect_referenced_models(key, models, seen_callables)
+            _collect_referenced_models(value, models, seen_callables)
+    elif isinstance(annotation, list | tuple):
+        for value in annotation:
+            _collect_referenced_models(value, models, seen_callables)
+    elif isinstance(annotation, _BaseGenericAlias | types.GenericAlias | UnionType):
+        _collect_referenced_models(get_args(annotation), models, seen_callables)
+    elif isinstance(annotation, fastapi.params.Depends):
+        _collect_referenced_models(annotation.dependency, models, seen_callables)
+    elif annotation is Any or isinstance(annotation, typing.NewType):
+        return
+    elif isinstance(annotation, type):
+        if issubclass(annotation, BaseModel | Enum) and annotation not in (BaseModel, RootModel):
+            models.add(_unwrap_model(annotation))
+    elif callable(annotation):
+        _collect_models_referenced_by_callable(annotation, models, seen_callables)
+
+
+def _collect_models_referenced_by_callable(annotation: Callable, models: set[type], seen_callables: set[int]) -> None:
+    if type(annotation).__module__.startswith(("fastapi.", "pydantic.", "pydantic_core.", "starlette.")):
+        return
+    if isinstance(annotation, fastapi.params.Security | fastapi.security.base.SecurityBase):
+        return
+    call = _AnnotationTransformer._unwrap_callable(annotation)
+    if id(call) in seen_callables:
+        return
+    seen_callables.add(id(call))
+    try:
+        parameters = inspect.signature(call).parameters.values()
+    except (TypeError, ValueError):  # pragma: no cover # Some builtins do not have a signature
+        parameters = ()
+    _collect_referenced_models(getattr(call, "__annotations__", {}), models, seen_callables)
+    _collect_referenced_models(
+        [p.default for p in parameters if p.default is not inspect.Signature.empty], models, seen_callables
+    )
+
+
 def _add_request_and_response_params(route: APIRoute):
     if not route.dependant.request_param_name:
         route.dependant.request_param_name = _CADWYN_REQUEST_PARAM_NAME
@@ -594,16 +748,43 @@ def _add_request_and_response_params(route: APIRoute):
 
 @final
 class SchemaGenerator:
-    __slots__ = "annotation_transformer", "model_bundle", "concrete_models"
+    """Generates concrete versioned pydantic models and enums for a single version.
+
+    If `lazy` is True, concrete classes are only built on first access through `__getitem__`
+    so the memory and time spent on generation only depends on the models that are actually used.
+    If `pregenerated_package` is set, the models that changed in this version are imported from the package
+    that `cadwyn codegen` rendered this version into instead of being built.
+    """
+
+    __slots__ = (
+        "annotation_transformer",
+        "model_bundle",
+        "concrete_models",
+        "newer_generator",
+        "version",
+        "pregenerated_package",
+        "_all_models_are_generated",
+    )
 
-    def __init__(self, model_bundle: _ModelBundle) -> None:
+    def __init__(
+        self,
+        model_bundle: _ModelBundle,
+        *,
+        lazy: bool = False,
+        newer_generator: "SchemaGenerator | None" = None,
+        version: str | None = None,
+        pregenerated_package: str | None = None,
+    ) -> None:
         self.annotation_transformer = _AnnotationTransformer(self)
         self.model_bundle = model_bundle
-        self.concrete_models = {}
-        self.concrete_models = {
-            k: wrapper.generate_model_copy(self)
-            for k, wrapper in (self.model_bundle.schemas | self.model_bundle.enums).items()
-        }
+        self.version = version
+        self.pregenerated_package = pregenerated_package
+        self.concrete_models: dict[type, type] = {}
+        # If a model did not change between the newer version and this one, we reuse its class from the newer version
+        self.newer_generator = newer_generator
+        self._all_models_are_generated = False
+        if not lazy:
+            self.generate_all_models()
 
     def __getitem__(self, model: type[_T_ANY_MODEL], /) -> type[_T_ANY_MODEL]:
         if not isinstance(model, type) or not issubclass(model, BaseModel | Enum) or model in (BaseModel, RootModel):
@@ -612,14 +793,69 @@ class SchemaGenerator:
 
         if model in self.concrete_models:
             return self.concrete_models[model]
-        else:
-            wrapper = self._get_wrapper_for_model(model)
 
         wrapper = self._get_wrapper_for_model(model)
-        model_copy = wrapper.generate_model_copy(self)
+        if self.newer_generator is not None and self._model_is_the_same_as_in_newer_version(model, wrapper):
+            model_copy = self.newer_generator[model]
+        elif (model_copy := self._import_pregenerated_model(model, wrapper)) is None:
+            with _profiling.measure("create_model", version=self.version, name=model.__qualname__):
+                model_copy = wrapper.generate_model_copy(self)
+            _profiling.count("models_created")
         self.concrete_models[model] = model_copy
         return model_copy
 
+    def models_are_the_same_as_in_newer_version(self, models: "Iterable[type]") -> bool:
+        """Check whether all of the models are represented by the same classes in this and the newer version"""
+        newer_generator = self.newer_generator
+        if newer_generator is None:
+            return not models
+        return all(self[model] is newer_generator[model] for model in models)
+
+    def _model_is_the_same_as_in_newer_version(
+        self, model: type, wrapper: "_PydanticModelWrapper | _EnumWrapper"
+    ) -> bool:
+        if model in self.model_bundle.changed_models:
+            return False
+        if isinstance(wrapper, _EnumWrapper):
+            return True
+        return self.models_are_the_same_as_in_newer_version(wrapper.get_referenced_models() - {model})
+
+    def _import_pregenerated_model(self, model: type, wrapper: "_PydanticModelWrapper | _EnumWrapper") -> Any:
+        if self.pregenerated_package is None:
+            return None
+        module_name = f"{self.pregenerated_package}.{model.__module__}"
+        try:
+            module = importlib.import_module(module_name)
+        except ModuleNotFoundError as e:
+            # The error can also come from the imports of the pregenerated module itself
+            if e.name is None or not f"{module_name}.".startswith(f"{e.name}."):
+                raise
+            return None
+        # The model could have been renamed in this version
+        path = [*model.__qualname__.split(".")[:-1], wrapper.name]
+        pregenerated_model = functools.reduce(lambda parent, name: getattr(parent, name, None), path, module)
+        if not isinstance(pregenerated_model, type):
+            return None
+        pregenerated_model.__cadwyn_original_model__ = model  # pyright: ignore[reportAttributeAccessIssue]
+        _link_pregenerated_models_to_head_models(module, self.pregenerated_package)
+        return pregenerated_model
+
+    def generate_all_models(self) -> None:
+        """Build concrete classes for every versioned model and enum that haven't been built yet"""
+        if self._all_models_are_generated:
+            return
+        for model in [*self.model_bundle.schemas, *self.model_bundle.enums]:
+            self[model]
+        self._all_models_are_generated = True
+
+    @property
+    def generated_models_count(self) -> int:
+        return len(self.concrete_models)
+
+    @property
+    def versioned_models_count(self) -> int:
+        return len(self.model_bundle.schemas) + len(self.model_bundle.enums)
+
     @overload
     def _get_wrapper_for_model(self, model: type[BaseModel]) -> "_PydanticModelWrapper[BaseModel]": ...
     @overload
@@ -646,21 +882,136 @@ class SchemaGenerator:
         return wrapper
 
 
+def generate_versioned_models(versions: "VersionBundle", *, lazy: bool = False) -> "dict[str, SchemaGenerator]":
+    """Generate a schema generator for each version of the bundle.
+
+    If `lazy` is False, all versioned models are built right away which makes
+    every generation error surface immediately. Otherwise, each model is only built when it is first requested.
+    Both modes share the same generators so a model requested in lazy mode is the same class as in eager mode.
+    """
+    generators = _generate_versioned_models(versions)
+    if not lazy:
+        for generator in generators.values():
+            generator.generate_all_models()
+    return generators
+
+
+def get_version_package_name(version: str) -> str:
+    """Name of the subpackage that `cadwyn codegen` renders the modules of the version into"""
+    return f"v{version.replace('-', '_')}"
+
+
+def _get_pregenerated_models_package(versions: "VersionBundle") -> str | None:
+    package_name = versions.pregenerated_models_package
+    if package_name is None:
+        return None
+    package = importlib.import_module(package_name)
+    if getattr(package, "__cadwyn_fingerprint__", None) != get_versions_fingerprint(versions):
+        _logger.warning(
+            "Pregenerated models are outdated so they will be generated at runtime instead. "
+            "Run `cadwyn codegen` again to update them",
+            extra={"package": package_name},
+        )
+        return None
+    return package_name
+
+
+def _link_pregenerated_models_to_head_models(module: types.ModuleType, version_package: str) -> None:
+    # Pregenerated models reference each other through imports so we link all models that the module can see
+    for value in list(vars(module).values()):
+        if (
+            not isinstance(value, type)
+            or "__cadwyn_original_model__" in vars(value)
+            or not value.__module__.startswith(f"{version_package}.")
+        ):
+            continue
+        head_module = sys.modules.get(value.__module__.removeprefix(f"{version_package}."))
+        head_model = getattr(head_module, value.__name__, None)
+        if isinstance(head_model, type) and issubclass(head_model, BaseModel | Enum):
+            value.__cadwyn_original_model__ = head_model  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def _generate_versioned_models(versions: "VersionBundle") -> "dict[str, SchemaGenerator]":
+    return _get_versioned_models_migration(versions).migrate_all_versions()
+
+
 @cache
-def generate_versioned_models(versions: "VersionBundle") -> "dict[str, SchemaGenerator]":
-    models = _create_model_bundle(versions)
+def _get_versioned_models_migration(versions: "VersionBundle") -> "_VersionedModelsMigration":
+    return _VersionedModelsMigration(versions)
 
-    version_to_context_map = {}
-    context = _RuntimeSchemaGenContext(current_version=versions.head_version, models=models, version_bundle=versions)
-    _migrate_classes(context)
 
-    for version in versions.versions:
-        context = _RuntimeSchemaGenContext(current_version=version, models=models, version_bundle=versions)
-        version_to_context_map[str(version.value)] = SchemaGenerator(copy.deepcopy(models))
-        # note that the last migration will not contain any version changes so we don't need to save the results
-        _migrate_classes(context)
+class _VersionedModelsMigration:
+    """Migrates the model wrappers of each version only once the schema generator of that version is requested.
 
-    return version_to_context_map
+    Each version is migrated from the newer one so requesting a version migrates all newer versions as well.
+    """
+
+    __slots__ = ("versions", "generators", "_migrations", "_error", "_lock")
+
+    def __init__(self, versions: "VersionBundle") -> None:
+        self.versions = versions
+        self.generators: dict[str, SchemaGenerator] = {}
+        self._migrations = self._migrate_versions()
+        self._error: Exception | None = None
+        # Lazily generated routers request their versions from worker threads
+        self._lock = threading.Lock()
+
+    def __getitem__(self, version: str, /) -> SchemaGenerator:
+        with self._lock:
+            while version not in self.generators:
+                if not self._migrate_next_version():
+                    raise KeyError(version)
+            return self.generators[version]
+
+    def migrate_all_versions(self) -> "dict[str, SchemaGenerator]":
+        with self._lock:
+            while self._migrate_next_version():
+                pass
+            return self.generators
+
+    def _migrate_next_version(self) -> bool:
+        if self._error is not None:
+            # The migration can't be resumed after it failed so we keep failing with the original error
+            raise self._error
+        try:
+            generator = next(self._migrations, None)
+        except Exception as e:
+            self._error = e
+            raise
+        if generator is None:
+            return False
+        self.generators[cast(str, generator.version)] = generator
+        return True
+
+    def _migrate_versions(self) -> Iterator["SchemaGenerator"]:
+        models = _create_model_bundle(self.versions)
+        pregenerated_package = _get_pregenerated_models_package(self.versions)
+
+        context = _RuntimeSchemaGenContext(
+            current_version=self.versions.head_version, models=models, version_bundle=self.versions
+        )
+        with _profiling.measure("migrate_classes", version="head"):
+            _migrate_classes(context)
+
+        newer_generator = None
+        for version in self.versions.versions:
+            context = _RuntimeSchemaGenContext(current_version=version, models=models, version_bundle=self.versions)
+            newer_generator = SchemaGenerator(
+                models.snapshot(),
+                lazy=True,
+                newer_generator=newer_generator,
+                version=str(version.value),
+                pregenerated_package=(
+                    None
+                    if pregenerated_package is None
+                    else f"{pregenerated_package}.{get_version_package_name(str(version.value))}"
+                ),
+            )
+            # The generator keeps its own snapshot so migrating the models to the older version does not affect it.
+            # Migrating right away makes the errors in the changes of the version surface along with its generator.
+            with _profiling.measure("migrate_classes", version=str(version.value)):
+                _migrate_classes(context)
+            yield newer_generator
 
 
 def _create_model_bundle(versions: "VersionBundle"):
@@ -673,24 +1024,25 @@ def _create_model_bundle(versions: "VersionBundle"):
 def _migrate_classes(context: _RuntimeSchemaGenContext) -> None:
     for version_change in context.current_version.changes:
         _apply_alter_schema_instructions(
-            context.models.schemas,
+            context.models,
             version_change.alter_schema_instructions,
             version_change.__name__,
         )
         _apply_alter_enum_instructions(
-            context.models.enums,
+            context.models,
             version_change.alter_enum_instructions,
             version_change.__name__,
         )
 
 
 def _apply_alter_schema_instructions(
-    modified_schemas: dict[type, _PydanticModelWrapper],
+    models: _ModelBundle,
     alter_schema_instructions: Sequence[AlterSchemaSubInstruction | SchemaHadInstruction],
     version_change_name: str,
 ) -> None:
+    modified_schemas = models.schemas
     for alter_schema_instruction in alter_schema_instructions:
-        schema_info = modified_schemas[alter_schema_instruction.schema]
+        schema_info = models.get_mutable_schema(alter_schema_instruction.schema)
         if isinstance(alter_schema_instruction, FieldExistedAsInstruction):
             _add_field_to_model(schema_info, modified_schemas, alter_schema_instruction, version_change_name)
         elif isinstance(alter_schema_instruction, FieldHadInstruction | FieldDidntHaveInstruction):
@@ -731,12 +1083,12 @@ def _apply_alter_schema_instructions(
 
 
 def _apply_alter_enum_instructions(
-    enums: "dict[type, _EnumWrapper]",
+    models: _ModelBundle,
     alter_enum_instructions: Sequence[AlterEnumSubInstruction],
     version_change_name: str,
 ):
     for alter_enum_instruction in alter_enum_instructions:
-        enum = enums[alter_enum_instruction.enum]
+        enum = models.get_mutable_enum(alter_enum_instruction.enum)
         if isinstance(alter_enum_instruction, EnumDidntHaveMembersInstruction):
             for member in alter_enum_instruction.members:
                 if member not in enum.members:
@@ -805,9 +1157,15 @@ def _change_field_in_model(
             f'"{model.name}" in "{version_change_name}" but it doesn\'t have such a field.',
         )
 
-    field = defined_fields[alter_schema_instruction.name]
-    model.fields[alter_schema_instruction.name] = field
-    model.annotations[alter_schema_instruction.name] = defined_annotations[alter_schema_instruction.name]
+    if alter_schema_instruction.name in model.fields:
+        field = model.fields[alter_schema_instruction.name]
+    else:
+        # The field is inherited so we copy it to make sure that the parent is not affected by the change
+        field = copy.deepcopy(defined_fields[alter_schema_instruction.name])
+        model.fields[alter_schema_instruction.name] = field
+        model.annotations[alter_schema_instruction.name] = _copy_annotation(
+            defined_annotations[alter_schema_instruction.name]
+        )
 
     if isinstance(alter_schema_instruction, FieldHadInstruction):
         # TODO: This naming sucks
@@ -13,7 +13,6 @@ from cadwyn.structure.endpoints import _validate_that_strings_are_valid_http_met
 _P = ParamSpec("_P")
 
 
-# TODO (https://github.com/zmievsa/cadwyn/issues/49): Add form handling
 class RequestInfo:
     __slots__ = ("body", "headers", "_cookies", "_query_params", "_request")
 
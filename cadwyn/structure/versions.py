@@ -6,9 +6,10 @@ from collections import defaultdict
 from collections.abc import Callable, Iterator, Sequence
 from contextlib import AsyncExitStack
 from contextvars import ContextVar
+from copy import deepcopy
 from datetime import date
 from enum import Enum
-from typing import Any, ClassVar, ParamSpec, TypeAlias, TypeVar
+from typing import TYPE_CHECKING, Any, ClassVar, ParamSpec, TypeAlias, TypeVar
 
 from fastapi import BackgroundTasks, HTTPException, params
 from fastapi import Request as FastapiRequest
@@ -23,8 +24,10 @@ from fastapi.routing import APIRoute, _prepare_response_content
 from pydantic import BaseModel
 from pydantic_core import PydanticUndefined
 from starlette._utils import is_async_callable
+from starlette.datastructures import FormData, MultiDict
 from typing_extensions import assert_never, deprecated
 
+from cadwyn import tracing
 from cadwyn._utils import classproperty
 from cadwyn.exceptions import (
     CadwynError,
@@ -47,6 +50,9 @@ from .endpoints import AlterEndpointSubInstruction
 from .enums import AlterEnumSubInstruction
 from .schemas import AlterSchemaSubInstruction, SchemaHadInstruction
 
+if TYPE_CHECKING:
+    from cadwyn.metrics import CadwynMetrics
+
 _CADWYN_REQUEST_PARAM_NAME = "cadwyn_request_param"
 _CADWYN_RESPONSE_PARAM_NAME = "cadwyn_response_param"
 _P = ParamSpec("_P")
@@ -185,17 +191,12 @@ class VersionChangeWithSideEffects(VersionChange, _abstract=True):
 
     @classproperty
     def is_applied(cls: type["VersionChangeWithSideEffects"]) -> bool:  # pyright: ignore[reportGeneralTypeIssues]
-        if (
-            cls._bound_version_bundle is None
-            or cls not in cls._bound_version_bundle._version_changes_to_version_mapping
-        ):
+        # Version changes are bound to a version bundle only when they are added to one of its versions
+        if cls._bound_version_bundle is None:
             raise CadwynError(
                 f"You tried to check whether '{cls.__name__}' is active but it was never bound to any version.",
             )
-        api_version = cls._bound_version_bundle.api_version_var.get()
-        if api_version is None:
-            return True
-        return cls._bound_version_bundle._version_changes_to_version_mapping[cls] <= api_version
+        return cls in cls._bound_version_bundle.get_applied_side_effects()
 
 
 class Version:
@@ -251,6 +252,7 @@ class VersionBundle:
         /,
         *other_versions: Version,
         api_version_var: APIVersionVarType | None = None,
+        pregenerated_models_package: str | None = None,
     ) -> None:
         super().__init__()
 
@@ -262,6 +264,21 @@ class VersionBundle:
             self.versions = (latest_version_or_head_version, *other_versions)
 
         self.version_dates = tuple(version.value for version in self.versions)
+        # Python path of the package that `cadwyn codegen` rendered the versioned models of this bundle into
+        self.pregenerated_models_package = pregenerated_models_package
+        # The api version of the current request and the side effects that are applied to it
+        self._applied_side_effects_var: ContextVar[
+            tuple[VersionDate | None, frozenset[type[VersionChangeWithSideEffects]]]
+        ] = ContextVar("cadwyn_applied_side_effects")
+        # (head model, version) -> schema converters that migrate its data between the head and the version
+        self._request_migrations_by_schema: dict[
+            tuple[type, VersionDate], tuple[_AlterRequestBySchemaInstruction, ...]
+        ] = {}
+        self._response_migrations_by_schema: dict[
+            tuple[type, VersionDate], tuple[_AlterResponseBySchemaInstruction, ...]
+        ] = {}
+        # (head response model, path, method) -> the newest version that has a converter which migrates its errors
+        self._newest_versions_with_http_error_migrations: dict[tuple[Any, str, str], VersionDate | None] = {}
         if api_version_var is None:
             api_version_var = ContextVar("cadwyn_api_version")
         self.api_version_var = api_version_var
@@ -340,6 +357,54 @@ class VersionBundle:
     ) -> dict[type[VersionChange] | type[VersionChangeWithSideEffects], VersionDate]:
         return {version_change: version.value for version in self.versions for version_change in version.changes}
 
+    @functools.cached_property
+    def _side_effects(self) -> frozenset[type[VersionChangeWithSideEffects]]:
+        return frozenset(
+            version_change
+            for version_change in self._version_changes_to_version_mapping
+            if issubclass(version_change, VersionChangeWithSideEffects)
+        )
+
+    @functools.cached_property
+    def _applied_side_effects_by_version(self) -> dict[VersionDate, frozenset[type[VersionChangeWithSideEffects]]]:
+        return {
+            version: frozenset(
+                version_change
+                for version_change in self._side_effects
+                if self._version_changes_to_version_mapping[version_change] <= version
+            )
+            for version in self.version_dates
+        }
+
+    def get_applied_side_effects(self) -> frozenset[type[VersionChangeWithSideEffects]]:
+        """Return all version changes with side effects that are applied to the api version of the current request.
+
+        The result is resolved once per request so it is cheap to call in hot loops.
+        """
+        api_version = self.api_version_var.get()
+        resolved = self._applied_side_effects_var.get(None)
+        if resolved is not None and resolved[0] is api_version:
+            return resolved[1]
+        return self._resolve_applied_side_effects(api_version)
+
+    def _resolve_applied_side_effects(
+        self,
+        api_version: VersionDate | None,
+        closest_version: VersionDate | None = None,
+    ) -> frozenset[type[VersionChangeWithSideEffects]]:
+        if api_version is None:
+            applied = self._side_effects
+        else:
+            if closest_version is None:
+                closest_version = next((version for version in self.version_dates if version <= api_version), None)
+            if closest_version is None:
+                # The api version is older than the first version so none of the side effects are applied
+                applied = frozenset()
+            else:
+                applied = self._applied_side_effects_by_version[closest_version]
+        self._applied_side_effects_var.set((api_version, applied))
+        return applied
+
     async def _migrate_request(
         self,
         body_type: type[BaseModel] | None,
@@ -354,37 +419,118 @@ class VersionBundle:
         exit_stack: AsyncExitStack,
         embed_body_fields: bool,
         background_tasks: BackgroundTasks | None,
+        metrics: "CadwynMetrics | None",
     ) -> dict[str, Any]:
-        method = request.method
+        with tracing.span("cadwyn.migrate_request", version=current_version, route=path):
+            self._apply_request_migrations(body_type, path, request.method, request_info, current_version, metrics)
+        request.scope["headers"] = tuple((key.encode(), value.encode()) for key, value in request_info.headers.items())
+        del request._headers
+        if isinstance(request_info.body, MultiDict):
+            # FastAPI only extracts form fields from FormData
+            request_info.body = FormData(request_info.body.multi_items())
+        # Remember this: if len(body_params) == 1, then route.body_schema == route.dependant.body_params[0]
+        with tracing.span("cadwyn.solve_dependencies", version=current_version, route=path):
+            result = await solve_dependencies(
+                request=request,
+                response=response,
+                dependant=head_dependant,
+                body=request_info.body,
+                dependency_overrides_provider=head_route.dependency_overrides_provider,
+                async_exit_stack=exit_stack,
+                embed_body_fields=embed_body_fields,
+                background_tasks=background_tasks,
+            )
+        if result.errors:
+            raise CadwynHeadRequestValidationError(
+                _normalize_errors(result.errors), body=request_info.body, version=current_version
+            )
+        return result.values
+
+    def _apply_request_migrations(
+        self,
+        body_type: type[BaseModel] | None,
+        path: str,
+        method: str,
+        request_info: RequestInfo,
+        current_version: VersionDate,
+        metrics: "CadwynMetrics | None",
+    ) -> None:
         for v in reversed(self.versions):
             if v.value <= current_version:
                 continue
             for version_change in v.changes:
                 if body_type is not None and body_type in version_change.alter_request_by_schema_instructions:
                     for instruction in version_change.alter_request_by_schema_instructions[body_type]:
-                        instruction(request_info)
+                        if metrics is None:
+                            instruction(request_info)
+                        else:
+                            metrics.call_data_converter(instruction, request_info)
                 if path in version_change.alter_request_by_path_instructions:
                     for instruction in version_change.alter_request_by_path_instructions[path]:
                         if method in instruction.methods:  # pragma: no branch # safe branch to skip
-                            instruction(request_info)
-        request.scope["headers"] = tuple((key.encode(), value.encode()) for key, value in request_info.headers.items())
-        del request._headers
-        # Remember this: if len(body_params) == 1, then route.body_schema == route.dependant.body_params[0]
-        result = await solve_dependencies(
-            request=request,
-            response=response,
-            dependant=head_dependant,
-            body=request_info.body,
-            dependency_overrides_provider=head_route.dependency_overrides_provider,
-            async_exit_stack=exit_stack,
-            embed_body_fields=embed_body_fields,
-            background_tasks=background_tasks,
-        )
-        if result.errors:
-            raise CadwynHeadRequestValidationError(
-                _normalize_errors(result.errors), body=request_info.body, version=current_version
+                            if metrics is None:
+                                instruction(request_info)
+                            else:
+                                metrics.call_data_converter(instruction, request_info)
+
+    def _get_request_migrations_by_schema(
+        self, head_model: type, version: VersionDate
+    ) -> tuple[_AlterRequestBySchemaInstruction, ...]:
+        """Return the request converters that migrate the data of head_model from the version to the head version"""
+        key = (head_model, version)
+        migrations = self._request_migrations_by_schema.get(key)
+        if migrations is None:
+            migrations = self._request_migrations_by_schema[key] = tuple(
+                instruction
+                for v in reversed(self.versions)
+                if v.value > version
+                for version_change in v.changes
+                for instruction in version_change.alter_request_by_schema_instructions.get(head_model, ())
             )
-        return result.values
+        return migrations
+
+    def _get_response_migrations_by_schema(
+        self, head_model: type, version: VersionDate
+    ) -> tuple[_AlterResponseBySchemaInstruction, ...]:
+        """Return the response converters that migrate the data of head_model from the head version to the version"""
+        key = (head_model, version)
+        migrations = self._response_migrations_by_schema.get(key)
+        if migrations is None:
+            migrations = self._response_migrations_by_schema[key] = tuple(
+                instruction
+                for v in self.versions
+                if v.value > version
+                for version_change in v.changes
+                for instruction in version_change.alter_response_by_schema_instructions.get(head_model, ())
+            )
+        return migrations
+
+    def _has_http_error_migrations(
+        self, version: VersionDate, head_response_model: Any, path: str, method: str
+    ) -> bool:
+        """Whether any response converter with `migrate_http_errors=True` applies to the route in the version"""
+        key = (head_response_model, path, method)
+        newest_version = self._newest_versions_with_http_error_migrations.get(key, Sentinel)
+        if newest_version is Sentinel:
+            newest_version = self._newest_versions_with_http_error_migrations[key] = next(
+                (
+                    v.value
+                    for v in self.versions
+                    for version_change in v.changes
+                    if any(
+                        instruction.migrate_http_errors
+                        for instruction in version_change.alter_response_by_schema_instructions.get(
+                            head_response_model, ()
+                        )
+                    )
+                    or any(
+                        instruction.migrate_http_errors and method in instruction.methods
+                        for instruction in version_change.alter_response_by_path_instructions.get(path, ())
+                    )
+                ),
+                None,
+            )
+        return newest_version is not None and newest_version > version
 
     def _migrate_response(
         self,
@@ -393,6 +539,7 @@ class VersionBundle:
         head_response_model: type[BaseModel],
         path: str,
         method: str,
+        metrics: "CadwynMetrics | None" = None,
     ) -> ResponseInfo:
         """Convert the data to a specific version by applying all version changes in reverse order.
 
@@ -423,7 +570,10 @@ class VersionBundle:
 
                 for migration in migrations_to_apply:
                     if response_info.status_code < 300 or migration.migrate_http_errors:
-                        migration(response_info)
+                        if metrics is None:
+                            migration(response_info)
+                        else:
+                            metrics.call_data_converter(migration, response_info)
         return response_info
 
     # TODO (https://github.com/zmievsa/cadwyn/issues/113): Refactor this function and all functions it calls.
@@ -438,6 +588,8 @@ class VersionBundle:
         request_param_name: str,
         background_tasks_param_name: str | None,
         response_param_name: str,
+        skip_request_migration: bool = False,
+        metrics: "CadwynMetrics | None" = None,
     ) -> Callable[[Endpoint[_P, _R]], Endpoint[_P, _R]]:
         def wrapper(endpoint: Endpoint[_P, _R]) -> Endpoint[_P, _R]:
             @functools.wraps(endpoint)
@@ -451,21 +603,28 @@ class VersionBundle:
                 method = request_param.method
                 response = Sentinel
                 async with AsyncExitStack() as exit_stack:
-                    kwargs = await self._convert_endpoint_kwargs_to_version(
-                        head_body_field,
-                        module_body_field_name,
-                        # Dependant must be from the version of the finally migrated request,
-                        # not the version of endpoint
-                        dependant_for_request_migrations,
-                        request_param_name,
-                        kwargs,
-                        response_param,
-                        route,
-                        head_route,
-                        exit_stack=exit_stack,
-                        embed_body_fields=route._embed_body_fields,
-                        background_tasks=background_tasks,
-                    )
+                    if skip_request_migration:
+                        # There is no body or request converter so the values that FastAPI has already solved
+                        # are the same as the ones that solving the head dependant would produce
+                        if request_param_name == _CADWYN_REQUEST_PARAM_NAME:
+                            kwargs.pop(request_param_name)
+                    else:
+                        kwargs = await self._convert_endpoint_kwargs_to_version(
+                            head_body_field,
+                            module_body_field_name,
+                            # Dependant must be from the version of the finally migrated request,
+                            # not the version of endpoint
+                            dependant_for_request_migrations,
+                            request_param_name,
+                            kwargs,
+                            response_param,
+                            route,
+                            head_route,
+                            exit_stack=exit_stack,
+                            embed_body_fields=route._embed_body_fields,
+                            background_tasks=background_tasks,
+                            metrics=metrics,
+                        )
 
                     response = await self._convert_endpoint_response_to_version(
                         endpoint,
@@ -475,6 +634,7 @@ class VersionBundle:
                         response_param_name,
                         kwargs,
                         response_param,
+                        metrics,
                     )
                 if response is Sentinel:  # pragma: no cover
                     raise CadwynError(
@@ -496,7 +656,7 @@ class VersionBundle:
         return wrapper
 
     # TODO: Simplify it
-    async def _convert_endpoint_response_to_version(  # noqa: C901
+    async def _convert_endpoint_response_to_version(
         self,
         func_to_get_response_from: Endpoint,
         head_route: APIRoute,
@@ -505,77 +665,48 @@ class VersionBundle:
         response_param_name: str,
         kwargs: dict[str, Any],
         fastapi_response_dependency: FastapiResponse,
+        metrics: "CadwynMetrics | None",
     ) -> Any:
         raised_exception = None
         if response_param_name == _CADWYN_RESPONSE_PARAM_NAME:
             kwargs.pop(response_param_name)
+        api_version = self.api_version_var.get()
         try:
-            if is_async_callable(func_to_get_response_from):
-                response_or_response_body: FastapiResponse | object = await func_to_get_response_from(**kwargs)
-            else:
-                response_or_response_body: FastapiResponse | object = await run_in_threadpool(
-                    func_to_get_response_from,
-                    **kwargs,
-                )
+            with tracing.span("cadwyn.endpoint", version=api_version, route=route.path):
+                if is_async_callable(func_to_get_response_from):
+                    response_or_response_body: FastapiResponse | object = await func_to_get_response_from(**kwargs)
+                else:
+                    response_or_response_body: FastapiResponse | object = await run_in_threadpool(
+                        func_to_get_response_from,
+                        **kwargs,
+                    )
         except HTTPException as exc:
+            if api_version is None:
+                return FastapiResponse(
+                    content=json.dumps({"detail": exc.detail}), status_code=exc.status_code, headers=exc.headers
+                )
+            # Most errors are not migrated so we let FastAPI serialize them only once
+            if not self._has_http_error_migrations(api_version, head_route.response_model, route.path, method):
+                raise
             raised_exception = exc
-            response_or_response_body = FastapiResponse(
-                content=json.dumps({"detail": raised_exception.detail}),
-                status_code=raised_exception.status_code,
-                headers=raised_exception.headers,
-            )
-        api_version = self.api_version_var.get()
+            response_or_response_body = FastapiResponse(status_code=exc.status_code, headers=exc.headers)
         if api_version is None:
             return response_or_response_body
 
-        if isinstance(response_or_response_body, FastapiResponse):
-            # TODO (https://github.com/zmievsa/cadwyn/issues/125): Add support for migrating `StreamingResponse`
-            # TODO (https://github.com/zmievsa/cadwyn/issues/126): Add support for migrating `FileResponse`
-            # Starlette breaks Liskov Substitution principle and
-            # doesn't define `body` for `StreamingResponse` and `FileResponse`
-            if isinstance(response_or_response_body, StreamingResponse | FileResponse):
-                body = None
-            elif response_or_response_body.body:
-                if (isinstance(response_or_response_body, JSONResponse) or raised_exception is not None) and isinstance(
-                    response_or_response_body.body, str | bytes
-                ):
-                    body = json.loads(response_or_response_body.body)
-                elif isinstance(response_or_response_body.body, bytes):
-                    body = response_or_response_body.body.decode(response_or_response_body.charset)
-                else:  # pragma: no cover # I don't see a good use case here yet
-                    body = response_or_response_body.body
-            else:
-                body = None
-                # TODO (https://github.com/zmievsa/cadwyn/issues/51): Only do this if there are migrations
-
-            response_info = ResponseInfo(response_or_response_body, body)
-        else:
-            if fastapi_response_dependency.status_code is not None:  # pyright: ignore[reportUnnecessaryComparison]
-                status_code = fastapi_response_dependency.status_code
-            elif route.status_code is not None:
-                status_code = route.status_code
-            elif raised_exception is not None:
-                raise NotImplementedError
-            else:
-                status_code = 200
-            fastapi_response_dependency.status_code = status_code
-            response_info = ResponseInfo(
-                fastapi_response_dependency,
-                _prepare_response_content(
-                    response_or_response_body,
-                    exclude_unset=head_route.response_model_exclude_unset,
-                    exclude_defaults=head_route.response_model_exclude_defaults,
-                    exclude_none=head_route.response_model_exclude_none,
-                ),
+        with tracing.span("cadwyn.read_response_body", version=api_version, route=route.path):
+            response_info = _get_response_info(
+                response_or_response_body, raised_exception, fastapi_response_dependency, route, head_route
             )
 
-        response_info = self._migrate_response(
-            response_info,
-            api_version,
-            head_route.response_model,
-            route.path,
-            method,
-        )
+        with tracing.span("cadwyn.migrate_response", version=api_version, route=route.path):
+            response_info = self._migrate_response(
+                response_info,
+                api_version,
+                head_route.response_model,
+                route.path,
+                method,
+                metrics,
+            )
         if isinstance(response_or_response_body, FastapiResponse):
             # a webserver (uvicorn for instance) calculates the body at the endpoint level.
             # if an endpoint returns no "body", its content-length will be set to 0
@@ -585,27 +716,6 @@ class VersionBundle:
             # `Too much data for declared Content-Length`, based on the protocol
             # which is why we skip the None case.
 
-            # We skip cases without "body" attribute because of StreamingResponse and FileResponse
-            # that do not have it. We don't support it too.
-            if response_info.body is not None and hasattr(response_info._response, "body"):
-                # TODO (https://github.com/zmievsa/cadwyn/issues/51): Only do this if there are migrations
-                if (
-                    isinstance(response_info.body, str)
-                    and response_info._response.headers.get("content-type") != "application/json"
-                ):
-                    response_info._response.body = response_info.body.encode(response_info._response.charset)
-                else:
-                    response_info._response.body = json.dumps(
-                        response_info.body,
-                        ensure_ascii=False,
-                        allow_nan=False,
-                        indent=None,
-                        separators=(",", ":"),
-                    ).encode("utf-8")
-                # It makes sense to re-calculate content length because the previously calculated one
-                # might slightly differ. If it differs -- uvicorn will break.
-                response_info.headers["content-length"] = str(len(response_info._response.body))
-
             if raised_exception is not None and response_info.status_code >= 400:
                 if isinstance(response_info.body, dict) and "detail" in response_info.body:
                     detail = response_info.body["detail"]
@@ -615,8 +725,12 @@ class VersionBundle:
                 raise HTTPException(
                     status_code=response_info.status_code,
                     detail=detail,
-                    headers=dict(response_info.headers),
+                    # FastAPI's exception handler serializes the detail and calculates its content length
+                    headers={k: v for k, v in response_info.headers.items() if k != "content-length"},
                 )
+
+            with tracing.span("cadwyn.serialize_response", version=api_version, route=route.path):
+                _serialize_response_body(response_info)
             return response_info._response
         return response_info.body
 
@@ -634,6 +748,7 @@ class VersionBundle:
         exit_stack: AsyncExitStack,
         embed_body_fields: bool,
         background_tasks: BackgroundTasks | None,
+        metrics: "CadwynMetrics | None",
     ) -> dict[str, Any]:
         request: FastapiRequest = kwargs[request_param_name]
         if request_param_name == _CADWYN_REQUEST_PARAM_NAME:
@@ -643,25 +758,8 @@ class VersionBundle:
         if api_version is None:
             return kwargs
 
-        # This is a kind of body param you get when you define a single pydantic schema in your route's body
-        if (
-            len(route.dependant.body_params) == 1
-            and head_body_field is not None
-            and body_field_alias is not None
-            and body_field_alias in kwargs
-        ):
-            raw_body: BaseModel | None = kwargs.get(body_field_alias)
-            if raw_body is None:  # pragma: no cover # This is likely an impossible case but we would like to be safe
-                body = None
-            # It means we have a dict or a list instead of a full model.
-            # This covers the following use case in the endpoint definition: "payload: dict = Body(None)"
-            elif not isinstance(raw_body, BaseModel):
-                body = raw_body
-            else:
-                body = raw_body.model_dump(by_alias=True, exclude_unset=True)
-        else:
-            # This is for requests without body or with complex body such as form or file
-            body = await _get_body(request, route.body_field, exit_stack)
+        with tracing.span("cadwyn.read_request_body", version=api_version, route=route.path):
+            body = await _get_request_body(request, route, head_body_field, body_field_alias, kwargs, exit_stack)
 
         request_info = RequestInfo(request, body)
         new_kwargs = await self._migrate_request(
@@ -676,6 +774,7 @@ class VersionBundle:
             exit_stack=exit_stack,
             embed_body_fields=embed_body_fields,
             background_tasks=background_tasks,
+            metrics=metrics,
         )
         # Because we re-added it into our kwargs when we did solve_dependencies
         if _CADWYN_REQUEST_PARAM_NAME in new_kwargs:
@@ -684,6 +783,118 @@ class VersionBundle:
         return new_kwargs
 
 
+async def _get_request_body(
+    request: FastapiRequest,
+    route: APIRoute,
+    head_body_field: type[BaseModel] | None,
+    body_field_alias: str | None,
+    kwargs: dict[str, Any],
+    exit_stack: AsyncExitStack,
+) -> Any:
+    # This is a kind of body param you get when you define a single pydantic schema in your route's body
+    if (
+        len(route.dependant.body_params) == 1
+        and head_body_field is not None
+        and body_field_alias is not None
+        and body_field_alias in kwargs
+    ):
+        raw_body: BaseModel | None = kwargs.get(body_field_alias)
+        # This is likely an impossible case but we would like to be safe
+        if raw_body is None:  # pragma: no cover
+            body = None
+        # It means we have a dict or a list instead of a full model.
+        # This covers the following use case in the endpoint definition: "payload: dict = Body(None)"
+        elif not isinstance(raw_body, BaseModel):
+            body = raw_body
+        else:
+            body = raw_body.model_dump(by_alias=True, exclude_unset=True)
+    else:
+        # This is for requests without body or with complex body such as form or file
+        body = await _get_body(request, route.body_field, exit_stack)
+        if isinstance(body, FormData):
+            # Converters get a mutable copy of the form that shares its file parts with the original.
+            # Starlette has already spooled them to disk while parsing so their contents are never copied
+            body = MultiDict(body.multi_items())
+    return body
+
+
+def _get_response_info(
+    response_or_response_body: Any,
+    raised_exception: HTTPException | None,
+    fastapi_response_dependency: FastapiResponse,
+    route: APIRoute,
+    head_route: APIRoute,
+) -> ResponseInfo:
+    if isinstance(response_or_response_body, FastapiResponse):
+        # TODO (https://github.com/zmievsa/cadwyn/issues/125): Add support for migrating `StreamingResponse`
+        # TODO (https://github.com/zmievsa/cadwyn/issues/126): Add support for migrating `FileResponse`
+        # Starlette breaks Liskov Substitution principle and
+        # doesn't define `body` for `StreamingResponse` and `FileResponse`
+        if raised_exception is not None:
+            # Converters get a copy because they can change the detail in place
+            # and the same detail object can be raised by many requests
+            body = {"detail": deepcopy(raised_exception.detail)}
+        elif isinstance(response_or_response_body, StreamingResponse | FileResponse):
+            body = None
+        elif response_or_response_body.body:
+            if isinstance(response_or_response_body, JSONResponse) and isinstance(
+                response_or_response_body.body, str | bytes
+            ):
+                body = json.loads(response_or_response_body.body)
+            elif isinstance(response_or_response_body.body, bytes):
+                body = response_or_response_body.body.decode(response_or_response_body.charset)
+            else:  # pragma: no cover # I don't see a good use case here yet
+                body = response_or_response_body.body
+        else:
+            body = None
+            # TODO (https://github.com/zmievsa/cadwyn/issues/51): Only do this if there are migrations
+
+        response_info = ResponseInfo(response_or_response_body, body)
+    else:
+        if fastapi_response_dependency.status_code is not None:  # pyright: ignore[reportUnnecessaryComparison]
+            status_code = fastapi_response_dependency.status_code
+        elif route.status_code is not None:
+            status_code = route.status_code
+        elif raised_exception is not None:
+            raise NotImplementedError
+        else:
+            status_code = 200
+        fastapi_response_dependency.status_code = status_code
+        response_info = ResponseInfo(
+            fastapi_response_dependency,
+            _prepare_response_content(
+                response_or_response_body,
+                exclude_unset=head_route.response_model_exclude_unset,
+                exclude_defaults=head_route.response_model_exclude_defaults,
+                exclude_none=head_route.response_model_exclude_none,
+            ),
+        )
+    return response_info
+
+
+def _serialize_response_body(response_info: ResponseInfo) -> None:
+    # We skip cases without "body" attribute because of StreamingResponse and FileResponse
+    # that do not have it. We don't support it too.
+    if response_info.body is not None and hasattr(response_info._response, "body"):
+        # TODO (https://github.com/zmievsa/cadwyn/issues/51): Only do this if there are migrations
+        if (
+            isinstance(response_info.body, str)
+            and response_info._response.headers.get("content-type") != "application/json"
+        ):
+            response_info._response.body = response_info.body.encode(response_info._response.charset)
+        else:
+            response_info._response.body = json.dumps(
+                response_info.body,
+                ensure_ascii=False,
+                allow_nan=False,
+                indent=None,
+                separators=(",", ":"),
+            ).encode("utf-8")
+        # It makes sense to re-calculate content length because the previously calculated one
+        # might slightly differ. If it differs -- uvicorn will break.
+        response_info.headers["content-length"] = str(len(response_info._response.body))
+
+
 # We use this instead of `.body()` to automatically guess body type and load the correct body, even if it's a form
 async def _get_body(
     request: FastapiRequest, body_field: ModelField | None, exit_stack: AsyncExitStack
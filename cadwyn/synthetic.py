@@ -0,0 +1,321 @@
+"""Generation of synthetic but realistic versioned APIs.
+
+It allows reproducing the scaling problems of large APIs (such as dozens of versions, hundreds of routes, and deep model
+hierarchies) without sharing their code: in benchmarks, in bug reports, and for capacity planning.
+"""
+
+import dataclasses
+import random
+from datetime import date, timedelta
+from enum import Enum
+from typing import TYPE_CHECKING, Any, get_args, get_origin
+
+from issubclass import issubclass as lenient_issubclass
+from pydantic import BaseModel, create_model
+
+from cadwyn.applications import Cadwyn
+from cadwyn.route_generation import VersionedAPIRouter
+from cadwyn.structure import (
+    RequestInfo,
+    ResponseInfo,
+    Version,
+    VersionBundle,
+    VersionChange,
+    convert_request_to_next_version_for,
+    convert_response_to_previous_version_for,
+    endpoint,
+    enum,
+    schema,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_FIELD_TYPES = [int, str, float, bool, list[str]]
+_EXAMPLE_VALUES: dict[Any, Any] = {int: 0, str: "string", float: 0.0, bool: False}
+
+
+@dataclasses.dataclass(slots=True)
+class SyntheticAPI:
+    versions: VersionBundle
+    router: VersionedAPIRouter
+    models: list[type[BaseModel]]
+    enums: list[type[Enum]]
+
+    def create_app(self, **cadwyn_kwargs: Any) -> Cadwyn:
+        app = Cadwyn(versions=self.versions, **cadwyn_kwargs)
+        app.generate_and_include_versioned_routers(self.router)
+        return app
+
+
+@dataclasses.dataclass(slots=True)
+class _PlannedSchemaChange:
+    model_index: int
+    field_name: str
+    is_added_field: bool
+
+
+def generate_synthetic_api(
+    *,
+    versions_count: int = 10,
+    routes_count: int = 20,
+    models_count: int = 10,
+    fields_per_model: int = 5,
+    model_depth: int = 1,
+    enums_count: int = 2,
+    enum_members_count: int = 3,
+    schema_changes_per_version: int = 2,
+    enum_changes_per_version: int = 1,
+    endpoint_changes_per_version: int = 1,
+    with_converters: bool = True,
+    first_version: date = date(2000, 1, 1),
+    seed: int = 0,
+) -> SyntheticAPI:
+    """Generate a version bundle with head models, enums, version changes, and a router that uses all of them.
+
+    * Every model has `fields_per_model` fields of different types, a field with one of the enums,
+      and a field with a child model so that models form chains of `model_depth` nested models
+    * Each route either creates (`POST /resources{i}`) or returns (`GET /resources{i}/{item_id}`) one of the models
+    * Each version change alters field descriptions and removes fields that were added in its version,
+      removes enum members that were added in its version, and removes routes that were added in its version
+      or alters their descriptions. With `with_converters`, each removed field also gets request and response
+      converters if the routes that exist in all versions use its model
+    * The versions are one day apart, starting from `first_version`
+
+    The same arguments always produce the same API.
+    """
+    _validate_counts(
+        versions_count=versions_count,
+        routes_count=routes_count,
+        models_count=models_count,
+        model_depth=model_depth,
+        fields_per_model=fields_per_model,
+        enums_count=enums_count,
+        enum_members_count=enum_members_count,
+        schema_changes_per_version=schema_changes_per_version,
+        enum_changes_per_version=enum_changes_per_version,
+        endpoint_changes_per_version=endpoint_changes_per_version,
+    )
+    rng = random.Random(seed)  # noqa: S311
+    changes_count = versions_count - 1
+
+    enums, enum_changes = _generate_enums(rng, changes_count, enums_count, enum_members_count, enum_changes_per_version)
+    added_fields, schema_changes = _plan_schema_changes(
+        rng, changes_count, models_count, fields_per_model, schema_changes_per_version
+    )
+    models = _generate_models(models_count, fields_per_model, model_depth, enums, added_fields)
+
+    # Half of the routes can be added in some version and the other half can have their descriptions changed
+    route_indexes = list(range(routes_count))
+    rng.shuffle(route_indexes)
+    routes_to_add = route_indexes[: routes_count // 2]
+    routes_to_alter = route_indexes[routes_count // 2 :]
+    version_changes: list[type[VersionChange]] = []
+    for change_index in range(changes_count):
+        instructions: list[Any] = [
+            enum(enums[enum_index]).didnt_have(member_name) for enum_index, member_name in enum_changes[change_index]
+        ]
+        attributes = _add_schema_instructions(
+            instructions,
+            change_index,
+            schema_changes[change_index],
+            models,
+            routes_to_alter,
+            with_converters=with_converters,
+        )
+        for endpoint_change_index in range(endpoint_changes_per_version):
+            if endpoint_change_index % 2 == 0 and routes_to_add:
+                path, methods = _get_route_path_and_methods(routes_to_add.pop())
+                instructions.append(endpoint(path, methods).didnt_exist)
+            elif routes_to_alter:
+                path, methods = _get_route_path_and_methods(rng.choice(routes_to_alter))
+                description = f"Description before change number {change_index}.{endpoint_change_index}"
+                instructions.append(endpoint(path, methods).had(description=description))
+        attributes |= {
+            "description": f"Change number {change_index}",
+            "instructions_to_migrate_to_previous_version": tuple(instructions),
+        }
+        version_changes.append(type(f"VersionChange{change_index}", (VersionChange,), attributes))
+
+    versions = VersionBundle(
+        *(
+            Version(first_version + timedelta(days=change_index + 1), version_changes[change_index])
+            for change_index in reversed(range(changes_count))
+        ),
+        Version(first_version),
+    )
+    router = VersionedAPIRouter()
+    for route_index in range(routes_count):
+        _add_route(router, route_index, models[route_index % models_count])
+    return SyntheticAPI(versions=versions, router=router, models=models, enums=enums)
+
+
+def _validate_counts(*, versions_count: int, routes_count: int, models_count: int, model_depth: int, **counts: int):
+    if versions_count < 1:
+        raise ValueError(f"versions_count must be at least 1, got {versions_count}")
+    if model_depth < 1:
+        raise ValueError(f"model_depth must be at least 1, got {model_depth}")
+    if routes_count and models_count < 1:
+        raise ValueError(f"models_count must be at least 1 when there are routes, got {models_count}")
+    for name, count in {"routes_count": routes_count, "models_count": models_count, **counts}.items():
+        if count < 0:
+            raise ValueError(f"{name} must not be negative, got {count}")
+
+
+def _generate_enums(
+    rng: random.Random,
+    changes_count: int,
+    enums_count: int,
+    enum_members_count: int,
+    enum_changes_per_version: int,
+) -> tuple[list[type[Enum]], list[list[tuple[int, str]]]]:
+    added_enum_members: dict[int, list[str]] = {index: [] for index in range(enums_count)}
+    enum_changes: list[list[tuple[int, str]]] = []
+    for change_index in range(changes_count):
+        enum_changes.append([])
+        for member_index in range(enum_changes_per_version if enums_count else 0):
+            enum_index = rng.randrange(enums_count)
+            member_name = f"added_in_change_{change_index}_{member_index}"
+            added_enum_members[enum_index].append(member_name)
+            enum_changes[-1].append((enum_index, member_name))
+    enums: list[type[Enum]] = [
+        Enum(  # pyright: ignore[reportAssignmentType]
+            f"Enum{index}",
+            {name: name for name in [*(f"member_{i}" for i in range(enum_members_count)), *added_members]},
+            type=str,
+        )
+        for index, added_members in added_enum_members.items()
+    ]
+    return enums, enum_changes
+
+
+def _plan_schema_changes(
+    rng: random.Random,
+    changes_count: int,
+    models_count: int,
+    fields_per_model: int,
+    schema_changes_per_version: int,
+) -> tuple[dict[int, list[str]], list[list[_PlannedSchemaChange]]]:
+    added_fields: dict[int, list[str]] = {index: [] for index in range(models_count)}
+    schema_changes: list[list[_PlannedSchemaChange]] = []
+    for change_index in range(changes_count):
+        schema_changes.append([])
+        for instruction_index in range(schema_changes_per_version if models_count else 0):
+            model_index = rng.randrange(models_count)
+            if instruction_index % 2 == 1 or not fields_per_model:
+                field_name = f"added_in_change_{change_index}_{instruction_index}"
+                added_fields[model_index].append(field_name)
+                schema_changes[-1].append(_PlannedSchemaChange(model_index, field_name, is_added_field=True))
+            else:
+                field_name = f"field_{rng.randrange(fields_per_model)}"
+                schema_changes[-1].append(_PlannedSchemaChange(model_index, field_name, is_added_field=False))
+    return added_fields, schema_changes
+
+
+def _add_schema_instructions(
+    instructions: list[Any],
+    change_index: int,
+    planned_changes: list[_PlannedSchemaChange],
+    models: list[type[BaseModel]],
+    routes_to_alter: list[int],
+    *,
+    with_converters: bool,
+) -> dict[str, Any]:
+    """Add the schema instructions of the version change and return its converters"""
+    # Cadwyn requires converters to apply to at least one route so we only add them to models that are used by routes
+    # that exist in all versions
+    models_with_request_converters = {index % len(models) for index in routes_to_alter if index % 2 == 0}
+    models_with_response_converters = {index % len(models) for index in routes_to_alter}
+    converters: dict[str, Any] = {}
+    for instruction_index, planned_change in enumerate(planned_changes):
+        model = models[planned_change.model_index]
+        if planned_change.is_added_field:
+            instructions.append(schema(model).field(planned_change.field_name).didnt_exist)
+            if with_converters and planned_change.model_index in models_with_request_converters:
+                converters |= _make_request_converter(model, planned_change.field_name)
+            if with_converters and planned_change.model_index in models_with_response_converters:
+                converters |= _make_response_converter(model, planned_change.field_name)
+        else:
+            description = f"Description before change number {change_index}.{instruction_index}"
+            instructions.append(schema(model).field(planned_change.field_name).had(description=description))
+    return converters
+
+
+def get_example_payload(model: type[BaseModel]) -> dict[str, Any]:
+    """Build a valid payload for a model generated by `generate_synthetic_api`"""
+    return {name: _get_example_value(field.annotation) for name, field in model.model_fields.items()}
+
+
+def _get_example_value(annotation: Any) -> Any:
+    if lenient_issubclass(annotation, BaseModel):
+        return get_example_payload(annotation)
+    elif lenient_issubclass(annotation, Enum):
+        return next(iter(annotation)).value
+    elif get_origin(annotation) is list:
+        return [_get_example_value(get_args(annotation)[0])]
+    return _EXAMPLE_VALUES[annotation]
+
+
+def _generate_models(
+    models_count: int,
+    fields_per_model: int,
+    model_depth: int,
+    enums: list[type[Enum]],
+    added_fields: dict[int, list[str]],
+) -> list[type[BaseModel]]:
+    models: dict[int, type[BaseModel]] = {}
+    # Children are generated before their parents
+    for index in reversed(range(models_count)):
+        fields: dict[str, Any] = {
+            f"field_{field_index}": (_FIELD_TYPES[field_index % len(_FIELD_TYPES)], ...)
+            for field_index in range(fields_per_model)
+        }
+        if enums:
+            fields["status"] = (enums[index % len(enums)], ...)
+        if (index + 1) % model_depth != 0 and index + 1 < models_count:
+            fields["child"] = (models[index + 1], ...)
+        for field_name in added_fields[index]:
+            fields[field_name] = (int, 0)
+        models[index] = create_model(f"Model{index}", **fields)
+    return [models[index] for index in range(models_count)]
+
+
+def _make_request_converter(model: type[BaseModel], field_name: str) -> dict[str, Any]:
+    def migrate_request(request: RequestInfo) -> None:
+        request.body[field_name] = 0
+
+    migrate_request.__name__ = f"migrate_{field_name}_in_request"
+    return {migrate_request.__name__: convert_request_to_next_version_for(model)(migrate_request)}
+
+
+def _make_response_converter(model: type[BaseModel], field_name: str) -> dict[str, Any]:
+    def migrate_response(response: ResponseInfo) -> None:
+        response.body.pop(field_name, None)
+
+    migrate_response.__name__ = f"migrate_{field_name}_in_response"
+    return {migrate_response.__name__: convert_response_to_previous_version_for(model)(migrate_response)}
+
+
+def _get_route_path_and_methods(route_index: int) -> tuple[str, list[str]]:
+    if route_index % 2 == 0:
+        return f"/resources{route_index}", ["POST"]
+    return f"/resources{route_index}/{{item_id}}", ["GET"]
+
+
+def _add_route(router: VersionedAPIRouter, route_index: int, model: type[BaseModel]) -> None:
+    path, methods = _get_route_path_and_methods(route_index)
+    endpoint_func: Callable[..., Any]
+    if methods == ["POST"]:
+
+        async def create_resource(payload: model) -> model:  # pyright: ignore[reportInvalidTypeForm]
+            return payload
+
+        endpoint_func = create_resource
+    else:
+        example = get_example_payload(model)
+
+        async def get_resource(item_id: int) -> model:  # pyright: ignore[reportInvalidTypeForm]
+            return example
+
+        endpoint_func = get_resource
+    router.add_api_route(path, endpoint_func, methods=methods)
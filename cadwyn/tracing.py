@@ -0,0 +1,73 @@
+"""Hooks for tracing the stages of processing versioned requests.
+
+Tracing is disabled by default and costs a single function call and a global lookup per stage while it is disabled.
+Call `set_tracer` to enable it:
+
+    from opentelemetry import trace
+    from cadwyn.tracing import OpenTelemetryTracer, set_tracer
+
+    set_tracer(OpenTelemetryTracer(trace.get_tracer("cadwyn")))
+
+Cadwyn reports the following stages:
+
+* `cadwyn.validate_version_header`: validating the version from the header, path, or query in the middleware
+* `cadwyn.resolve_pinned_version`: calling the api version resolver of a request without the version header
+* `cadwyn.resolve_version`: picking the routes of the requested version (and building them if they are built lazily)
+* `cadwyn.read_request_body`: getting the body of the request to migrate it
+* `cadwyn.migrate_request`: applying request converters
+* `cadwyn.solve_dependencies`: validating the migrated request against the head version of the route
+* `cadwyn.endpoint`: running the endpoint
+* `cadwyn.read_response_body`: getting the body of the response to migrate it
+* `cadwyn.migrate_response`: applying response converters
+* `cadwyn.serialize_response`: serializing the migrated response body
+"""
+
+from contextlib import AbstractContextManager, nullcontext
+from datetime import date
+from typing import Any
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Tracer:
+    """Receives the stages of processing versioned requests. This default implementation ignores them.
+
+    `version` is the version from the request header and `route` is the path of the matched versioned route.
+    """
+
+    def span(self, name: str, *, version: date | None = None, route: str | None = None) -> AbstractContextManager[Any]:
+        return _NULL_CONTEXT
+
+
+class OpenTelemetryTracer(Tracer):
+    """Reports every stage as an OpenTelemetry span of a tracer from `opentelemetry.trace.get_tracer`"""
+
+    def __init__(self, tracer: Any) -> None:
+        self.tracer = tracer
+
+    def span(self, name: str, *, version: date | None = None, route: str | None = None) -> AbstractContextManager[Any]:
+        attributes: dict[str, str] = {}
+        if version is not None:
+            attributes["cadwyn.api_version"] = version.isoformat()
+        if route is not None:
+            attributes["http.route"] = route
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+
+_current_tracer: Tracer | None = None
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    """Report the stages of all subsequent requests to the tracer. Pass None to disable tracing"""
+    global _current_tracer  # noqa: PLW0603
+    _current_tracer = tracer
+
+
+def get_tracer() -> Tracer | None:
+    return _current_tracer
+
+
+def span(name: str, *, version: date | None = None, route: str | None = None) -> AbstractContextManager[Any]:
+    if _current_tracer is None:
+        return _NULL_CONTEXT
+    return _current_tracer.span(name, version=version, route=route)
@@ -0,0 +1,149 @@
+"""Data migrations for the messages of versioned websocket routes.
+
+    from cadwyn.websockets import VersionedWebSocket, websocket_message_models
+
+    @router.websocket("/feed")
+    @websocket_message_models(Subscription, Event)
+    async def feed(websocket: WebSocket):
+        await websocket.accept()
+        versioned_websocket = VersionedWebSocket(websocket)
+        subscription = await versioned_websocket.receive_model(Subscription)
+        async for events in get_event_batches(subscription):
+            await versioned_websocket.send_models(events)
+
+Messages are migrated with the schema-based converters of their head models, the same ones that migrate
+request and response bodies of HTTP routes. `websocket_message_models` tells Cadwyn which models the route
+sends and receives so that their converters are not reported as unused.
+"""
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from fastapi import Response, WebSocket
+from pydantic import BaseModel
+from starlette.routing import BaseRoute
+
+from cadwyn.schema_generation import generate_versioned_models
+from cadwyn.structure.data import RequestInfo, ResponseInfo, _AlterDataInstruction
+
+if TYPE_CHECKING:
+    from datetime import date
+
+    from cadwyn.metrics import CadwynMetrics
+    from cadwyn.structure.versions import VersionBundle
+
+_T = TypeVar("_T")
+_T_MODEL = TypeVar("_T_MODEL", bound=BaseModel)
+_MESSAGE_MODELS_ATTRIBUTE = "__cadwyn_websocket_message_models__"
+
+
+def websocket_message_models(*head_models: type[BaseModel]):
+    """Mark the head models of the messages that the websocket endpoint sends and receives"""
+
+    def decorator(endpoint: _T) -> _T:
+        setattr(endpoint, _MESSAGE_MODELS_ATTRIBUTE, frozenset(head_models))
+        return endpoint
+
+    return decorator
+
+
+def get_websocket_message_models(route: BaseRoute) -> frozenset[type[BaseModel]]:
+    return getattr(getattr(route, "endpoint", None), _MESSAGE_MODELS_ATTRIBUTE, frozenset())
+
+
+class VersionedWebSocket:
+    """Migrates the messages of a websocket connection between the head version and the version of the client.
+
+    The version of the client is the one that the versioning middleware picked for the connection.
+    `versions` defaults to the version bundle of the Cadwyn app that received the connection.
+    """
+
+    def __init__(self, websocket: WebSocket, versions: "VersionBundle | None" = None) -> None:
+        self.websocket = websocket
+        self.versions: VersionBundle = versions if versions is not None else websocket.app.versions
+        # The metrics of the app only know the data converters of its own version bundle
+        self._metrics: CadwynMetrics | None = (
+            getattr(websocket.app, "metrics", None)
+            if self.versions is getattr(websocket.app, "versions", None)
+            else None
+        )
+        api_version = self.versions.api_version_var.get(None)
+        # None means that the connection is unversioned so its messages are in the head version
+        self.version: date | None = (
+            None if api_version is None else self.versions._get_closest_lesser_version(api_version)
+        )
+        self._versioned_models = (
+            None if self.version is None else generate_versioned_models(self.versions, lazy=True)[str(self.version)]
+        )
+        # Models of the latest version only differ from head models if the head version has its own schema changes
+        self._models_are_the_same_as_head = (
+            self.version == self.versions.version_dates[0] and not self.versions.head_version.changes
+        )
+        # Converters can change the headers or the status code but websocket messages do not have any,
+        # so all messages share the same request info and the same response to avoid creating them for every message
+        self._request_info = RequestInfo(websocket, None)  # pyright: ignore[reportArgumentType]
+        self._response = Response(status_code=200)
+
+    async def receive_model(self, head_model: type[_T_MODEL]) -> _T_MODEL:
+        """Receive a JSON message from the client and migrate it to head_model"""
+        return self.migrate_incoming(head_model, await self.websocket.receive_json())
+
+    async def send_model(self, message: BaseModel) -> None:
+        """Migrate the message to the version of the client and send it as JSON"""
+        await self.websocket.send_text(self.migrate_outgoing([message])[0])
+
+    async def send_models(self, messages: Sequence[BaseModel]) -> None:
+        """Migrate all messages at once and send each of them as a separate JSON message"""
+        for message in self.migrate_outgoing(messages):
+            await self.websocket.send_text(message)
+
+    def migrate_incoming(self, head_model: type[_T_MODEL], body: Any) -> _T_MODEL:
+        """Migrate the data of a message from the client to head_model"""
+        if self.version is not None:
+            self._request_info.body = body
+            self._apply(self.versions._get_request_migrations_by_schema(head_model, self.version), [self._request_info])
+            body = self._request_info.body
+            self._request_info.body = None
+        return head_model.model_validate(body)
+
+    def migrate_outgoing(self, messages: Sequence[BaseModel]) -> list[str]:
+        """Migrate the messages to the version of the client and serialize them to JSON.
+
+        Messages of the same model are migrated together: each converter runs over the whole batch before the next one.
+        """
+        if self.version is None or self._versioned_models is None:
+            return [message.model_dump_json(by_alias=True) for message in messages]
+
+        serialized_messages: list[str] = [""] * len(messages)
+        indexes_by_model: dict[type[BaseModel], list[int]] = {}
+        for index, message in enumerate(messages):
+            indexes_by_model.setdefault(type(message), []).append(index)
+
+        for head_model, indexes in indexes_by_model.items():
+            migrations = self.versions._get_response_migrations_by_schema(head_model, self.version)
+            versioned_model = self._versioned_models[head_model]
+            if not migrations and self._models_are_the_same_as_head:
+                for index in indexes:
+                    serialized_messages[index] = messages[index].model_dump_json(by_alias=True)
+                continue
+
+            payloads = [
+                ResponseInfo(self._response, messages[index].model_dump(mode="json", by_alias=True))
+                for index in indexes
+            ]
+            self._apply(migrations, payloads)
+            for payload, index in zip(payloads, indexes, strict=True):
+                # Validating against the versioned model drops the fields that the version does not have
+                serialized_messages[index] = versioned_model.model_validate(payload.body).model_dump_json(by_alias=True)
+        return serialized_messages
+
+    def _apply(
+        self, migrations: Sequence[_AlterDataInstruction], payloads: Sequence[RequestInfo] | Sequence[ResponseInfo]
+    ) -> None:
+        metrics = self._metrics
+        for migration in migrations:
+            for payload in payloads:
+                if metrics is None:
+                    migration(payload)
+                else:
+                    metrics.call_data_converter(migration, payload)
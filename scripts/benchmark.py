@@ -0,0 +1,234 @@
+"""Benchmark routing, data migrations, and startup of Cadwyn apps.
+
+Usage:
+    python scripts/benchmark.py                                  # run all suites
+    python scripts/benchmark.py routing payloads --quick         # run some suites with smaller sizes
+    python scripts/benchmark.py --json results.json              # save the results
+    python scripts/benchmark.py --compare results.json           # fail if anything got slower than in results.json
+
+Suites:
+    routing     requests per second to the newest, middle, and oldest versions of an app with 100 routes
+    migrations  latency of a request that goes through a chain of 1 to 200 versions with request and response migrations
+    payloads    latency of migrating request and response bodies from 1 KB to 10 MB
+    startup     time of generating and including versioned routers for 10, 100, and 500 versions (with 10 routes)
+                and for 10, 100, and 500 routes (with 10 versions)
+
+All apps are generated by cadwyn.synthetic. All requests go through an in-process ASGI client so the benchmarks do not need network access.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections.abc import Callable, Coroutine
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import httpx
+from fastapi.routing import APIRoute
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cadwyn import Cadwyn
+from cadwyn.synthetic import generate_synthetic_api, get_example_payload
+
+FIRST_VERSION = date(2000, 1, 1)
+
+
+class BenchmarkResult:
+    def __init__(self, name: str, seconds_per_op: list[float]):
+        self.name = name
+        self.seconds_per_op = statistics.median(seconds_per_op)
+
+    @property
+    def ops_per_second(self) -> float:
+        return 1 / self.seconds_per_op
+
+
+def _version_header(app: Cadwyn, version: date) -> dict[str, str]:
+    return {app.router.api_version_header_name: version.isoformat()}
+
+
+def _measure(func: Callable[[], Any], *, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def _measure_requests(
+    app: Cadwyn,
+    version: date,
+    path: str,
+    payload: Any,
+    *,
+    requests_count: int,
+    repeat: int,
+) -> list[float]:
+    headers = _version_header(app, version) | {"content-type": "application/json"}
+    content = json.dumps(payload).encode()
+    transport = httpx.ASGITransport(app=app)  # pyright: ignore[reportArgumentType]
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        # The first request builds whatever is built lazily
+        response = await client.post(path, content=content, headers=headers)
+        response.raise_for_status()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(requests_count):
+                await client.post(path, content=content, headers=headers)
+            timings.append((time.perf_counter() - start) / requests_count)
+        return timings
+
+
+def _run(coroutine: Coroutine[Any, Any, list[float]]) -> list[float]:
+    return asyncio.run(coroutine)
+
+
+def _make_payload(app_models: list[Any], model_index: int, size_in_bytes: int | None = None) -> dict[str, Any]:
+    payload = get_example_payload(app_models[model_index])
+    if size_in_bytes is not None:
+        # field_4 is the list[str] field of synthetic models
+        tag = "x" * 90
+        payload["field_4"] = [tag] * max(size_in_bytes // (len(tag) + 3), 1)
+    return payload
+
+
+def bench_routing(*, quick: bool) -> list[BenchmarkResult]:
+    versions_count = 10 if quick else 50
+    api = generate_synthetic_api(
+        versions_count=versions_count, routes_count=100, models_count=10, endpoint_changes_per_version=0
+    )
+    # Routes are matched one by one so we request the last POST route to measure the slowest match
+    route = next(
+        route for route in reversed(api.router.routes) if isinstance(route, APIRoute) and "POST" in route.methods
+    )
+    payload = _make_payload(api.models, api.models.index(route.response_model))
+    app = api.create_app()
+    versions = [version.value for version in app.versions]
+    results = []
+    for label, version in [("newest", versions[0]), ("middle", versions[len(versions) // 2]), ("oldest", versions[-1])]:
+        timings = _run(
+            _measure_requests(app, version, route.path, payload, requests_count=200 if quick else 1000, repeat=3)
+        )
+        results.append(BenchmarkResult(f"routing[{label} of {versions_count} versions]", timings))
+    return results
+
+
+def _generate_app_with_migrations(versions_count: int):
+    # Every version change adds a field to the only model and migrates it in requests and responses
+    return generate_synthetic_api(
+        versions_count=versions_count,
+        routes_count=1,
+        models_count=1,
+        enums_count=0,
+        endpoint_changes_per_version=0,
+        first_version=FIRST_VERSION,
+    )
+
+
+def bench_migrations(*, quick: bool) -> list[BenchmarkResult]:
+    results = []
+    for chain_length in [1, 10, 50] if quick else [1, 10, 50, 100, 200]:
+        api = _generate_app_with_migrations(chain_length + 1)
+        timings = _run(
+            _measure_requests(
+                api.create_app(),
+                FIRST_VERSION,
+                "/resources0",
+                _make_payload(api.models, 0),
+                requests_count=50 if quick else 200,
+                repeat=3,
+            )
+        )
+        results.append(BenchmarkResult(f"migrations[chain of {chain_length}]", timings))
+    return results
+
+
+def bench_payloads(*, quick: bool) -> list[BenchmarkResult]:
+    api = _generate_app_with_migrations(2)
+    app = api.create_app()
+    results = []
+    for size_name, size in [("1KB", 2**10), ("10KB", 10 * 2**10), ("100KB", 100 * 2**10), ("1MB", 2**20)] + (
+        [] if quick else [("10MB", 10 * 2**20)]
+    ):
+        requests_count = max(1, min(200, (10 if quick else 100) * 2**20 // size))
+        payload = _make_payload(api.models, 0, size)
+        for label, version in [("newest", app.versions.versions[0].value), ("oldest", FIRST_VERSION)]:
+            timings = _run(
+                _measure_requests(app, version, "/resources0", payload, requests_count=requests_count, repeat=3)
+            )
+            results.append(BenchmarkResult(f"payloads[{size_name}, {label}]", timings))
+    return results
+
+
+def bench_startup(*, quick: bool) -> list[BenchmarkResult]:
+    sizes = [10, 100] if quick else [10, 100, 500]
+    repeat = 1 if quick else 3
+    results = []
+    for versions_count in sizes:
+        # A new API for every run because Cadwyn caches the models that it generated for each version bundle
+        apis = [generate_synthetic_api(versions_count=versions_count, routes_count=10) for _ in range(repeat)]
+        timings = _measure(lambda: apis.pop().create_app(), repeat=repeat)
+        results.append(BenchmarkResult(f"startup[{versions_count} versions, 10 routes]", timings))
+    # 10 versions with 10 routes were already measured above
+    for routes_count in sizes[1:]:
+        apis = [generate_synthetic_api(versions_count=10, routes_count=routes_count) for _ in range(repeat)]
+        timings = _measure(lambda: apis.pop().create_app(), repeat=repeat)
+        results.append(BenchmarkResult(f"startup[10 versions, {routes_count} routes]", timings))
+    return results
+
+
+SUITES: dict[str, Callable[..., list[BenchmarkResult]]] = {
+    "routing": bench_routing,
+    "migrations": bench_migrations,
+    "payloads": bench_payloads,
+    "startup": bench_startup,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", help=f"Suites to run: {', '.join(SUITES)}. All of them by default")
+    parser.add_argument("--quick", action="store_true", help="Use smaller sizes and fewer repeats")
+    parser.add_argument("--json", type=Path, help="Save the results to this file")
+    parser.add_argument("--compare", type=Path, help="Compare the results with the results saved by --json")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=1.2,
+        help="Fail when a benchmark is this many times slower than in --compare results (1.2 by default)",
+    )
+    args = parser.parse_args()
+    if unknown_suites := set(args.suites) - SUITES.keys():
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown_suites))}")
+
+    results: list[BenchmarkResult] = []
+    for suite in args.suites or SUITES:
+        for result in SUITES[suite](quick=args.quick):
+            print(f"{result.name:<45} {result.seconds_per_op * 1000:>12.3f} ms {result.ops_per_second:>12.1f} ops/s")
+            results.append(result)
+
+    if args.json:
+        args.json.write_text(json.dumps({result.name: result.seconds_per_op for result in results}, indent=2))
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = [
+            f"{result.name}: {baseline[result.name] * 1000:.3f} ms -> {result.seconds_per_op * 1000:.3f} ms"
+            for result in results
+            if result.name in baseline and result.seconds_per_op > baseline[result.name] * args.max_slowdown
+        ]
+        if regressions:
+            print(f"\nBenchmarks that got more than {args.max_slowdown}x slower:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
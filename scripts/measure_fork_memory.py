@@ -0,0 +1,74 @@
+"""Measure how much memory each forked worker of a Cadwyn app does not share with the other workers.
+
+Usage: python scripts/measure_fork_memory.py main:app --workers 4 [--no-prepare-for-fork]
+
+It only works on Linux because it reads /proc/<pid>/smaps_rollup.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.getcwd())
+
+from cadwyn._importer import import_attribute_from_string
+
+
+def get_unique_memory_kib(pid: int) -> int:
+    unique_memory = 0
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        if line.startswith(("Private_Clean:", "Private_Dirty:")):
+            unique_memory += int(line.split()[1])
+    return unique_memory
+
+
+def run_worker(app, read_fd: int, write_fd: int) -> None:
+    # Emulate what a worker does with the objects it inherited: the garbage collector walks them
+    # and handling requests touches the routes and models of every version.
+    gc.collect()
+    for versioned_router in app.router.versioned_routers.values():
+        for route in versioned_router.routes:
+            getattr(route, "endpoint", None)
+    os.write(write_fd, b"1")
+    # Wait for the master to measure us
+    os.read(read_fd, 1)
+    os._exit(0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("app", help="Python path to the Cadwyn app in <module>:<attribute> format")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-prepare-for-fork", action="store_true", help="Do not call app.prepare_for_fork()")
+    args = parser.parse_args()
+
+    app = import_attribute_from_string(args.app)
+    if not args.no_prepare_for_fork:
+        start = time.perf_counter()
+        app.prepare_for_fork()
+        print(f"prepare_for_fork() took {time.perf_counter() - start:.2f}s")
+
+    workers = []
+    for _ in range(args.workers):
+        to_worker_read, to_worker_write = os.pipe()
+        from_worker_read, from_worker_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            run_worker(app, to_worker_read, from_worker_write)
+        workers.append((pid, to_worker_write, from_worker_read))
+
+    for pid, to_worker_write, from_worker_read in workers:
+        os.read(from_worker_read, 1)
+        print(f"Worker {pid}: {get_unique_memory_kib(pid) / 1024:.1f} MiB of unique memory")
+    print(f"Master {os.getpid()}: {get_unique_memory_kib(os.getpid()) / 1024:.1f} MiB of unique memory")
+
+    for pid, to_worker_write, _ in workers:
+        os.write(to_worker_write, b"1")
+        os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+from cadwyn import Cadwyn, Version, VersionBundle, VersionedAPIRouter
+from cadwyn.structure import VersionChange, schema
+
+
+class User(BaseModel):
+    name: str
+
+
+class MyVersionChange(VersionChange):
+    description = ""
+    instructions_to_migrate_to_previous_version = (schema(User).field("name").had(description="Hewwo"),)
+
+
+router = VersionedAPIRouter()
+
+
+@router.post("/users")
+async def create_user(user: User) -> User:
+    return user
+
+
+app = Cadwyn(versions=VersionBundle(Version(date(2001, 1, 1), MyVersionChange), Version(date(2000, 1, 1))))
+app.generate_and_include_versioned_routers(router)
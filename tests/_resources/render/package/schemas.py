@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+from tests._resources.render.package import Item
+
+
+class ItemList(BaseModel):
+    items: list[Item]
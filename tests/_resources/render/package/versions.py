@@ -0,0 +1,24 @@
+from datetime import date
+from typing import Any
+
+from cadwyn import Version, VersionBundle
+from cadwyn.applications import Cadwyn
+from cadwyn.structure import VersionChange
+from cadwyn.structure.schemas import schema
+
+from . import Item
+
+
+def create_versions(*, old_name_type: Any = int, pregenerated_models_package: str | None = None) -> VersionBundle:
+    class ItemNameWasAnInt(VersionChange):
+        description = ""
+        instructions_to_migrate_to_previous_version = (schema(Item).field("name").had(type=old_name_type),)
+
+    return VersionBundle(
+        Version(date(2001, 1, 1), ItemNameWasAnInt),
+        Version(date(2000, 1, 1)),
+        pregenerated_models_package=pregenerated_models_package,
+    )
+
+
+app = Cadwyn(versions=create_versions())
@@ -1,4 +1,8 @@
+import gc
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from typing import Annotated, cast
 
@@ -6,9 +10,12 @@ import pytest
 from fastapi import APIRouter, BackgroundTasks, Depends, FastAPI
 from fastapi.routing import APIRoute
 from fastapi.testclient import TestClient
+from pydantic import BaseModel
 
-from cadwyn import Cadwyn
+from cadwyn import Cadwyn, generate_versioned_models
+from cadwyn.exceptions import InvalidGenerationInstructionError, RouterGenerationError
 from cadwyn.route_generation import VersionedAPIRouter
+from cadwyn.structure import VersionChange, VersionChangeWithSideEffects, schema
 from cadwyn.structure.versions import HeadVersion, Version, VersionBundle
 from tests._resources.utils import BASIC_HEADERS, DEFAULT_API_VERSION
 from tests._resources.versioned_app.app import (
@@ -192,6 +199,197 @@ def test__get_openapi__with_mounted_app__should_include_root_path_in_servers():
     assert "/my_api" in [server["url"] for server in servers]
 
 
+def test__prepare_for_fork__openapi_and_changelog_are_the_same_as_without_it():
+    def create_app():
+        app = Cadwyn(versions=VersionBundle(Version(date(2022, 11, 16))), lazy_model_generation=True)
+        app.generate_and_include_versioned_routers(v2021_01_01_router)
+
+        @app.post("/my_unversioned_route")
+        def my_unversioned_route():
+            raise NotImplementedError
+
+        root_app = FastAPI()
+        root_app.mount("/my_api", app)
+        return app, TestClient(root_app)
+
+    app, client = create_app()
+    prepared_app, prepared_client = create_app()
+    try:
+        prepared_app.prepare_for_fork()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+    assert all(
+        generator.generated_models_count == len(generator.model_bundle.schemas) + len(generator.model_bundle.enums)
+        for generator in generate_versioned_models(prepared_app.versions).values()
+    )
+    for url in ["/my_api/openapi.json?version=2022-11-16", "/my_api/openapi.json?version=unversioned"]:
+        prepared_response = prepared_client.get(url)
+        assert prepared_response.status_code == 200
+        assert prepared_response.json() == client.get(url).json()
+        assert "/my_api" in [server["url"] for server in prepared_response.json()["servers"]]
+    assert prepared_client.get("/my_api/changelog").json() == client.get("/my_api/changelog").json()
+
+
+def test__lazy_router_generation__routers_are_built_on_first_request():
+    router = VersionedAPIRouter()
+
+    @router.get("/test")
+    async def test():
+        return 83
+
+    app = Cadwyn(
+        versions=VersionBundle(Version(date(2002, 1, 1)), Version(date(2001, 1, 1)), Version(date(2000, 1, 1))),
+        lazy_router_generation=True,
+        prewarmed_versions=[date(2002, 1, 1)],
+    )
+    app.generate_and_include_versioned_routers(router)
+
+    def paths(version: date):
+        return [cast(APIRoute, route).path for route in app.router.versioned_routers[version].routes]
+
+    assert paths(date(2002, 1, 1)) == ["/openapi.json", "/test"]
+    assert paths(date(2001, 1, 1)) == paths(date(2000, 1, 1)) == []
+
+    with TestClient(app) as client:
+        assert client.get("/test", headers={"x-api-version": "2001-06-01"}).json() == 83
+        assert paths(date(2001, 1, 1)) == ["/openapi.json", "/test"]
+        assert paths(date(2000, 1, 1)) == []
+
+        assert client.get("/openapi.json?version=2000-01-01").json()["paths"].keys() == {"/test"}
+        assert paths(date(2000, 1, 1)) == ["/openapi.json", "/test"]
+
+
+def test__lazy_router_generation__concurrent_first_requests__router_is_built_once():
+    app = Cadwyn(versions=VersionBundle(Version(date(2000, 1, 1))), lazy_router_generation=True)
+    build_calls: list[None] = []
+
+    def build_router():
+        time.sleep(0.05)
+        build_calls.append(None)
+
+    app.router.add_lazy_versioned_router(date(2000, 1, 1), build_router)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        routers = list(executor.map(lambda _: app.router.build_versioned_router(date(2000, 1, 1)), range(4)))
+
+    assert len(build_calls) == 1
+    assert all(router is app.router.versioned_routers[date(2000, 1, 1)] for router in routers)
+
+
+def test__lazy_router_generation__failed_build__only_remaining_builders_are_retried():
+    app = Cadwyn(versions=VersionBundle(Version(date(2000, 1, 1))), lazy_router_generation=True)
+    build_calls: list[str] = []
+    should_fail = True
+
+    def build_first_part():
+        build_calls.append("first")
+
+    def build_second_part():
+        build_calls.append("second")
+        if should_fail:
+            raise ValueError("Hewwo")
+
+    app.router.add_lazy_versioned_router(date(2000, 1, 1), build_first_part)
+    app.router.add_lazy_versioned_router(date(2000, 1, 1), build_second_part)
+    with pytest.raises(ValueError, match="Hewwo"):
+        app.router.build_versioned_router(date(2000, 1, 1))
+
+    should_fail = False
+    app.router.build_versioned_router(date(2000, 1, 1))
+    app.router.build_versioned_router(date(2000, 1, 1))
+    assert build_calls == ["first", "second", "second"]
+
+
+def test__lazy_router_generation__invalid_old_version__fails_only_when_that_version_is_built():
+    class User(BaseModel):
+        name: str
+
+    class MyVersionChange(VersionChange):
+        description = "..."
+        instructions_to_migrate_to_previous_version = (schema(User).field("nonexistent").didnt_exist,)
+
+    router = VersionedAPIRouter()
+
+    @router.post("/users")
+    async def create_user(user: User) -> User:
+        return user
+
+    app = Cadwyn(
+        versions=VersionBundle(
+            Version(date(2002, 1, 1)), Version(date(2001, 1, 1), MyVersionChange), Version(date(2000, 1, 1))
+        ),
+        lazy_router_generation=True,
+    )
+    app.generate_and_include_versioned_routers(router)
+
+    with TestClient(app) as client:
+        assert client.post("/users", json={"name": "John"}, headers={"x-api-version": "2002-01-01"}).json() == {
+            "name": "John"
+        }
+        with pytest.raises(InvalidGenerationInstructionError):
+            client.post("/users", json={"name": "John"}, headers={"x-api-version": "2001-01-01"})
+    with pytest.raises(RouterGenerationError, match="generation of versioned routers failed before") as exc_info:
+        app.router.build_versioned_router(date(2000, 1, 1))
+    assert isinstance(exc_info.value.__cause__, InvalidGenerationInstructionError)
+
+
+def test__lazy_router_generation__first_request__router_is_built_in_worker_thread():
+    app = Cadwyn(versions=VersionBundle(Version(date(2000, 1, 1))), lazy_router_generation=True)
+    build_threads: list[threading.Thread] = []
+    app.router.add_lazy_versioned_router(date(2000, 1, 1), lambda: build_threads.append(threading.current_thread()))
+
+    @app.get("/thread")
+    async def get_thread():
+        return threading.current_thread().name
+
+    with TestClient(app) as client:
+        event_loop_thread_name = client.get("/thread").json()
+        client.get("/test", headers={"x-api-version": "2000-01-01"})
+
+    assert len(build_threads) == 1
+    assert build_threads[0].name != event_loop_thread_name
+
+
+def test__get_memory_usage__unchanged_models_are_shared_between_versions():
+    class Address(BaseModel):
+        street: str
+
+    class User(BaseModel):
+        name: str
+        address: Address
+
+    class MyVersionChange(VersionChange):
+        description = "..."
+        instructions_to_migrate_to_previous_version = (schema(User).field("name").had(description="Hewwo"),)
+
+    router = VersionedAPIRouter()
+
+    @router.post("/users")
+    async def create_user(user: User) -> User:
+        raise NotImplementedError
+
+    app = Cadwyn(
+        versions=VersionBundle(Version(date(2001, 1, 1), MyVersionChange), Version(date(2000, 1, 1))),
+        lazy_router_generation=True,
+    )
+    app.generate_and_include_versioned_routers(router)
+
+    assert [usage.routes_count for usage in app.get_memory_usage()] == [0, 0]
+
+    latest, oldest = app.get_memory_usage(generate_all=True)
+    assert (latest.version, oldest.version) == ("2001-01-01", "2000-01-01")
+    for usage in (latest, oldest):
+        assert usage.models_count == 2
+        assert usage.model_bytes.keys() == {User.__qualname__, Address.__qualname__}
+        assert usage.routes_count == 1
+        assert usage.dependants_count == 2
+        assert usage.unique_bytes > 0
+        assert usage.total_bytes == usage.unique_bytes + usage.shared_bytes
+    assert latest.model_bytes[Address.__qualname__] == oldest.model_bytes[Address.__qualname__]
+    assert latest.shared_bytes == oldest.shared_bytes >= latest.model_bytes[Address.__qualname__]
+
+
 def test__get_docs__without_unversioned_routes__should_return_all_versioned_doc_urls():
     app = Cadwyn(changelog_url=None, versions=VersionBundle(Version(date(2022, 11, 16))))
     app.add_header_versioned_routers(v2021_01_01_router, header_value="2021-01-01")
@@ -291,3 +489,30 @@ def test__background_tasks():
         resp = client.post("/send-notification/test@example.com", headers=BASIC_HEADERS)
         assert resp.status_code == 200, resp.json()
         assert background_task_data == ("test@example.com", "some notification")
+
+
+def test__side_effects__resolved_by_router_once_per_request():
+    class SideEffect(VersionChangeWithSideEffects):
+        description = "..."
+        instructions_to_migrate_to_previous_version = ()
+
+    versions = VersionBundle(Version(date(2001, 1, 1), SideEffect), Version(date(2000, 1, 1)))
+    router = VersionedAPIRouter()
+
+    @router.get("/side_effects")
+    async def get_side_effects():
+        resolved_by_router = versions._applied_side_effects_var.get(None) is not None
+        return {"is_applied": SideEffect.is_applied, "resolved_by_router": resolved_by_router}
+
+    app = Cadwyn(versions=versions)
+    app.generate_and_include_versioned_routers(router)
+
+    with TestClient(app) as client:
+        assert client.get("/side_effects", headers={"x-api-version": "2001-06-01"}).json() == {
+            "is_applied": True,
+            "resolved_by_router": True,
+        }
+        assert client.get("/side_effects", headers={"x-api-version": "2000-06-01"}).json() == {
+            "is_applied": False,
+            "resolved_by_router": True,
+        }
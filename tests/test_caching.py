@@ -0,0 +1,123 @@
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from cadwyn import Cadwyn, Version, VersionBundle, VersionedAPIRouter
+from cadwyn.caching import ResponseCache, cache_response
+from cadwyn.structure import ResponseInfo, VersionChange, convert_response_to_previous_version_for
+
+
+class Country(BaseModel):
+    name: str
+
+
+@pytest.fixture
+def calls() -> list[str]:
+    return []
+
+
+@pytest.fixture
+def app(calls: list[str]) -> Cadwyn:
+    class MyVersionChange(VersionChange):
+        description = "..."
+        instructions_to_migrate_to_previous_version = ()
+
+        @convert_response_to_previous_version_for(Country)
+        def migrate(response: ResponseInfo):
+            response.body["name"] = response.body["name"].upper()
+
+    router = VersionedAPIRouter()
+
+    @router.get("/countries/{name}")
+    @cache_response(ttl=60, vary=["accept-language"])
+    async def get_country(name: str, fail: bool = False) -> Country:
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        if fail:
+            raise HTTPException(status_code=400)
+        return Country(name=name)
+
+    app = Cadwyn(versions=VersionBundle(Version(date(2001, 1, 1), MyVersionChange), Version(date(2000, 1, 1))))
+    app.generate_and_include_versioned_routers(router)
+    return app
+
+
+def get_cache(app: Cadwyn) -> ResponseCache:
+    route = app.router.versioned_routers[date(2001, 1, 1)].routes[-1]
+    return route.endpoint.__cadwyn_response_cache__  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test__cache_response__cached_per_resolved_version_path_and_query(app: Cadwyn, calls: list[str]):
+    client = TestClient(app)
+    for _ in range(2):
+        response = client.get("/countries/france", headers={"x-api-version": "2001-01-01"})
+        assert response.json() == {"name": "france"}
+        assert response.headers["x-api-version"] == "2001-01-01"
+    assert calls == ["france"]
+
+    for version in ["2000-01-01", "2000-06-01"]:
+        assert client.get("/countries/france", headers={"x-api-version": version}).json() == {"name": "FRANCE"}
+    assert calls == ["france", "france"]
+
+    client.get("/countries/spain", headers={"x-api-version": "2001-01-01"})
+    client.get("/countries/spain?a=1", headers={"x-api-version": "2001-01-01"})
+    client.get("/countries/spain?a=1", headers={"x-api-version": "2001-01-01", "accept-language": "fr"})
+    assert calls == ["france", "france", "spain", "spain", "spain"]
+
+    get_cache(app).clear()
+    client.get("/countries/france", headers={"x-api-version": "2001-01-01"})
+    assert calls == ["france", "france", "spain", "spain", "spain", "france"]
+
+
+def test__cache_response__cached_per_scheme_and_host(app: Cadwyn, calls: list[str]):
+    headers = {"x-api-version": "2001-01-01"}
+    for base_url in ["http://a.example", "http://a.example", "https://a.example", "http://b.example"]:
+        TestClient(app, base_url=base_url).get("/countries/france", headers=headers)
+    assert calls == ["france", "france", "france"]
+
+    # Without the host header, the key falls back to the address of the server
+    cache = ResponseCache(ttl=60)
+    scope = {"type": "http", "path": "/", "query_string": b"", "headers": []}
+    assert cache._get_key(None, scope | {"server": ("a", 80)}) != cache._get_key(None, scope | {"server": ("b", 80)})
+
+
+def test__cache_response__errors_and_other_methods_are_not_cached(app: Cadwyn, calls: list[str]):
+    client = TestClient(app)
+    for _ in range(2):
+        assert client.get("/countries/a?fail=true", headers={"x-api-version": "2001-01-01"}).status_code == 400
+    assert calls == ["a", "a"]
+
+
+def test__cache_response__expired_and_evicted__computed_again(app: Cadwyn, calls: list[str]):
+    client = TestClient(app)
+    cache = get_cache(app)
+    cache.ttl = 0
+    client.get("/countries/a", headers={"x-api-version": "2001-01-01"})
+    client.get("/countries/a", headers={"x-api-version": "2001-01-01"})
+    assert calls == ["a", "a"]
+
+    cache.ttl = 60
+    cache.maxsize = 1
+    for name in ["a", "b", "a"]:
+        client.get(f"/countries/{name}", headers={"x-api-version": "2001-01-01"})
+    assert calls == ["a", "a", "a", "b", "a"]
+
+
+def test__cache_response__concurrent_misses__single_computation(app: Cadwyn, calls: list[str]):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.get("/countries/a", headers={"x-api-version": "2001-01-01"}) for _ in range(5)),
+                client.get("/countries/a?fail=true", headers={"x-api-version": "2001-01-01"}),
+                client.get("/countries/a?fail=true", headers={"x-api-version": "2001-01-01"}),
+            )
+
+    responses = asyncio.run(main())
+    assert [response.status_code for response in responses] == [200] * 5 + [400, 400]
+    assert all(response.json() == {"name": "a"} for response in responses[:5])
+    assert calls == ["a", "a", "a"]
@@ -1,11 +1,14 @@
+import json
 import sys
 import textwrap
+from pathlib import Path
 
 import pytest
 from typer.testing import CliRunner
 
 from cadwyn import __version__
 from cadwyn.__main__ import app
+from cadwyn.schema_generation import generate_versioned_models
 
 
 def code(c: str) -> str:
@@ -38,6 +41,152 @@ class A(BaseModel):
     )
 
 
+def test__codegen(tmp_path: Path):
+    result = CliRunner().invoke(
+        app,
+        [
+            "codegen",
+            "tests._resources.render.classes",
+            "--app=tests._resources.render.versions:app",
+            f"--output-dir={tmp_path / 'generated'}",
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+
+    module_2000 = tmp_path / "generated/v2000_01_01/tests/_resources/render/classes.py"
+    module_2001 = tmp_path / "generated/v2001_01_01/tests/_resources/render/classes.py"
+    assert result.stdout.splitlines() == [str(module_2001), str(module_2000)]
+    assert code(module_2000.read_text()) == code(
+        """
+from enum import Enum, auto
+from pydantic import BaseModel
+
+class MyEnum(Enum):
+    pass
+
+class A(BaseModel):
+    pass
+"""
+    )
+    assert code(module_2001.read_text()) == code(
+        """
+from pydantic import Field
+from enum import Enum, auto
+from pydantic import BaseModel
+
+class MyEnum(Enum):
+    foo = 1
+
+class A(BaseModel):
+    foo: str = Field()
+"""
+    )
+    assert sorted(str(path.relative_to(tmp_path)) for path in tmp_path.rglob("__init__.py")) == [
+        "generated/__init__.py",
+        "generated/v2000_01_01/__init__.py",
+        "generated/v2000_01_01/tests/__init__.py",
+        "generated/v2000_01_01/tests/_resources/__init__.py",
+        "generated/v2000_01_01/tests/_resources/render/__init__.py",
+        "generated/v2001_01_01/__init__.py",
+        "generated/v2001_01_01/tests/__init__.py",
+        "generated/v2001_01_01/tests/_resources/__init__.py",
+        "generated/v2001_01_01/tests/_resources/render/__init__.py",
+    ]
+
+
+def test__codegen__package_with_submodules__renders_package_layout_with_relative_imports(tmp_path: Path):
+    result = CliRunner().invoke(
+        app,
+        [
+            "codegen",
+            "tests._resources.render.package",
+            "tests._resources.render.package.schemas",
+            "--app=tests._resources.render.package.versions:app",
+            f"--output-dir={tmp_path / 'generated'}",
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+
+    package_dir = tmp_path / "generated/v2000_01_01/tests/_resources/render/package"
+    assert code((package_dir / "__init__.py").read_text()) == code(
+        """
+from pydantic import Field
+from pydantic import BaseModel
+
+class Item(BaseModel):
+    name: int = Field()
+"""
+    )
+    assert code((package_dir / "schemas.py").read_text()) == code(
+        """
+from pydantic import Field
+from pydantic import BaseModel
+from . import Item
+
+class ItemList(BaseModel):
+    items: list[Item] = Field()
+"""
+    )
+    assert not (package_dir.parent / "package.py").exists()
+
+
+def test__codegen__pregenerated_models__are_imported_by_generate_versioned_models(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    from tests._resources.render.package import Item
+    from tests._resources.render.package.schemas import ItemList
+    from tests._resources.render.package.versions import create_versions
+
+    result = CliRunner().invoke(
+        app,
+        [
+            "codegen",
+            "tests._resources.render.package",
+            "tests._resources.render.package.schemas",
+            "--app=tests._resources.render.package.versions:app",
+            f"--output-dir={tmp_path / 'pregenerated_models'}",
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    generators = generate_versioned_models(create_versions(pregenerated_models_package="pregenerated_models"))
+    item, item_list = generators["2000-01-01"][Item], generators["2000-01-01"][ItemList]
+
+    assert item.__module__ == "pregenerated_models.v2000_01_01.tests._resources.render.package"
+    assert item_list.__module__ == "pregenerated_models.v2000_01_01.tests._resources.render.package.schemas"
+    assert item.__cadwyn_original_model__ is Item
+    assert item_list.__cadwyn_original_model__ is ItemList
+    assert item_list.model_fields["items"].annotation == list[item]
+    assert generators["2001-01-01"][Item].model_fields["name"].annotation is str
+
+
+def test__codegen__pregenerated_models_are_outdated__models_are_generated_at_runtime(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    from tests._resources.render.package import Item
+    from tests._resources.render.package.versions import create_versions
+
+    result = CliRunner().invoke(
+        app,
+        [
+            "codegen",
+            "tests._resources.render.package",
+            "--app=tests._resources.render.package.versions:app",
+            f"--output-dir={tmp_path / 'outdated_models'}",
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    versions = create_versions(old_name_type=bytes, pregenerated_models_package="outdated_models")
+    item = generate_versioned_models(versions)["2000-01-01"][Item]
+
+    assert item.__module__ == Item.__module__
+    assert item.model_fields["name"].annotation is bytes
+    assert "Pregenerated models are outdated" in caplog.text
+
+
 def test__render_model():
     result = CliRunner().invoke(
         app,
@@ -80,6 +229,66 @@ def test__render_model__with_syntax_highlighting():  # pragma: no cover
     )
 
 
+@pytest.fixture
+def profiled_app_module():
+    module_name = "tests._resources.profiling.app"
+    sys.modules.pop(module_name, None)
+    yield module_name
+    sys.modules.pop(module_name, None)
+
+
+def test__profile_startup__json(profiled_app_module: str):
+    result = CliRunner().invoke(app, ["profile-startup", f"--app={profiled_app_module}:app", "--json"])
+    assert result.exit_code == 0, result.stdout
+
+    profile = json.loads(result.stdout)
+    timings = {(timing["phase"], timing["version"], timing["name"]): timing for timing in profile["timings"]}
+    assert {
+        ("generate_versioned_routers", None, None),
+        ("generate_versioned_models", None, None),
+        ("migrate_classes", "head", None),
+        ("migrate_classes", "2001-01-01", None),
+        ("migrate_classes", "2000-01-01", None),
+        ("create_model", "2001-01-01", "User"),
+        ("create_model", "2000-01-01", "User"),
+        ("migrate_route", "2001-01-01", "POST /users"),
+        ("remake_dependant", "2001-01-01", "POST /users"),
+        ("include_router", "2001-01-01", None),
+        ("include_router", "2000-01-01", None),
+    } <= timings.keys()
+    assert all(timing["calls"] >= 1 and timing["seconds"] >= 0 for timing in timings.values())
+    assert [timing["seconds"] for timing in profile["timings"]] == sorted(
+        (timing["seconds"] for timing in profile["timings"]), reverse=True
+    )
+    assert profile["counters"] == {"models_created": 2, "dependants_created": 2, "routes_created": 2}
+
+
+def test__profile_startup__table(profiled_app_module: str):
+    result = CliRunner().invoke(app, ["profile-startup", f"--app={profiled_app_module}:app", "--limit=3"])
+    assert result.exit_code == 0, result.stdout
+    assert "generate_versioned_routers" in result.stdout
+    assert "models_created: 2" in result.stdout
+
+
+def test__memory_usage__json(profiled_app_module: str):
+    result = CliRunner().invoke(app, ["memory-usage", f"--app={profiled_app_module}:app", "--json"])
+    assert result.exit_code == 0, result.stdout
+
+    report = json.loads(result.stdout)
+    assert [usage["version"] for usage in report] == ["2001-01-01", "2000-01-01"]
+    for usage in report:
+        assert (usage["models_count"], usage["routes_count"], usage["dependants_count"]) == (1, 1, 2)
+        assert usage["model_bytes"].keys() == {"User"}
+        assert usage["total_bytes"] == usage["unique_bytes"] + usage["shared_bytes"] > 0
+
+
+def test__memory_usage__table(profiled_app_module: str):
+    result = CliRunner().invoke(app, ["memory-usage", f"--app={profiled_app_module}:app"])
+    assert result.exit_code == 0, result.stdout
+    assert "Unique" in result.stdout
+    assert "User" in result.stdout
+
+
 @pytest.mark.parametrize("arg", ["-V", "--version"])
 def test__cli_get_version(arg: str) -> None:
     result = CliRunner().invoke(app, [arg])
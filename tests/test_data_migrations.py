@@ -4,7 +4,7 @@ from collections.abc import Callable, Coroutine
 from contextvars import ContextVar
 from datetime import date
 from io import StringIO
-from typing import Any, Literal
+from typing import Any, Literal, cast
 
 import fastapi
 import pytest
@@ -23,12 +23,14 @@ from cadwyn.exceptions import (
     RouteRequestBySchemaConverterDoesNotApplyToAnythingError,
     RouteResponseBySchemaConverterDoesNotApplyToAnythingError,
 )
+from cadwyn.route_generation import generate_versioned_routers
 from cadwyn.schema_generation import migrate_response_body
 from cadwyn.structure import (
     VersionChange,
     convert_request_to_next_version_for,
     convert_response_to_previous_version_for,
 )
+from cadwyn.structure import endpoint as endpoint_instruction
 from cadwyn.structure.data import RequestInfo, ResponseInfo
 from cadwyn.structure.schemas import schema
 from cadwyn.structure.versions import Version, VersionBundle
@@ -894,6 +896,29 @@ def test__uploadfile_can_work(
     }
 
 
+def test__form_with_file__text_fields_and_file_metadata_can_be_migrated_and_file_is_passed_through(
+    create_versioned_clients: CreateVersionedClients,
+    test_path: Literal["/test"],
+    router: VersionedAPIRouter,
+):
+    @router.post(test_path)
+    async def endpoint(title: str = fastapi.Form(), file: UploadFile = File(...)):
+        return {"title": title, "filename": file.filename, "content": (await file.read()).decode()}
+
+    @convert_request_to_next_version_for(test_path, ["POST"])
+    def request_converter(request: RequestInfo):
+        request.body["title"] = request.body["title"].upper()
+        request.body["file"].filename = "renamed"
+
+    clients = create_versioned_clients(version_change(req=request_converter))
+    content = "Hewwo" * 100_000
+    resp_2000 = clients[date(2000, 1, 1)].post(test_path, data={"title": "wow"}, files={"file": content})
+    resp_2001 = clients[date(2001, 1, 1)].post(test_path, data={"title": "wow"}, files={"file": content})
+
+    assert resp_2000.json() == {"title": "WOW", "filename": "renamed", "content": content}
+    assert resp_2001.json() == {"title": "wow", "filename": "upload", "content": content}
+
+
 def test__request_and_response_migrations__for_paths_with_variables__can_match(
     create_versioned_clients: CreateVersionedClients,
     router: VersionedAPIRouter,
@@ -984,6 +1009,36 @@ def test__request_and_response_migrations__for_endpoint_with_http_exception__can
     assert resp_2001.json() == {"detail": "Not Found"}
 
 
+def test__request_and_response_migrations__for_endpoint_with_http_exception__detail_is_migrated_without_changing_it(
+    create_versioned_clients: CreateVersionedClients,
+    router: VersionedAPIRouter,
+):
+    detail = {"code": "not_found", "fields": ["id"]}
+
+    @router.post("/test")
+    async def endpoint():
+        raise HTTPException(status_code=404, detail=detail, headers={"hewwo": "dawkness"})
+
+    @convert_response_to_previous_version_for("/test", ["POST"], migrate_http_errors=True)
+    def response_converter(response: ResponseInfo):
+        response.body["detail"]["code"] = response.body["detail"]["code"].upper()
+        response.body["detail"]["fields"].append("name")
+
+    clients = create_versioned_clients(version_change(resp=response_converter))
+    for _ in range(2):
+        resp_2000 = clients[date(2000, 1, 1)].post("/test")
+        assert resp_2000.status_code == 404
+        assert resp_2000.json() == {"detail": {"code": "NOT_FOUND", "fields": ["id", "name"]}}
+        assert resp_2000.headers["hewwo"] == "dawkness"
+    assert detail == {"code": "not_found", "fields": ["id"]}
+
+    resp_2001 = clients[date(2001, 1, 1)].post("/test")
+    assert resp_2001.status_code == 404
+    assert resp_2001.json() == {"detail": {"code": "not_found", "fields": ["id"]}}
+    assert resp_2001.headers["hewwo"] == "dawkness"
+    assert resp_2001.headers["content-length"] == str(len(resp_2001.content))
+
+
 def test__request_and_response_migrations__for_endpoint_with_no_default_status_code__response_should_contain_default(
     create_versioned_clients: CreateVersionedClients,
     router: VersionedAPIRouter,
@@ -1115,6 +1170,31 @@ def test__response_by_path_migration__for_nonexistent_endpoint_path__should_rais
         create_versioned_clients(version_change(converter=response_converter))
 
 
+def test__request_by_path_migration__for_path_from_older_version__should_only_apply_to_older_versions(
+    router: VersionedAPIRouter,
+):
+    @router.post("/test")
+    async def test():
+        raise NotImplementedError
+
+    def versions_with_converter_for(path: str):
+        @convert_request_to_next_version_for(path, ["POST"])
+        def request_converter(request: RequestInfo):
+            raise NotImplementedError
+
+        return VersionBundle(
+            Version(date(2002, 1, 1), version_change(endpoint_instruction("/test", ["POST"]).had(path="/older"))),
+            Version(date(2001, 1, 1), version_change(converter=request_converter)),
+            Version(date(2000, 1, 1)),
+        )
+
+    routers = generate_versioned_routers(router, versions=versions_with_converter_for("/older"))
+    assert cast(APIRoute, routers[date(2001, 1, 1)].routes[0]).path == "/older"
+
+    with pytest.raises(RouteByPathConverterDoesNotApplyToAnythingError):
+        generate_versioned_routers(router, versions=versions_with_converter_for("/test"))
+
+
 def test__request_by_schema_migration__for_nonexistent_schema__should_raise_error(
     create_versioned_clients: CreateVersionedClients,
     router: VersionedAPIRouter,
@@ -0,0 +1,105 @@
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from cadwyn import Cadwyn, Version, VersionBundle, VersionedAPIRouter
+from cadwyn.structure import (
+    RequestInfo,
+    ResponseInfo,
+    VersionChange,
+    convert_request_to_next_version_for,
+    convert_response_to_previous_version_for,
+)
+
+
+class User(BaseModel):
+    name: str
+
+
+def create_versions() -> VersionBundle:
+    class MyVersionChange(VersionChange):
+        description = "..."
+        instructions_to_migrate_to_previous_version = ()
+
+        @convert_request_to_next_version_for(User)
+        def migrate_request(request: RequestInfo):
+            request.body["name"] = request.body["name"].upper()
+
+        @convert_response_to_previous_version_for(User)
+        def migrate_response(response: ResponseInfo):
+            response.body["name"] += "!"
+
+    return VersionBundle(Version(date(2001, 1, 1), MyVersionChange), Version(date(2000, 1, 1)))
+
+
+def create_app(versions: VersionBundle | None = None, **kwargs) -> Cadwyn:
+    router = VersionedAPIRouter()
+
+    @router.post("/users")
+    async def create_user(user: User) -> User:
+        return user
+
+    app = Cadwyn(versions=versions if versions is not None else create_versions(), **kwargs)
+    app.generate_and_include_versioned_routers(router)
+    return app
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(create_app(metrics_url="/metrics"))
+
+
+def test__metrics__disabled_by_default():
+    app = create_app()
+    assert app.metrics is None
+    assert TestClient(app).get("/metrics").status_code == 404
+
+
+def test__metrics__requests_and_data_converters_are_counted(client: TestClient):
+    assert client.post("/users", json={"name": "a"}, headers={"x-api-version": "2001-01-01"}).json() == {"name": "a"}
+    assert client.post("/users", json={"name": "a"}, headers={"x-api-version": "2000-01-01"}).json() == {"name": "A!"}
+    assert client.post("/users", json={"name": "a"}, headers={"x-api-version": "2000-06-01"}).json() == {"name": "A!"}
+    assert client.post("/users", json={"name": "a"}, headers={"x-api-version": "1999-01-01"}).status_code == 404
+
+    metrics = client.app.metrics  # pyright: ignore[reportAttributeAccessIssue]
+    assert list(metrics.exact_matches) == [1, 1]
+    assert list(metrics.partial_matches) == [0, 1]
+    assert metrics.route_labels == [("POST", "/users")]
+    assert list(metrics.route_requests) == [1, 2]
+    assert [converter.__name__ for converter in metrics.data_converters] == ["migrate_request", "migrate_response"]
+    assert list(metrics.data_converter_calls) == [2, 2]
+    assert all(seconds > 0 for seconds in metrics.data_converter_seconds)
+    assert sum(metrics.data_converter_duration_buckets) == 4
+
+
+def test__metrics__apps_share_version_bundle__only_requests_of_app_with_metrics_are_counted():
+    app_with_metrics = create_app(metrics_url="/metrics")
+    app_without_metrics = create_app(app_with_metrics.versions)
+    headers = {"x-api-version": "2000-01-01"}
+
+    assert TestClient(app_without_metrics).post("/users", json={"name": "a"}, headers=headers).json() == {"name": "A!"}
+    assert app_with_metrics.metrics is not None
+    assert list(app_with_metrics.metrics.data_converter_calls) == [0, 0]
+
+    assert TestClient(app_with_metrics).post("/users", json={"name": "a"}, headers=headers).json() == {"name": "A!"}
+    assert list(app_with_metrics.metrics.data_converter_calls) == [1, 1]
+
+
+def test__metrics__exported_in_prometheus_format(client: TestClient):
+    client.post("/users", json={"name": "a"}, headers={"x-api-version": "2000-06-01"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert "# TYPE cadwyn_version_matches_total counter" in lines
+    assert 'cadwyn_version_matches_total{version="2000-01-01",match="partial"} 1' in lines
+    assert 'cadwyn_version_matches_total{version="2001-01-01",match="exact"} 0' in lines
+    assert 'cadwyn_requests_total{version="2000-01-01",method="POST",route="/users"} 1' in lines
+    assert "# TYPE cadwyn_data_converter_duration_seconds histogram" in lines
+    converter_labels = 'version="2001-01-01",converter="MyVersionChange.migrate_response"'
+    assert f'cadwyn_data_converter_duration_seconds_bucket{{{converter_labels},le="+Inf"}} 1' in lines
+    assert f"cadwyn_data_converter_duration_seconds_count{{{converter_labels}}} 1" in lines
+    assert "/metrics" not in client.get("/openapi.json?version=unversioned").json()["paths"]
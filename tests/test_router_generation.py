@@ -18,7 +18,7 @@ from pydantic import BaseModel
 from pytest_fixture_classes import fixture_class
 from starlette.responses import FileResponse
 
-from cadwyn import VersionBundle, VersionedAPIRouter
+from cadwyn import Cadwyn, VersionBundle, VersionedAPIRouter
 from cadwyn.exceptions import CadwynError, RouterGenerationError, RouterPathParamsModifiedError
 from cadwyn.route_generation import generate_versioned_routers
 from cadwyn.schema_generation import generate_versioned_models
@@ -250,6 +250,62 @@ def test__endpoint_had_another_path_variable(
         )
 
 
+def test__endpoint_had_another_path_and_methods__older_versions_must_use_new_path_and_methods(
+    router: VersionedAPIRouter,
+):
+    @router.get("/test")
+    async def test():
+        raise NotImplementedError
+
+    routers = generate_versioned_routers(
+        router,
+        versions=VersionBundle(
+            Version(date(2002, 1, 1), version_change(endpoint("/test", ["GET"]).had(path="/older", methods={"POST"}))),
+            Version(date(2001, 1, 1), version_change(endpoint("/older", ["POST"]).had(description="Hewwo"))),
+            Version(date(2000, 1, 1)),
+        ),
+    )
+    route = cast(APIRoute, routers[date(2000, 1, 1)].routes[0])
+    assert route.path == "/older"
+    assert route.methods == {"POST"}
+    assert route.description == "Hewwo"
+
+    with pytest.raises(RouterGenerationError, match=re.escape("Endpoint \"['GET'] /test\" you tried to change")):
+        generate_versioned_routers(
+            router,
+            versions=VersionBundle(
+                Version(date(2002, 1, 1), version_change(endpoint("/test", ["GET"]).had(path="/older"))),
+                Version(date(2001, 1, 1), version_change(endpoint("/test", ["GET"]).had(description="Hewwo"))),
+                Version(date(2000, 1, 1)),
+            ),
+        )
+
+
+def test__endpoint_had__path_changed_after_another_change_in_the_same_version__route_is_found_by_new_path(
+    router: VersionedAPIRouter,
+):
+    @router.get("/a")
+    async def test():
+        raise NotImplementedError
+
+    routers = generate_versioned_routers(
+        router,
+        versions=VersionBundle(
+            Version(
+                date(2002, 1, 1),
+                version_change(endpoint("/a", ["GET"]).had(description="Hewwo")),
+                version_change(endpoint("/a", ["GET"]).had(path="/b")),
+            ),
+            Version(date(2001, 1, 1), version_change(endpoint("/b", ["GET"]).had(summary="Dawkness"))),
+            Version(date(2000, 1, 1)),
+        ),
+    )
+    route = cast(APIRoute, routers[date(2000, 1, 1)].routes[0])
+    assert route.path == "/b"
+    assert route.description == "Hewwo"
+    assert route.summary == "Dawkness"
+
+
 def test__endpoint_had_dependencies(
     test_endpoint: Endpoint,
     test_path: str,
@@ -959,6 +1015,71 @@ def test__router_generation_updating_unused_dependencies__with_migration(
     ]
 
 
+def test__router_generation__body_less_route_without_request_migrations__dependencies_are_solved_once(
+    router: VersionedAPIRouter,
+    create_versioned_app: CreateVersionedApp,
+):
+    saved_enum_names = []
+    saved_queries = []
+
+    async def dependency(my_enum: StrEnum):
+        saved_enum_names.append(my_enum.name)
+
+    async def other_dependency(query: int):
+        saved_queries.append(query)
+
+    @router.get("/test", dependencies=[Depends(dependency)])
+    async def test_with_changed_dep():
+        pass
+
+    @router.get("/other", dependencies=[Depends(other_dependency)])
+    async def test_with_unchanged_dep():
+        pass
+
+    app = create_versioned_app(version_change(enum(StrEnum).didnt_have("a"), enum(StrEnum).had(b="1")))
+
+    client_2000 = TestClient(app, headers={app.router.api_version_header_name: "2000-01-01"})
+    client_2001 = TestClient(app, headers={app.router.api_version_header_name: "2001-01-01"})
+
+    assert client_2000.get("/test", params={"my_enum": "1"}).status_code == 200
+    assert client_2001.get("/test", params={"my_enum": "1"}).status_code == 200
+    assert client_2000.get("/other", params={"query": 1}).status_code == 200
+    assert client_2001.get("/other", params={"query": 2}).status_code == 200
+
+    # Versioned enums are copies of the head enum so the params have to be validated against the head enum again
+    assert saved_enum_names == ["b", "a", "a", "a"]
+    assert saved_queries == [1, 2]
+
+
+def test__router_generation__body_less_route_with_changed_dependencies__head_dependencies_are_still_called(
+    router: VersionedAPIRouter,
+    create_versioned_app: CreateVersionedApp,
+):
+    called_dependencies = []
+
+    async def old_auth():
+        called_dependencies.append("old_auth")
+
+    async def new_auth():
+        called_dependencies.append("new_auth")
+
+    @router.get("/test", dependencies=[Depends(new_auth)])
+    async def test():
+        pass
+
+    app = create_versioned_app(version_change(endpoint("/test", ["GET"]).had(dependencies=[Depends(old_auth)])))
+
+    client_2000 = TestClient(app, headers={app.router.api_version_header_name: "2000-01-01"})
+    client_2001 = TestClient(app, headers={app.router.api_version_header_name: "2001-01-01"})
+
+    assert client_2000.get("/test").status_code == 200
+    assert called_dependencies == ["old_auth", "new_auth"]
+
+    called_dependencies.clear()
+    assert client_2001.get("/test").status_code == 200
+    assert called_dependencies == ["new_auth"]
+
+
 def test__router_generation__updating_callbacks(
     router: VersionedAPIRouter,
     create_versioned_app: CreateVersionedApp,
@@ -1207,6 +1328,95 @@ def test__basic_router_generation__subclass_of_security_class_based_dependency_w
     ]
 
 
+def test__router_generation__lazy_model_generation__only_models_used_by_routes_are_generated(
+    router: VersionedAPIRouter,
+):
+    class UnusedSchema(BaseModel):
+        foo: int
+
+    @router.post("/test")
+    async def test(body: SchemaWithOnePydanticField) -> SchemaWithOnePydanticField:
+        return body
+
+    versions = VersionBundle(
+        Version(
+            date(2001, 1, 1),
+            version_change(
+                schema(SchemaWithOneIntField).field("foo").had(type=str),
+                schema(UnusedSchema).field("foo").had(type=str),
+            ),
+        ),
+        Version(date(2000, 1, 1)),
+    )
+    app = Cadwyn(versions=versions, lazy_model_generation=True)
+    app.generate_and_include_versioned_routers(router)
+
+    generator = generate_versioned_models(versions, lazy=True)["2000-01-01"]
+    assert UnusedSchema not in generator.concrete_models
+    assert generator.concrete_models.keys() == {SchemaWithOneIntField, SchemaWithOnePydanticField}
+
+    with TestClient(app, headers={app.router.api_version_header_name: "2001-01-01"}) as client:
+        response = client.post("/test", json={"foo": {"foo": "hewwo"}})
+    assert response.status_code == 422
+
+
+def test__router_generation__unchanged_routes_are_shared_between_versions(router: VersionedAPIRouter):
+    @router.post("/changed")
+    async def changed(body: SchemaWithOneIntField) -> SchemaWithOneIntField:
+        return body
+
+    @router.post("/unchanged")
+    async def unchanged(body: EmptySchema) -> EmptySchema:
+        return body
+
+    @router.get("/described")
+    async def described():
+        raise NotImplementedError
+
+    versions = VersionBundle(
+        Version(date(2002, 1, 1), version_change(endpoint("/described", ["GET"]).had(description="Hewwo"))),
+        Version(date(2001, 1, 1), version_change(schema(SchemaWithOneIntField).field("foo").had(type=str))),
+        Version(date(2000, 1, 1)),
+    )
+    routers = generate_versioned_routers(router, versions=versions)
+    routes = {
+        version: {cast(APIRoute, route).path: route for route in versioned_router.routes}
+        for version, versioned_router in routers.items()
+    }
+
+    assert routes[date(2002, 1, 1)]["/unchanged"] not in router.routes
+    assert routes[date(2002, 1, 1)]["/unchanged"] is routes[date(2001, 1, 1)]["/unchanged"]
+    assert routes[date(2001, 1, 1)]["/unchanged"] is routes[date(2000, 1, 1)]["/unchanged"]
+
+    assert routes[date(2002, 1, 1)]["/changed"] is routes[date(2001, 1, 1)]["/changed"]
+    assert routes[date(2001, 1, 1)]["/changed"] is not routes[date(2000, 1, 1)]["/changed"]
+
+    assert routes[date(2002, 1, 1)]["/described"] is not routes[date(2001, 1, 1)]["/described"]
+    assert routes[date(2002, 1, 1)]["/described"].description == ""
+    assert routes[date(2001, 1, 1)]["/described"].description == "Hewwo"
+    assert routes[date(2001, 1, 1)]["/described"] is routes[date(2000, 1, 1)]["/described"]
+
+
+def test__router_generation__route_with_unchanged_annotations__dependant_is_reused(router: VersionedAPIRouter):
+    @router.post("/test")
+    async def test(body: EmptySchema, query_param: int) -> EmptySchema:
+        return body
+
+    versions = VersionBundle(
+        Version(date(2001, 1, 1), version_change(endpoint("/test", ["POST"]).had(description="Hewwo"))),
+        Version(date(2000, 1, 1)),
+    )
+    routers = generate_versioned_routers(router, versions=versions)
+    newer_route = cast(APIRoute, routers[date(2001, 1, 1)].routes[0])
+    older_route = cast(APIRoute, routers[date(2000, 1, 1)].routes[0])
+
+    assert older_route is not newer_route
+    assert older_route.description == "Hewwo"
+    assert older_route.dependant is not newer_route.dependant
+    assert older_route.dependant.query_params is newer_route.dependant.query_params
+    assert older_route.body_field is newer_route.body_field
+
+
 ######################
 # External lib testing
 ######################
@@ -1,12 +1,16 @@
+import asyncio
 from datetime import date
+from typing import Any
 
 import pytest
+from fastapi import APIRouter
 from starlette.requests import Request
 from starlette.responses import PlainTextResponse
 from starlette.routing import Match, NoMatchFound
 from starlette.testclient import TestClient
 
 from cadwyn import Cadwyn
+from cadwyn.middleware import CachedAPIVersionResolver
 from cadwyn.structure.versions import Version, VersionBundle
 from tests._resources.app_for_testing_routing import mixed_hosts_app
 
@@ -145,3 +149,250 @@ def test__host_routing__partial_match__404():
 
     response = client.get("/v1/doggies/tom")
     assert response.status_code == 200
+
+
+def _create_request(api_key: str | None) -> Request:
+    headers = [] if api_key is None else [(b"authorization", api_key.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def _get_api_key(request: Request) -> str | None:
+    return request.headers.get("authorization")
+
+
+def test__api_version_resolver__request_without_header__routed_to_pinned_version():
+    pinned_versions = {"old-client": date(2022, 1, 1), "new-client": date(2022, 6, 1)}
+
+    async def resolve_version(api_key: str) -> date | None:
+        return pinned_versions.get(api_key)
+
+    app = Cadwyn(
+        versions=VersionBundle(Version(date(2022, 2, 1)), Version(date(2022, 1, 1))),
+        api_version_resolver=CachedAPIVersionResolver(_get_api_key, resolve_version),
+    )
+
+    @app.get("/unversioned")
+    async def unversioned():
+        return "unversioned"
+
+    old_router = APIRouter()
+    old_router.add_api_route("/version", lambda: "2022-01-01")
+    new_router = APIRouter()
+    new_router.add_api_route("/version", lambda: "2022-02-01")
+    app.add_header_versioned_routers(old_router, header_value="2022-01-01")
+    app.add_header_versioned_routers(new_router, header_value="2022-02-01")
+
+    with TestClient(app) as client:
+        response = client.get("/version", headers={"authorization": "old-client"})
+        assert response.json() == "2022-01-01"
+        assert response.headers["x-api-version"] == "2022-01-01"
+        assert client.get("/version", headers={"authorization": "new-client"}).json() == "2022-02-01"
+        response = client.get("/version", headers={"authorization": "old-client", "x-api-version": "2022-02-01"})
+        assert response.json() == "2022-02-01"
+        assert client.get("/version", headers={"authorization": "unknown-client"}).status_code == 404
+        assert client.get("/unversioned").json() == "unversioned"
+
+
+def test__cached_api_version_resolver__concurrent_requests__single_lookup():
+    lookups: list[str] = []
+
+    async def resolve_version(api_key: str) -> date | None:
+        lookups.append(api_key)
+        await asyncio.sleep(0.01)
+        return date(2022, 1, 1)
+
+    resolver = CachedAPIVersionResolver(_get_api_key, resolve_version)
+
+    async def main():
+        return await asyncio.gather(*(resolver(_create_request(key)) for key in ["a", "a", "b", "a", None]))
+
+    assert asyncio.run(main()) == [date(2022, 1, 1)] * 4 + [None]
+    assert lookups == ["a", "b"]
+
+    asyncio.run(resolver(_create_request("a")))
+    assert lookups == ["a", "b"]
+    resolver.invalidate("a")
+    asyncio.run(resolver(_create_request("a")))
+    assert lookups == ["a", "b", "a"]
+
+
+@pytest.mark.parametrize("invalidated_key", ["a", None])
+def test__cached_api_version_resolver__invalidated_during_lookup__outdated_version_is_not_cached(
+    invalidated_key: str | None,
+):
+    pinned_versions = {"a": date(2022, 1, 1)}
+    lookups: list[str] = []
+
+    async def resolve_version(api_key: str) -> date | None:
+        lookups.append(api_key)
+        version = pinned_versions[api_key]
+        await asyncio.sleep(0.01)
+        return version
+
+    resolver = CachedAPIVersionResolver(_get_api_key, resolve_version)
+
+    async def main():
+        outdated_lookup = asyncio.ensure_future(resolver(_create_request("a")))
+        while not lookups:
+            await asyncio.sleep(0)
+        pinned_versions["a"] = date(2022, 6, 1)
+        resolver.invalidate(invalidated_key)
+        return await asyncio.gather(outdated_lookup, resolver(_create_request("a")))
+
+    assert asyncio.run(main()) == [date(2022, 1, 1), date(2022, 6, 1)]
+    assert asyncio.run(resolver(_create_request("a"))) == date(2022, 6, 1)
+    assert lookups == ["a", "a"]
+
+
+def test__cached_api_version_resolver__expired_and_evicted_keys__looked_up_again():
+    lookups: list[str] = []
+
+    async def resolve_version(api_key: str) -> date | None:
+        lookups.append(api_key)
+        if api_key == "broken":
+            raise ValueError("Lookup failed")
+        return None
+
+    resolver = CachedAPIVersionResolver(_get_api_key, resolve_version, ttl=0, maxsize=1)
+    asyncio.run(resolver(_create_request("a")))
+    asyncio.run(resolver(_create_request("a")))
+    assert lookups == ["a", "a"]
+
+    resolver.ttl = 60
+    asyncio.run(resolver(_create_request("b")))
+    asyncio.run(resolver(_create_request("a")))
+    asyncio.run(resolver(_create_request("b")))
+    assert lookups == ["a", "a", "b", "a", "b"]
+
+    with pytest.raises(ValueError, match="Lookup failed"):
+        asyncio.run(resolver(_create_request("broken")))
+    with pytest.raises(ValueError, match="Lookup failed"):
+        asyncio.run(resolver(_create_request("broken")))
+    assert lookups == ["a", "a", "b", "a", "b", "broken", "broken"]
+
+
+def _create_app_with_two_versions(**kwargs: Any) -> Cadwyn:
+    app = Cadwyn(versions=VersionBundle(Version(date(2022, 2, 1)), Version(date(2022, 1, 1))), **kwargs)
+
+    @app.get("/unversioned")
+    async def unversioned():
+        return "unversioned"
+
+    old_router = APIRouter()
+    old_router.add_api_route("/version", lambda: "2022-01-01")
+    new_router = APIRouter()
+    new_router.add_api_route("/version", lambda: "2022-02-01")
+
+    def get_url(request: Request) -> str:
+        return str(request.url_for("get_url"))
+
+    def get_header(request: Request) -> str:
+        return request.headers["x-api-version"]
+
+    new_router.add_api_route("/url", get_url)
+    new_router.add_api_route("/header", get_header)
+    app.add_header_versioned_routers(old_router, header_value="2022-01-01")
+    app.add_header_versioned_routers(new_router, header_value="2022-02-01")
+    return app
+
+
+def test__path_versioning():
+    with TestClient(_create_app_with_two_versions(api_version_location="path")) as client:
+        response = client.get("/2022-01-01/version")
+        assert response.json() == "2022-01-01"
+        assert response.headers["x-api-version"] == "2022-01-01"
+        assert client.get("/2022-01-15/version").json() == "2022-01-01"
+        assert client.get("/2022-02-01/version").json() == "2022-02-01"
+        assert client.get("/2022-02-01/url").json() == "http://testserver/2022-02-01/url"
+        assert client.get("/2021-01-01/version").status_code == 404
+        assert client.get("/version").status_code == 404
+        assert client.get("/unversioned").json() == "unversioned"
+        # The header is ignored when the version is in the path
+        assert client.get("/version", headers={"x-api-version": "2022-01-01"}).status_code == 404
+
+        response = client.get("/2022-13-01/version")
+        assert response.status_code == 422
+        assert response.json()[0]["loc"] == ["path", "api_version"]
+
+        openapi = client.get("/2022-01-01/openapi.json").json()
+        assert openapi["servers"] == [{"url": "/2022-01-01"}]
+        assert list(openapi["paths"]) == ["/version"]
+        assert openapi["paths"]["/version"]["get"].get("parameters") is None
+        assert client.get("/openapi.json?version=2022-01-01").json()["servers"] == [{"url": "/2022-01-01"}]
+
+
+def test__query_versioning():
+    app = _create_app_with_two_versions(api_version_location="query", api_version_parameter_name="v")
+    with TestClient(app) as client:
+        response = client.get("/version?v=2022-01-01")
+        assert response.json() == "2022-01-01"
+        assert response.headers["x-api-version"] == "2022-01-01"
+        assert client.get("/version?v=2022-01-15").json() == "2022-01-01"
+        assert client.get("/version?v=2022-02-01").json() == "2022-02-01"
+        assert client.get("/version").status_code == 404
+        assert client.get("/version", headers={"x-api-version": "2022-01-01"}).status_code == 404
+        assert client.get("/unversioned").json() == "unversioned"
+
+        response = client.get("/version?v=invalid")
+        assert response.status_code == 422
+        assert response.json()[0]["loc"] == ["query", "v"]
+
+        openapi = client.get("/openapi.json?v=2022-01-01").json()
+        assert "servers" not in openapi
+        assert openapi["paths"]["/version"]["get"]["parameters"][0]["in"] == "query"
+        assert openapi["paths"]["/version"]["get"]["parameters"][0]["name"] == "v"
+
+
+def test__vary_header_and_normalized_version_header():
+    app = _create_app_with_two_versions(vary_on_api_version_header=True, normalize_api_version_header=True)
+
+    with TestClient(app) as client:
+        response = client.get("/version", headers={"x-api-version": "2022-01-15"})
+        assert response.json() == "2022-01-01"
+        assert response.headers["x-api-version"] == "2022-01-01"
+        assert response.headers["vary"] == "x-api-version"
+        # The endpoint sees the same header as any cache that runs after the middleware
+        assert client.get("/header", headers={"x-api-version": "2022-03-01"}).json() == "2022-02-01"
+
+        response = client.get("/version", headers={"x-api-version": "2021-01-01"})
+        assert response.status_code == 404
+        assert response.headers["x-api-version"] == "2021-01-01"
+
+        response = client.get("/unversioned")
+        assert response.headers["vary"] == "x-api-version"
+        assert "x-api-version" not in response.headers
+
+
+def test__vary_header__resolved_version__varies_on_headers_of_resolver():
+    async def resolve_version(api_key: str) -> date | None:
+        return date(2022, 1, 1)
+
+    app = _create_app_with_two_versions(
+        vary_on_api_version_header=True,
+        api_version_resolver=CachedAPIVersionResolver(_get_api_key, resolve_version, vary_headers=["authorization"]),
+    )
+
+    with TestClient(app) as client:
+        response = client.get("/version", headers={"authorization": "client"})
+        assert response.json() == "2022-01-01"
+        assert response.headers["vary"] == "x-api-version, authorization"
+        response = client.get("/version", headers={"authorization": "client", "x-api-version": "2022-02-01"})
+        assert response.headers["vary"] == "x-api-version"
+
+
+def test__vary_header__resolver_without_vary_headers__varies_on_everything():
+    async def resolve_version(request: Request) -> date | None:
+        return date(2022, 1, 1)
+
+    app = _create_app_with_two_versions(vary_on_api_version_header=True, api_version_resolver=resolve_version)
+
+    with TestClient(app) as client:
+        assert client.get("/version").headers["vary"] == "x-api-version, *"
+
+
+def test__version_header_is_not_normalized_by_default():
+    with TestClient(_create_app_with_two_versions()) as client:
+        response = client.get("/header", headers={"x-api-version": "2022-03-01"})
+        assert response.json() == "2022-03-01"
+        assert response.headers["x-api-version"] == "2022-03-01"
+        assert "vary" not in response.headers
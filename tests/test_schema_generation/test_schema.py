@@ -1,8 +1,10 @@
 import re
+from datetime import date
 
 import pytest
 from pydantic import BaseModel
 
+from cadwyn import Version, VersionBundle, generate_versioned_models
 from cadwyn.exceptions import InvalidGenerationInstructionError
 from cadwyn.structure.schemas import schema
 from tests.conftest import CreateRuntimeSchemas, assert_models_are_equal, version_change
@@ -29,3 +31,54 @@ def test__schema_had_name__with_the_same_name__should_raise_error(create_runtime
         ),
     ):
         create_runtime_schemas(version_change(schema(MySchema).had(name="MySchema")))
+
+
+class MyOtherSchema(BaseModel):
+    bar: MySchema
+
+
+def test__generate_versioned_models__lazy__models_are_only_generated_on_access():
+    versions = VersionBundle(
+        Version(date(2001, 1, 1), version_change(schema(MyOtherSchema).field("bar").had(description="Hewwo"))),
+        Version(date(2000, 1, 1)),
+    )
+    generators = generate_versioned_models(versions, lazy=True)
+    generator = generators["2000-01-01"]
+
+    assert generator.generated_models_count == 0
+    assert generator.versioned_models_count == 1
+
+    other_schema = generator[MyOtherSchema]
+    assert other_schema.model_fields["bar"].description == "Hewwo"
+    assert generator.concrete_models.keys() == {MyOtherSchema, MySchema}
+
+    eager_generators = generate_versioned_models(versions)
+    assert eager_generators is generators
+    assert eager_generators["2000-01-01"][MyOtherSchema] is other_schema
+    assert eager_generators["2001-01-01"].concrete_models.keys() == {MyOtherSchema, MySchema}
+
+
+def test__generate_versioned_models__unchanged_wrappers_are_shared_between_versions():
+    versions = VersionBundle(
+        Version(date(2002, 1, 1), version_change(schema(MySchema).field("foo").had(description="Hewwo"))),
+        Version(date(2001, 1, 1), version_change(schema(MyOtherSchema).field("bar").had(description="Hewwo"))),
+        Version(date(2000, 1, 1)),
+    )
+    generators = generate_versioned_models(versions, lazy=True)
+    bundle_2002 = generators["2002-01-01"].model_bundle
+    bundle_2001 = generators["2001-01-01"].model_bundle
+    bundle_2000 = generators["2000-01-01"].model_bundle
+
+    assert bundle_2002.schemas[MyOtherSchema] is bundle_2001.schemas[MyOtherSchema]
+    assert bundle_2002.schemas[MySchema] is not bundle_2001.schemas[MySchema]
+    assert bundle_2001.schemas[MySchema] is bundle_2000.schemas[MySchema]
+    assert bundle_2001.schemas[MyOtherSchema] is not bundle_2000.schemas[MyOtherSchema]
+
+    assert generators["2002-01-01"][MySchema].model_fields["foo"].description is None
+    assert generators["2001-01-01"][MySchema].model_fields["foo"].description == "Hewwo"
+    assert generators["2001-01-01"][MyOtherSchema].model_fields["bar"].description is None
+    assert generators["2000-01-01"][MyOtherSchema].model_fields["bar"].description == "Hewwo"
+
+    # Unchanged classes are shared unless they reference a model that has changed
+    assert generators["2001-01-01"][MySchema] is generators["2000-01-01"][MySchema]
+    assert generators["2002-01-01"][MyOtherSchema] is not generators["2001-01-01"][MyOtherSchema]
@@ -170,6 +170,19 @@ def test__schema_field_didnt_exist__with_inheritance_and_child_not_versioned__ch
     assert schemas["2000-01-01"][ChildSchema](baz=83)  # pyright: ignore[reportCallIssue]
 
 
+def test__schema_field_had__inherited_field__parent_must_not_change(create_runtime_schemas: CreateRuntimeSchemas):
+    schemas = create_runtime_schemas(
+        version_change(schema(ChildSchema).field("baz").had(description="Hewwo")),
+        version_change(schema(ParentSchema).field("foo").had(type=bytes)),
+    )
+
+    assert schemas["2000-01-01"][ChildSchema].model_fields["baz"].description == "Hewwo"
+    assert schemas["2000-01-01"][ParentSchema].model_fields["baz"].description is None
+    assert schemas["2000-01-01"][ParentSchema].model_fields["foo"].annotation is bytes
+    assert schemas["2001-01-01"][ParentSchema].model_fields["foo"].annotation is bytes
+    assert schemas["2002-01-01"][ParentSchema].model_fields["foo"].annotation is str
+
+
 #######
 # HAD #
 #######
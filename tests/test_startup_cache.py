@@ -0,0 +1,100 @@
+import importlib
+import json
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from cadwyn import VersionBundle
+from cadwyn._startup_cache import get_fingerprint, load_startup_plan
+from cadwyn.route_generation import _EndpointTransformer, generate_versioned_routers
+from cadwyn.structure import Version, schema
+from cadwyn.structure.versions import HeadVersion
+from cadwyn.synthetic import generate_synthetic_api
+from tests.conftest import version_change
+
+
+class SchemaWithOneStrField(BaseModel):
+    foo: str
+
+
+def create_router(response_model: type[BaseModel]) -> APIRouter:
+    router = APIRouter()
+
+    @router.post("/test", response_model=response_model)
+    async def endpoint(body: response_model):  # pyright: ignore[reportInvalidTypeForm]
+        return body
+
+    return router
+
+
+def create_versions(model: type[BaseModel], old_field_type: Any) -> VersionBundle:
+    return VersionBundle(
+        HeadVersion(),
+        Version(date(2001, 1, 1), version_change(schema(model).field("foo").had(type=old_field_type))),
+        Version(date(2000, 1, 1)),
+    )
+
+
+def test__startup_cache__second_startup__uses_stored_plan_and_generates_the_same_app(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    api_kwargs = {"versions_count": 4, "routes_count": 6, "models_count": 3, "model_depth": 2}
+    app = generate_synthetic_api(**api_kwargs).create_app(startup_cache_dir=tmp_path)
+    assert (tmp_path / "cadwyn_startup_plan.json").exists()
+
+    def fail(*args: Any, **kwargs: Any):
+        raise AssertionError("The stored plan must have been used")
+
+    monkeypatch.setattr(_EndpointTransformer, "_get_indexes_of_routes_to_migrate", fail)
+    monkeypatch.setattr(_EndpointTransformer, "_validate_all_data_converters_are_applied", fail)
+    cached_app = generate_synthetic_api(**api_kwargs).create_app(startup_cache_dir=tmp_path)
+
+    for version in app.versions.version_dates:
+        params = {"version": version.isoformat()}
+        assert (
+            TestClient(cached_app).get("/openapi.json", params=params).json()
+            == TestClient(app).get("/openapi.json", params=params).json()
+        )
+
+
+def test__startup_cache__instruction_changes__plan_is_invalidated(tmp_path: Path):
+    router = create_router(SchemaWithOneStrField)
+    generate_versioned_routers(router, create_versions(SchemaWithOneStrField, int), startup_cache_dir=tmp_path)
+
+    assert load_startup_plan(tmp_path, router, create_versions(SchemaWithOneStrField, int)).is_restored
+    assert not load_startup_plan(tmp_path, router, create_versions(SchemaWithOneStrField, bytes)).is_restored
+
+
+def test__startup_cache__model_source_changes__plan_is_invalidated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    module_path = tmp_path / "startup_cache_models.py"
+    module_path.write_text("from pydantic import BaseModel\n\n\nclass Model(BaseModel):\n    foo: str\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "startup_cache_models", raising=False)
+    model = importlib.import_module("startup_cache_models").Model
+    router = create_router(model)
+    cache_dir = tmp_path / "cache"
+    generate_versioned_routers(router, create_versions(model, int), startup_cache_dir=cache_dir)
+    fingerprint = get_fingerprint(router, create_versions(model, int))
+    assert load_startup_plan(cache_dir, router, create_versions(model, int)).is_restored
+
+    module_path.write_text(module_path.read_text() + "    bar: int = 0\n")
+
+    assert get_fingerprint(router, create_versions(model, int)) != fingerprint
+    assert not load_startup_plan(cache_dir, router, create_versions(model, int)).is_restored
+
+
+def test__startup_cache__plan_is_corrupted__plan_is_regenerated(tmp_path: Path):
+    router = create_router(SchemaWithOneStrField)
+    plan_path = tmp_path / "cadwyn_startup_plan.json"
+    plan_path.write_text("{not json")
+
+    generate_versioned_routers(router, create_versions(SchemaWithOneStrField, int), startup_cache_dir=tmp_path)
+
+    assert json.loads(plan_path.read_text())["migrated_routes"] == {"2001-01-01": [0], "2000-01-01": [0]}
+    assert load_startup_plan(tmp_path, router, create_versions(SchemaWithOneStrField, int)).is_restored
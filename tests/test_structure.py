@@ -211,6 +211,26 @@ class TestVersionChangeWithSideEffects:
         assert DummySubClass2000_001.is_applied is False
         assert DummySubClass2000_002.is_applied is False
 
+    def test__get_applied_side_effects__partial_version__side_effects_of_closest_older_version(
+        self,
+        versions: VersionBundle,
+        api_version_var: ContextVar[date | None],
+    ):
+        api_version_var.set(date(2001, 6, 1))
+        assert versions.get_applied_side_effects() == {DummySubClass2001, DummySubClass2000_001, DummySubClass2000_002}
+        assert versions.get_applied_side_effects() is versions.get_applied_side_effects()
+
+        api_version_var.set(None)
+        assert versions.get_applied_side_effects() == {
+            DummySubClass2002,
+            DummySubClass2001,
+            DummySubClass2000_001,
+            DummySubClass2000_002,
+        }
+
+        api_version_var.set(date(1999, 3, 1))
+        assert versions.get_applied_side_effects() == frozenset()
+
     def test__is_applied__api_version_var_set_and_version_change_class_not_in_versions__should_raise_error(
         self,
         dummy_sub_class_without_version: type[VersionChangeWithSideEffects],
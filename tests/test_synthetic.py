@@ -0,0 +1,67 @@
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from cadwyn.synthetic import generate_synthetic_api, get_example_payload
+
+
+def test__generate_synthetic_api__all_routes_of_all_versions_respond():
+    api = generate_synthetic_api(versions_count=6, routes_count=8, models_count=4, model_depth=2)
+    app = api.create_app()
+    client = TestClient(app)
+
+    routes_counts = []
+    for version in app.versions:
+        routes = [
+            route
+            for route in app.router.versioned_routers[version.value].routes
+            if isinstance(route, APIRoute) and route.path.startswith("/resources")
+        ]
+        routes_counts.append(len(routes))
+        headers = {"x-api-version": version.value.isoformat()}
+        for route in routes:
+            if route.methods == {"POST"}:
+                model_index = int(route.path.removeprefix("/resources")) % len(api.models)
+                response = client.post(route.path, json=get_example_payload(api.models[model_index]), headers=headers)
+            else:
+                response = client.get(route.path.replace("{item_id}", "1"), headers=headers)
+            assert response.status_code == 200, response.json()
+
+    assert routes_counts == sorted(routes_counts, reverse=True)
+    assert routes_counts[0] == 8
+    assert routes_counts[-1] < routes_counts[0]
+    assert "child" in api.models[0].model_fields
+    assert "child" not in api.models[1].model_fields
+
+
+def test__generate_synthetic_api__fields_added_in_newer_versions__are_migrated_by_converters():
+    api = generate_synthetic_api(versions_count=3, routes_count=1, models_count=1, enums_count=0)
+    app = api.create_app()
+    client = TestClient(app)
+    added_fields = {name for name in api.models[0].model_fields if name.startswith("added_in_change_")}
+    assert added_fields == {"added_in_change_0_1", "added_in_change_1_1"}
+
+    payload = get_example_payload(api.models[0])
+    assert client.post("/resources0", json=payload, headers={"x-api-version": "2000-01-03"}).json() == payload
+    oldest_payload = {name: value for name, value in payload.items() if name not in added_fields}
+    response = client.post("/resources0", json=oldest_payload, headers={"x-api-version": "2000-01-01"})
+    assert response.json() == oldest_payload
+
+
+def test__generate_synthetic_api__same_arguments__same_api():
+    def get_openapi(seed: int):
+        return TestClient(generate_synthetic_api(seed=seed).create_app()).get("/openapi.json?version=2000-01-01").json()
+
+    assert get_openapi(seed=1) == get_openapi(seed=1)
+    assert get_openapi(seed=1) != get_openapi(seed=2)
+
+
+def test__generate_synthetic_api__routes_without_models__should_raise_error():
+    with pytest.raises(ValueError, match="models_count must be at least 1 when there are routes, got 0"):
+        generate_synthetic_api(models_count=0, routes_count=5)
+    with pytest.raises(ValueError, match="enums_count must not be negative, got -1"):
+        generate_synthetic_api(enums_count=-1)
+
+    api = generate_synthetic_api(models_count=0, routes_count=0)
+    assert api.models == []
+    assert len(api.create_app().versions.versions) == 10
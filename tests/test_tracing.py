@@ -0,0 +1,106 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from cadwyn import Cadwyn, Version, VersionBundle, VersionedAPIRouter
+from cadwyn.structure import RequestInfo, VersionChange, convert_request_to_next_version_for
+from cadwyn.tracing import OpenTelemetryTracer, Tracer, get_tracer, set_tracer
+
+
+class RecordingTracer(Tracer):
+    def __init__(self) -> None:
+        self.spans: list[tuple[str, date | None, str | None]] = []
+
+    def span(self, name: str, *, version: date | None = None, route: str | None = None):
+        self.spans.append((name, version, route))
+        return super().span(name, version=version, route=route)
+
+
+class FakeOpenTelemetryTracer:
+    def __init__(self) -> None:
+        self.spans: list[tuple[str, dict[str, Any]]] = []
+
+    @contextmanager
+    def start_as_current_span(self, name: str, attributes: dict[str, Any]) -> Iterator[None]:
+        self.spans.append((name, attributes))
+        yield
+
+
+@pytest.fixture
+def tracer() -> Iterator[RecordingTracer]:
+    tracer = RecordingTracer()
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(None)
+
+
+@pytest.fixture
+def client() -> TestClient:
+    class User(BaseModel):
+        name: str
+
+    class MyVersionChange(VersionChange):
+        description = "..."
+        instructions_to_migrate_to_previous_version = ()
+
+        @convert_request_to_next_version_for(User)
+        def migrate(request: RequestInfo):
+            request.body["name"] = request.body["name"].upper()
+
+    router = VersionedAPIRouter()
+
+    @router.post("/users")
+    async def create_user(user: User) -> User:
+        return user
+
+    app = Cadwyn(versions=VersionBundle(Version(date(2001, 1, 1), MyVersionChange), Version(date(2000, 1, 1))))
+    app.generate_and_include_versioned_routers(router)
+    return TestClient(app)
+
+
+def test__tracing__disabled_by_default(client: TestClient):
+    assert get_tracer() is None
+    response = client.post("/users", json={"name": "john"}, headers={"x-api-version": "2000-01-01"})
+    assert response.json() == {"name": "JOHN"}
+
+
+def test__tracing__old_version__all_stages_are_traced(client: TestClient, tracer: RecordingTracer):
+    response = client.post("/users", json={"name": "john"}, headers={"x-api-version": "2000-06-01"})
+    assert response.json() == {"name": "JOHN"}
+
+    old_version = date(2000, 6, 1)
+    assert tracer.spans == [
+        ("cadwyn.validate_version_header", None, None),
+        ("cadwyn.resolve_version", old_version, None),
+        ("cadwyn.read_request_body", old_version, "/users"),
+        ("cadwyn.migrate_request", old_version, "/users"),
+        ("cadwyn.solve_dependencies", old_version, "/users"),
+        ("cadwyn.endpoint", old_version, "/users"),
+        ("cadwyn.read_response_body", old_version, "/users"),
+        ("cadwyn.migrate_response", old_version, "/users"),
+    ]
+
+
+def test__tracing__unversioned_request__only_version_resolution_is_traced(client: TestClient, tracer: RecordingTracer):
+    assert client.get("/openapi.json?version=2000-01-01").status_code == 200
+    assert tracer.spans == [("cadwyn.resolve_version", None, None)]
+
+
+def test__open_telemetry_tracer__reports_attributes(client: TestClient):
+    otel_tracer = FakeOpenTelemetryTracer()
+    set_tracer(OpenTelemetryTracer(otel_tracer))
+    try:
+        client.post("/users", json={"name": "john"}, headers={"x-api-version": "2000-01-01"})
+    finally:
+        set_tracer(None)
+
+    spans = dict(otel_tracer.spans)
+    assert spans["cadwyn.validate_version_header"] == {}
+    assert spans["cadwyn.resolve_version"] == {"cadwyn.api_version": "2000-01-01"}
+    assert spans["cadwyn.migrate_request"] == {"cadwyn.api_version": "2000-01-01", "http.route": "/users"}
+    assert spans["cadwyn.endpoint"] == {"cadwyn.api_version": "2000-01-01", "http.route": "/users"}
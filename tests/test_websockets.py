@@ -0,0 +1,112 @@
+from datetime import date
+
+import pytest
+from fastapi import WebSocket
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from starlette.websockets import WebSocketDisconnect
+
+from cadwyn import Cadwyn, Version, VersionBundle, VersionedAPIRouter
+from cadwyn.structure import (
+    RequestInfo,
+    ResponseInfo,
+    VersionChange,
+    convert_request_to_next_version_for,
+    convert_response_to_previous_version_for,
+    schema,
+)
+from cadwyn.websockets import VersionedWebSocket, websocket_message_models
+
+
+class Subscription(BaseModel):
+    topics: list[str]
+
+
+class Event(BaseModel):
+    topic: str
+    price: int
+
+
+class Ping(BaseModel):
+    id: int
+    new_field: str = "new"
+
+
+def create_app(**kwargs) -> Cadwyn:
+    class ChangeSubscriptionAndEvents(VersionChange):
+        description = "..."
+        instructions_to_migrate_to_previous_version = (schema(Ping).field("new_field").didnt_exist,)
+
+        @convert_request_to_next_version_for(Subscription)
+        def migrate_subscription(request: RequestInfo):
+            request.body["topics"] = request.body.pop("topic").split(",")
+
+        @convert_response_to_previous_version_for(Event)
+        def migrate_event(response: ResponseInfo):
+            response.body["topic"] = response.body["topic"].upper()
+
+    router = VersionedAPIRouter()
+
+    @router.websocket("/feed")
+    @websocket_message_models(Subscription, Event, Ping)
+    async def feed(websocket: WebSocket):
+        await websocket.accept()
+        versioned_websocket = VersionedWebSocket(websocket)
+        subscription = await versioned_websocket.receive_model(Subscription)
+        await versioned_websocket.send_models(
+            [Event(topic=topic, price=index) for index, topic in enumerate(subscription.topics)] + [Ping(id=1)]
+        )
+        await versioned_websocket.send_model(Ping(id=2))
+        await websocket.close()
+
+    app = Cadwyn(
+        versions=VersionBundle(Version(date(2001, 1, 1), ChangeSubscriptionAndEvents), Version(date(2000, 1, 1))),
+        **kwargs,
+    )
+    app.generate_and_include_versioned_routers(router)
+    return app
+
+
+def test__websocket__latest_version__messages_are_not_migrated():
+    with TestClient(create_app()).websocket_connect("/feed", headers={"x-api-version": "2001-01-01"}) as websocket:
+        websocket.send_json({"topics": ["a", "b"]})
+        assert websocket.receive_json() == {"topic": "a", "price": 0}
+        assert websocket.receive_json() == {"topic": "b", "price": 1}
+        assert websocket.receive_json() == {"id": 1, "new_field": "new"}
+        assert websocket.receive_json() == {"id": 2, "new_field": "new"}
+
+
+@pytest.mark.parametrize("version", ["2000-01-01", "2000-06-01"])
+def test__websocket__old_version__messages_are_migrated(version: str):
+    with TestClient(create_app()).websocket_connect("/feed", headers={"x-api-version": version}) as websocket:
+        websocket.send_json({"topic": "a,b"})
+        assert websocket.receive_json() == {"topic": "A", "price": 0}
+        assert websocket.receive_json() == {"topic": "B", "price": 1}
+        assert websocket.receive_json() == {"id": 1}
+        assert websocket.receive_json() == {"id": 2}
+
+
+def test__websocket__path_versioning():
+    client = TestClient(create_app(api_version_location="path"))
+    with client.websocket_connect("/2000-01-01/feed") as websocket:
+        websocket.send_json({"topic": "a"})
+        assert websocket.receive_json() == {"topic": "A", "price": 0}
+
+
+def test__websocket__invalid_version__connection_is_rejected():
+    with (
+        pytest.raises(WebSocketDisconnect) as exc_info,
+        TestClient(create_app()).websocket_connect("/feed", headers={"x-api-version": "invalid"}),
+    ):
+        pass  # pragma: no cover
+    assert exc_info.value.code == 1008
+
+
+def test__websocket__data_converters_are_counted_in_metrics():
+    app = create_app(metrics_url="/metrics")
+    with TestClient(app).websocket_connect("/feed", headers={"x-api-version": "2000-01-01"}) as websocket:
+        websocket.send_json({"topic": "a,b"})
+        for _ in range(4):
+            websocket.receive_json()
+    assert app.metrics is not None
+    assert list(app.metrics.data_converter_calls) == [1, 2]